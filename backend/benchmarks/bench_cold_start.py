@@ -0,0 +1,121 @@
+"""Cold-start benchmark: import time and time-to-first-request, checked against a budget.
+
+Each run uses a fresh interpreter, so nothing is cached in-process:
+  * import: `import main` in a subprocess, reporting the backend's own STARTUP_TIMINGS
+    and whether any lazily-loaded auth stack (passlib, jose, httpx, argon2) got imported.
+  * first request: spawn `uvicorn main:app` and poll `/api/auth/status` until it answers.
+
+Exits non-zero when the median import time or time-to-first-request exceeds its budget,
+or when an auth stack is imported eagerly again.
+
+Usage:
+    python benchmarks/bench_cold_start.py --runs 5 --import-budget-ms 1000 --ttfr-budget-ms 2500
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+from common import BACKEND_DIR, add_keep_option, make_workspace
+
+LAZY_MODULES = ("passlib", "jose", "httpx", "argon2")
+
+IMPORT_PROBE = """
+import json, sys, time
+t = time.perf_counter()
+import main
+elapsed = time.perf_counter() - t
+print(json.dumps({
+    "import_s": elapsed,
+    "timings": main.STARTUP_TIMINGS,
+    "eager": [m for m in %r if m in sys.modules],
+}))
+""" % (LAZY_MODULES,)
+
+
+def backend_env(data_dir: str, config_dir: str) -> dict:
+    env = dict(os.environ)
+    env.update({"DATA_DIR": data_dir, "CONFIG_DIR": config_dir, "SECRET_KEY": "bench"})
+    return env
+
+
+def measure_import(env: dict) -> dict:
+    out = subprocess.run([sys.executable, "-c", IMPORT_PROBE], cwd=BACKEND_DIR, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_first_request(env: dict, timeout: float = 30.0) -> float:
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/api/auth/status"
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(url, timeout=1) as resp:
+                    if resp.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError(f"Backend did not answer within {timeout}s")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main_bench():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-budget-ms", type=float, default=1000)
+    parser.add_argument("--ttfr-budget-ms", type=float, default=2500)
+    add_keep_option(parser)
+    args = parser.parse_args()
+
+    _, data_dir, config_dir = make_workspace(keep=args.keep)
+    env = backend_env(data_dir, config_dir)
+
+    imports = [measure_import(env) for _ in range(args.runs)]
+    import_ms = statistics.median(r["import_s"] for r in imports) * 1000
+    phases = {}
+    for r in imports:
+        for phase, seconds in r["timings"].items():
+            phases.setdefault(phase, []).append(seconds * 1000)
+    eager = sorted({m for r in imports for m in r["eager"]})
+
+    ttfr_ms = statistics.median(measure_first_request(env) for _ in range(args.runs)) * 1000
+
+    print(f"import main (median of {args.runs}):   {import_ms:8.1f} ms  (budget {args.import_budget_ms:.0f} ms)")
+    for phase, samples in phases.items():
+        print(f"  {phase:<28} {statistics.median(samples):8.1f} ms")
+    print(f"time to first request (median):  {ttfr_ms:8.1f} ms  (budget {args.ttfr_budget_ms:.0f} ms)")
+    print(f"auth stacks imported eagerly:    {', '.join(eager) or 'none'}")
+
+    failures = []
+    if import_ms > args.import_budget_ms:
+        failures.append(f"import time {import_ms:.0f} ms over budget {args.import_budget_ms:.0f} ms")
+    if ttfr_ms > args.ttfr_budget_ms:
+        failures.append(f"time to first request {ttfr_ms:.0f} ms over budget {args.ttfr_budget_ms:.0f} ms")
+    if eager:
+        failures.append(f"lazily-loaded modules imported at startup: {', '.join(eager)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,84 @@
+"""Directory listing benchmark: serialization CPU time and bytes on the wire.
+
+Builds a synthetic folder of N videos (with subtitles and RAR volumes), then compares
+FastAPI's default `jsonable_encoder` + `json` path with the orjson path used by
+`/api/files`, and reports raw vs gzip payload size and the 304 revalidation cost.
+
+Usage:
+    python benchmarks/bench_listing.py --videos 1000 --rounds 10
+"""
+import argparse
+import gzip
+import json
+import os
+
+from common import Timer, add_keep_option, load_app, make_workspace
+
+
+def populate(data_dir: str, videos: int):
+    folder = os.path.join(data_dir, "Movies")
+    os.makedirs(folder)
+    for i in range(videos):
+        base = os.path.join(folder, f"Some Fairly Long Movie Title ({1950 + i % 70}) [{i:05d}] 2160p")
+        open(base + ".mkv", "wb").close()
+        open(base + ".en.srt", "wb").close()
+        if i % 2:
+            open(base + ".mkv.part1.rar", "wb").close()
+    return "Movies"
+
+
+def main_bench():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--videos", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=10)
+    add_keep_option(parser)
+    args = parser.parse_args()
+
+    _, data_dir, config_dir = make_workspace(keep=args.keep)
+    main = load_app(data_dir, config_dir)
+    subpath = populate(data_dir, args.videos)
+
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.testclient import TestClient
+    import orjson
+
+    with Timer() as t:
+        listing = main.get_directory_contents(subpath)
+    print(f"listing build:            {t.wall * 1000:8.1f} ms wall ({args.videos} videos)")
+
+    with Timer() as t:
+        for _ in range(args.rounds):
+            default_body = json.dumps(jsonable_encoder(listing)).encode()
+    print(f"jsonable_encoder + json:  {t.cpu / args.rounds * 1000:8.2f} ms CPU / response")
+
+    with Timer() as t:
+        for _ in range(args.rounds):
+            fast_body = orjson.dumps(listing)
+    print(f"orjson:                   {t.cpu / args.rounds * 1000:8.2f} ms CPU / response")
+
+    with Timer() as t:
+        for _ in range(args.rounds):
+            gz_body = gzip.compress(fast_body, compresslevel=main.GZIP_COMPRESS_LEVEL)
+    print(f"gzip level {main.GZIP_COMPRESS_LEVEL}:             {t.cpu / args.rounds * 1000:8.2f} ms CPU / response")
+
+    print(f"bytes (default json):     {len(default_body):>10,}")
+    print(f"bytes (orjson):           {len(fast_body):>10,}")
+    print(f"bytes (orjson + gzip):    {len(gz_body):>10,}  ({len(gz_body) / len(fast_body):.1%})")
+
+    # End-to-end through the ASGI app, including the middleware stack
+    client = TestClient(main.app)
+    with Timer() as t:
+        for _ in range(args.rounds):
+            resp = client.get("/api/files", params={"path": subpath}, headers={"Accept-Encoding": "gzip"})
+    wire = resp.headers.get("content-length", "?")
+    print(f"GET /api/files (200):     {t.wall / args.rounds * 1000:8.1f} ms wall, {wire} bytes on the wire ({resp.headers.get('content-encoding', 'identity')})")
+
+    etag = resp.headers["etag"]
+    with Timer() as t:
+        for _ in range(args.rounds):
+            resp = client.get("/api/files", params={"path": subpath}, headers={"If-None-Match": etag})
+    print(f"GET /api/files (304):     {t.wall / args.rounds * 1000:8.1f} ms wall, status {resp.status_code}")
+
+
+if __name__ == "__main__":
+    main_bench()
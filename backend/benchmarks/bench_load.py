@@ -0,0 +1,249 @@
+"""Concurrent API load test: latency percentiles, throughput and event-loop lag.
+
+Runs the backend under uvicorn on a background thread (its own event loop, with a lag
+probe) next to a local fake OIDC provider (`fake_oidc.py`), then drives a mix of
+directory listings, status polls and local logins from N concurrent clients over HTTP.
+
+  * --auth local: clients send a local HS256 session token (Local Admin mode)
+  * --auth oidc:  clients send RS256 tokens minted by the fake provider, so every request
+                  goes through validate_oidc_token. --jwks-ttl forces periodic discovery/JWKS
+                  refreshes, --userinfo drops the email claim so each new token hits userinfo,
+                  --token-rotate-s makes clients fetch fresh tokens from the token endpoint.
+
+Logins verify the admin password with argon2. Each comes from its own X-Forwarded-For
+address so the per-IP rate limiter doesn't turn them into cheap 429s.
+
+Reports p50/p95/p99 latency and throughput per request type, plus event-loop lag overall,
+while argon2 logins are in flight, and right after OIDC discovery/JWKS refreshes.
+
+Usage:
+    python benchmarks/bench_load.py --users 50 --duration 20 --mix files=60,status=35,login=5 --auth oidc
+"""
+import argparse
+import asyncio
+import bisect
+import random
+import threading
+import time
+
+from bench_cold_start import free_port
+from bench_listing import populate
+from common import add_keep_option, load_app, make_workspace, percentile
+from fake_oidc import FakeOIDCProvider
+
+ADMIN_EMAIL = "admin@bench.local"
+ADMIN_PASSWORD = "bench-password"
+CLIENT_ID = "splitter-bench"
+LAG_INTERVAL = 0.01      # lag probe tick (seconds)
+REFRESH_WINDOW = 0.5     # seconds after a discovery fetch attributed to the OIDC refresh
+
+
+class LagProbe:
+    """Measures how late the server's event loop wakes up from a fixed sleep."""
+
+    def __init__(self):
+        self.samples = []  # [(perf_counter, lag_seconds)]
+
+    async def run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(LAG_INTERVAL)
+            now = time.perf_counter()
+            self.samples.append((now, max(0.0, now - start - LAG_INTERVAL)))
+
+
+def start_server(app, port: int, probe: LagProbe):
+    import uvicorn
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning",
+                            proxy_headers=True, forwarded_allow_ips="*")
+    server = uvicorn.Server(config)
+
+    def serve():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        probe_task = loop.create_task(probe.run())
+        loop.run_until_complete(server.serve())
+        probe_task.cancel()
+        loop.run_until_complete(asyncio.gather(probe_task, return_exceptions=True))
+        loop.close()
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, thread
+
+
+def parse_mix(value: str) -> dict:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ("files", "status", "login"):
+            raise argparse.ArgumentTypeError(f"unknown request type: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class TokenSource:
+    """Bearer tokens per simulated user (local session token, or OIDC tokens from the provider)."""
+
+    def __init__(self, main, provider, auth: str, rotate_s: float):
+        self.main = main
+        self.provider = provider
+        self.auth = auth
+        self.rotate_s = rotate_s
+        self.tokens = {}  # user -> (token, minted_at)
+
+    async def get(self, client, user: int) -> str:
+        token, minted = self.tokens.get(user, (None, 0.0))
+        if token and (self.auth == "local" or not self.rotate_s or time.perf_counter() - minted < self.rotate_s):
+            return token
+        if self.auth == "local":
+            token = self.main.create_access_token({"sub": ADMIN_EMAIL})
+        else:
+            resp = await client.post(f"{self.provider.issuer}/token", data={"username": ADMIN_EMAIL})
+            token = resp.json()["access_token"]
+        self.tokens[user] = (token, time.perf_counter())
+        return token
+
+
+async def user_loop(user: int, client, args, tokens: TokenSource, stats: dict, login_windows: list, deadline: float):
+    rng = random.Random(user)
+    ops, weights = zip(*args.mix.items())
+    etag = None
+    login_seq = 0
+    while time.perf_counter() < deadline:
+        op = rng.choices(ops, weights)[0]
+        headers = {}
+        if op == "login":
+            login_seq += 1
+            headers["X-Forwarded-For"] = f"10.{user // 250 % 250}.{user % 250}.{login_seq % 250 + 1}"
+        else:
+            headers["Authorization"] = f"Bearer {await tokens.get(client, user)}"
+
+        start = time.perf_counter()
+        if op == "files":
+            if etag:
+                headers["If-None-Match"] = etag
+            resp = await client.get("/api/files", params={"path": "Movies"}, headers=headers)
+            etag = resp.headers.get("etag", etag)
+        elif op == "status":
+            resp = await client.get("/api/status", headers=headers)
+        else:
+            resp = await client.post("/api/auth/login", data={"username": ADMIN_EMAIL, "password": ADMIN_PASSWORD},
+                                     headers=headers)
+        end = time.perf_counter()
+
+        stats[op]["latency"].append(end - start)
+        if resp.status_code not in (200, 304):
+            stats[op]["errors"] += 1
+        if op == "login":
+            login_windows.append((start, end))
+        if args.think_ms:
+            await asyncio.sleep(rng.expovariate(1000 / args.think_ms))
+
+
+def lag_in_windows(samples, windows) -> list:
+    """Lag samples whose timestamp falls inside any (start, end) window."""
+    if not windows:
+        return []
+    windows = sorted(windows)
+    starts = [w[0] for w in windows]
+    selected = []
+    for t, lag in samples:
+        i = bisect.bisect_right(starts, t) - 1
+        # Windows can overlap; scan back while they might still cover t
+        while i >= 0:
+            if windows[i][1] >= t:
+                selected.append(lag)
+                break
+            if t - windows[i][0] > 60:
+                break
+            i -= 1
+    return selected
+
+
+def print_lag(label: str, lags: list):
+    if not lags:
+        print(f"  {label:<26} n/a")
+        return
+    print(f"  {label:<26} p50 {percentile(lags, 50) * 1000:7.1f}  p95 {percentile(lags, 95) * 1000:7.1f}  "
+          f"p99 {percentile(lags, 99) * 1000:7.1f}  max {max(lags) * 1000:7.1f} ms  ({len(lags)} samples)")
+
+
+async def run_load(base_url: str, args, tokens: TokenSource, stats: dict, login_windows: list) -> float:
+    import httpx
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        start = time.perf_counter()
+        deadline = start + args.duration
+        await asyncio.gather(*(user_loop(u, client, args, tokens, stats, login_windows, deadline)
+                               for u in range(args.users)))
+        return time.perf_counter() - start
+
+
+def main_bench():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20, help="concurrent clients (users x tabs)")
+    parser.add_argument("--duration", type=float, default=15, help="seconds of load")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("files=60,status=35,login=5"))
+    parser.add_argument("--auth", choices=("local", "oidc"), default="oidc")
+    parser.add_argument("--videos", type=int, default=200, help="videos in the listed folder")
+    parser.add_argument("--think-ms", type=float, default=50, help="mean pause between a client's requests")
+    parser.add_argument("--jwks-ttl", type=float, default=5, help="backend OIDC discovery/JWKS cache TTL (oidc)")
+    parser.add_argument("--token-rotate-s", type=float, default=0, help="fetch a new OIDC token this often (0 = never)")
+    parser.add_argument("--userinfo", action="store_true", help="mint tokens without email so the backend calls userinfo")
+    add_keep_option(parser)
+    args = parser.parse_args()
+
+    _, data_dir, config_dir = make_workspace(keep=args.keep)
+    main = load_app(data_dir, config_dir, bypass_auth=False)
+    populate(data_dir, args.videos)
+
+    settings = main.get_settings_internal()
+    settings.admin_email = ADMIN_EMAIL
+    settings.admin_password_hash = main.get_password_hash(ADMIN_PASSWORD)
+    with open(main.SETTINGS_FILE, "w") as f:
+        f.write(settings.model_dump_json(indent=2))
+
+    provider = FakeOIDCProvider(CLIENT_ID, email_in_token=not args.userinfo).start()
+    main.OIDC_AUTHORITY = provider.issuer
+    main.OIDC_CLIENT_ID = CLIENT_ID
+    main.OIDC_CACHE.update({"config": None, "jwks": None, "last_updated": 0, "ttl": args.jwks_ttl})
+
+    probe = LagProbe()
+    port = free_port()
+    server, thread = start_server(main.app, port, probe)
+    tokens = TokenSource(main, provider, args.auth, args.token_rotate_s)
+    stats = {op: {"latency": [], "errors": 0} for op in args.mix}
+    login_windows = []
+
+    load_start = time.perf_counter()
+    elapsed = asyncio.run(run_load(f"http://127.0.0.1:{port}", args, tokens, stats, login_windows))
+    server.should_exit = True
+    thread.join()
+    provider.stop()
+
+    total = sum(len(s["latency"]) for s in stats.values())
+    print(f"\nload: {args.users} clients, {args.duration:g} s, mix {args.mix}, auth={args.auth}"
+          + (" (userinfo)" if args.userinfo else ""))
+    print(f"throughput: {total / elapsed:8.1f} req/s  ({total} requests)")
+    for op, s in stats.items():
+        lat = s["latency"]
+        if not lat:
+            continue
+        print(f"  {op:<8} {len(lat) / elapsed:7.1f} req/s  p50 {percentile(lat, 50) * 1000:7.1f}  "
+              f"p95 {percentile(lat, 95) * 1000:7.1f}  p99 {percentile(lat, 99) * 1000:7.1f} ms  errors {s['errors']}")
+
+    samples = [s for s in probe.samples if s[0] >= load_start]
+    refreshes = [(t, t + REFRESH_WINDOW) for t, path in provider.hits if path == "/.well-known/openid-configuration"]
+    print("event-loop lag:")
+    print_lag("overall", [lag for _, lag in samples])
+    print_lag("during argon2 logins", lag_in_windows(samples, login_windows))
+    print_lag("after OIDC refresh", lag_in_windows(samples, refreshes))
+    print(f"OIDC provider hits: discovery {provider.count('/.well-known/openid-configuration')}, "
+          f"jwks {provider.count('/jwks')}, userinfo {provider.count('/userinfo')}, token {provider.count('/token')}")
+
+
+if __name__ == "__main__":
+    main_bench()
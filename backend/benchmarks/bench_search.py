@@ -0,0 +1,98 @@
+"""Library search benchmark: index build, incremental rescan and query latency.
+
+Builds a synthetic library of N videos spread over show/season folders (empty files,
+some with subtitles and RAR volumes), indexes it, then reports:
+
+  * full index time, and the no-change rescan (stat of every folder, nothing reclassified)
+  * rescan after touching a handful of folders
+  * `/api/search` latency for substring and prefix queries, plus the raw index query time
+
+Usage:
+    python benchmarks/bench_search.py --videos 100000 --queries 200
+"""
+import argparse
+import os
+import random
+import time
+
+from common import Timer, add_keep_option, load_app, make_workspace, percentile
+
+WORDS = ["Matrix", "Station", "Eleven", "Harbor", "Midnight", "Garden", "Kingdom", "River", "Orbit",
+         "Shadow", "Winter", "Empire", "Crystal", "Falcon", "Signal", "Atlas", "Echo", "Nomad"]
+
+
+def populate(data_dir: str, videos: int, per_folder: int, seed: int = 7) -> list:
+    """Create `videos` empty .mkv files in folders of `per_folder`. Returns their folder paths."""
+    rng = random.Random(seed)
+    folders = []
+    for i in range(videos):
+        if i % per_folder == 0:
+            title = f"{rng.choice(WORDS)} {rng.choice(WORDS)} ({1970 + i // per_folder % 55})"
+            folder = os.path.join(data_dir, "Shows", f"{title} [{i // per_folder:05d}]", f"Season {i // per_folder % 9 + 1:02d}")
+            os.makedirs(folder)
+            folders.append(folder)
+        base = os.path.join(folder, f"{os.path.basename(os.path.dirname(folder))} S01E{i % per_folder + 1:02d} 1080p")
+        open(base + ".mkv", "wb").close()
+        if i % 3 == 0:
+            open(base + ".en.srt", "wb").close()
+        if i % 4 == 0:
+            open(base + ".mkv.part1.rar", "wb").close()
+    return folders
+
+
+def main_bench():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--videos", type=int, default=100000)
+    parser.add_argument("--per-folder", type=int, default=20, help="videos per season folder")
+    parser.add_argument("--queries", type=int, default=200, help="queries per query type")
+    parser.add_argument("--touch", type=int, default=10, help="folders changed before the incremental rescan")
+    add_keep_option(parser)
+    args = parser.parse_args()
+
+    _, data_dir, config_dir = make_workspace(keep=args.keep)
+    main = load_app(data_dir, config_dir)
+    with Timer() as t:
+        folders = populate(data_dir, args.videos, args.per_folder)
+    print(f"library:              {args.videos} videos in {len(folders)} folders (created in {t.wall:.1f} s)")
+
+    index = main.get_library()
+    with Timer() as t:
+        index.refresh()
+    print(f"full index:           {t.wall:8.2f} s  ({index.count()} videos, fts={index.fts})")
+    with Timer() as t:
+        stats = index.refresh()
+    print(f"rescan, no changes:   {t.wall * 1000:8.1f} ms  ({stats['dirs_scanned']} folders reclassified)")
+
+    rng = random.Random(1)
+    for folder in rng.sample(folders, min(args.touch, len(folders))):
+        open(os.path.join(folder, "New Episode S01E99 1080p.mkv"), "wb").close()
+    with Timer() as t:
+        stats = index.refresh()
+    print(f"rescan, {args.touch} changed:   {t.wall * 1000:8.1f} ms  ({stats['dirs_scanned']} folders reclassified)")
+
+    from fastapi.testclient import TestClient
+    client = TestClient(main.app)
+    queries = {
+        "substring": [w.lower()[1:5] for w in WORDS],  # "atri", "tati", ...
+        "prefix": [w[:3] for w in WORDS],
+        "multi-term": [f"{a} {b[:4]} e0{rng.randint(1, 9)}" for a, b in zip(WORDS, reversed(WORDS))],
+        "2-char": [w[:2] for w in WORDS],
+    }
+    print("query latency (/api/search, limit 50):")
+    for kind, terms in queries.items():
+        api, raw, hits = [], [], []
+        for i in range(args.queries):
+            q = terms[i % len(terms)]
+            start = time.perf_counter()
+            body = client.get("/api/search", params={"q": q}).json()
+            api.append(time.perf_counter() - start)
+            raw.append(body["elapsed_ms"] / 1000)
+            hits.append(len(body["results"]))
+        print(f"  {kind:<11} p50 {percentile(api, 50) * 1000:6.2f}  p95 {percentile(api, 95) * 1000:6.2f} ms"
+              f"   index p50 {percentile(raw, 50) * 1000:6.2f}  p95 {percentile(raw, 95) * 1000:6.2f} ms"
+              f"   ({sum(hits) / len(hits):.0f} hits avg)")
+
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,215 @@
+"""End-to-end split benchmark: orchestration overhead, status latency and kill-to-stop time.
+
+Drives `/api/split`, `/api/status` and `/api/kill` through the ASGI app in-process,
+with either the bundled `fake_rar.py` stand-in (default; real RAR5 volumes at a fixed
+`--speed-mbps`) or the real `rar` binary (`--rar real`).
+
+  * per-file overhead: job wall time through the API minus the time the same `rar`
+    commands take when run directly, divided by the number of files
+  * status latency: time from the stand-in printing a line to `/api/status` showing it
+    (stand-in only; includes up to one `--poll-ms`), plus `/api/status` request latency
+  * kill-to-stop: `POST /api/kill` until `/api/status` reports idle and `rar` has exited
+  * cleanup: every file lists as SPLIT after a run, including a re-split over old volumes
+
+Usage:
+    python benchmarks/bench_split.py --files 8 --file-mb 64 --volume-mb 16 --speed-mbps 200 --kill-runs 3
+"""
+import argparse
+import os
+import shutil
+import stat
+import subprocess
+import sys
+import time
+
+from common import add_keep_option, load_app, make_workspace, percentile
+
+FAKE_RAR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_rar.py")
+
+
+def install_fake_rar(root: str) -> str:
+    """Put a `rar` shim for the stand-in on PATH. Returns its directory."""
+    bin_dir = os.path.join(root, "bin")
+    os.makedirs(bin_dir)
+    shim = os.path.join(bin_dir, "rar")
+    with open(shim, "w") as f:
+        f.write(f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_RAR}" "$@"\n')
+    os.chmod(shim, os.stat(shim).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    os.environ["PATH"] = bin_dir + os.pathsep + os.environ["PATH"]
+    return bin_dir
+
+
+def populate(data_dir: str, files: int, file_mb: int) -> list:
+    folder = os.path.join(data_dir, "Bench")
+    os.makedirs(folder, exist_ok=True)
+    block = os.urandom(1024 * 1024)
+    rel_paths = []
+    for i in range(files):
+        name = f"Benchmark Movie {i:03d}.mkv"
+        with open(os.path.join(folder, name), "wb") as f:
+            for _ in range(file_mb):
+                f.write(block)
+        rel_paths.append(f"Bench/{name}")
+    return rel_paths
+
+
+def clean(main, rel_paths):
+    for rel in rel_paths:
+        main.cleanup_file_artifacts(os.path.join(main.DATA_DIR, rel))
+
+
+def run_direct(main, rel_paths) -> float:
+    """Same rar commands the backend would run, without the backend. Returns seconds."""
+    start = time.perf_counter()
+    for rel in rel_paths:
+        path = os.path.join(main.DATA_DIR, rel)
+        name = os.path.basename(path)
+        subprocess.run(["rar", "a", f"-v{main.RAR_VOLUME_SIZE}", "-m0", "-y", name + ".rar", name],
+                       cwd=os.path.dirname(path), stdout=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+
+def wait_idle(client, poll_s: float, seen: dict | None = None, timeout: float = 3600) -> list:
+    """Poll /api/status until the job is over. Returns request latencies; records first-seen outputs."""
+    latencies = []
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        t = time.perf_counter()
+        status = client.get("/api/status").json()
+        latencies.append(time.perf_counter() - t)
+        if seen is not None and status.get("last_output") and status["last_output"] not in seen:
+            seen[status["last_output"]] = time.time()
+        if not status["is_running"]:
+            return latencies
+        time.sleep(poll_s)
+    raise RuntimeError("Split did not finish in time")
+
+
+def read_emitted(log_path: str) -> dict:
+    emitted = {}
+    if os.path.exists(log_path):
+        with open(log_path) as f:
+            for line in f:
+                ts, _, text = line.rstrip("\n").partition("\t")
+                emitted.setdefault(text.strip(), float(ts))
+    return emitted
+
+
+def run_api(client, rel_paths, poll_s: float, seen: dict) -> tuple:
+    start = time.perf_counter()
+    resp = client.post("/api/split", json={"files": rel_paths})
+    resp.raise_for_status()
+    latencies = wait_idle(client, poll_s, seen)
+    return time.perf_counter() - start, latencies
+
+
+def count_split(client, rel_paths) -> int:
+    listing = client.get("/api/files", params={"path": "Bench"}).json()
+    wanted = set(rel_paths)
+    return sum(1 for f in listing["files"] if f["path"] in wanted and f["status"] == "SPLIT")
+
+
+def measure_kill(main, client, rel_path: str, poll_s: float) -> dict:
+    """Start a split, wait until rar is writing, kill it. Returns timings and leftovers."""
+    clean(main, [rel_path])
+    client.post("/api/split", json={"files": [rel_path]}).raise_for_status()
+    deadline = time.perf_counter() + 30
+    process = None
+    while time.perf_counter() < deadline:
+        process = main.task_state.process
+        if process and main.task_state.last_output.startswith("Adding"):
+            break
+        if not client.get("/api/status").json()["is_running"]:
+            return {"finished_early": True}
+        time.sleep(poll_s)
+
+    start = time.perf_counter()
+    client.post("/api/kill")
+    wait_idle(client, poll_s)
+    stopped = time.perf_counter() - start
+    if process:
+        process.wait()
+    exited = time.perf_counter() - start
+    leftovers = main.rar5.find_volumes(os.path.join(main.DATA_DIR, rel_path))
+    clean(main, [rel_path])
+    return {"finished_early": False, "stop_s": stopped, "exit_s": exited, "leftovers": len(leftovers)}
+
+
+def main_bench():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rar", choices=("fake", "real"), default="fake")
+    parser.add_argument("--files", type=int, default=8)
+    parser.add_argument("--file-mb", type=int, default=64)
+    parser.add_argument("--volume-mb", type=int, default=16, help="volume size (rar -v<N>M)")
+    parser.add_argument("--speed-mbps", type=float, default=200, help="stand-in throughput cap (0 = unthrottled)")
+    parser.add_argument("--kill-runs", type=int, default=3)
+    parser.add_argument("--kill-speed-mbps", type=float, default=20, help="stand-in speed during kill runs")
+    parser.add_argument("--poll-ms", type=float, default=5)
+    add_keep_option(parser)
+    args = parser.parse_args()
+
+    root, data_dir, config_dir = make_workspace(keep=args.keep)
+    if args.rar == "fake":
+        install_fake_rar(root)
+        os.environ["FAKE_RAR_SPEED_MBPS"] = str(args.speed_mbps)
+    elif not shutil.which("rar"):
+        sys.exit("`rar` not found on PATH (use --rar fake for the bundled stand-in)")
+
+    main = load_app(data_dir, config_dir)
+    main.RAR_VOLUME_SIZE = f"{args.volume_mb}M"
+    main.RAR_VOLUME_SIZE_BYTES = args.volume_mb * 1000 * 1000
+    rel_paths = populate(data_dir, args.files, args.file_mb)
+    poll_s = args.poll_ms / 1000
+
+    from fastapi.testclient import TestClient
+    client = TestClient(main.app)
+
+    direct = run_direct(main, rel_paths)
+    clean(main, rel_paths)
+
+    log_path = os.path.join(root, "fake_rar.log")
+    os.environ["FAKE_RAR_LOG"] = log_path
+    seen = {}
+    fresh, status_latencies = run_api(client, rel_paths, poll_s, seen)
+    split_fresh = count_split(client, rel_paths)
+    # Second pass over the existing volumes exercises cleanup_file_artifacts as well
+    resplit, more_latencies = run_api(client, rel_paths, poll_s, {})
+    split_resplit = count_split(client, rel_paths)
+    del os.environ["FAKE_RAR_LOG"]
+    status_latencies += more_latencies
+
+    total_mb = args.files * args.file_mb
+    print(f"workload:                 {args.files} files x {args.file_mb} MB, {args.volume_mb} MB volumes, rar={args.rar}"
+          + (f" @ {args.speed_mbps:g} MB/s" if args.rar == "fake" else ""))
+    print(f"rar run directly:         {direct:8.2f} s  ({total_mb / direct:7.1f} MB/s)")
+    print(f"split via API:            {fresh:8.2f} s  ({total_mb / fresh:7.1f} MB/s)")
+    print(f"re-split over volumes:    {resplit:8.2f} s")
+    print(f"per-file overhead:        {(fresh - direct) / args.files * 1000:8.1f} ms  (re-split: {(resplit - direct) / args.files * 1000:.1f} ms)")
+
+    emitted = read_emitted(log_path)
+    delays = [seen[line] - emitted[line] for line in seen if line in emitted]
+    if delays:
+        print(f"status update latency:    p50 {percentile(delays, 50) * 1000:6.1f} ms  p95 {percentile(delays, 95) * 1000:6.1f} ms"
+              f"  ({len(delays)} of {len(emitted)} lines observed, poll {args.poll_ms:g} ms)")
+    else:
+        print("status update latency:    n/a (needs the stand-in's output log)")
+    print(f"/api/status request:      p50 {percentile(status_latencies, 50) * 1000:6.2f} ms  p95 {percentile(status_latencies, 95) * 1000:6.2f} ms"
+          f"  ({len(status_latencies)} polls)")
+    print(f"listing after split:      {split_fresh}/{args.files} SPLIT, after re-split {split_resplit}/{args.files} SPLIT")
+
+    if args.rar == "fake":
+        os.environ["FAKE_RAR_SPEED_MBPS"] = str(args.kill_speed_mbps)
+    kills = [measure_kill(main, client, rel_paths[0], poll_s) for _ in range(args.kill_runs)]
+    stopped = [k for k in kills if not k["finished_early"]]
+    if stopped:
+        print(f"kill -> status idle:      p50 {percentile([k['stop_s'] for k in stopped], 50) * 1000:6.1f} ms"
+              f"  max {max(k['stop_s'] for k in stopped) * 1000:6.1f} ms")
+        print(f"kill -> rar exited:       p50 {percentile([k['exit_s'] for k in stopped], 50) * 1000:6.1f} ms")
+        print(f"volumes left after kill:  {', '.join(str(k['leftovers']) for k in stopped)} (kept for resume)")
+    if len(stopped) < len(kills):
+        print(f"kill runs where the split finished first: {len(kills) - len(stopped)} (use a bigger --file-mb)")
+
+
+
+if __name__ == "__main__":
+    main_bench()
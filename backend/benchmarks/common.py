@@ -0,0 +1,72 @@
+"""Shared helpers for the backend benchmarks.
+
+Benchmarks import `main` in-process and point DATA_DIR / CONFIG_DIR at a scratch
+directory, so they never touch a real /data or /config mount.
+"""
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def add_keep_option(parser):
+    parser.add_argument("--keep", action="store_true", help="keep the scratch workspace after the run (debugging)")
+
+
+def make_workspace(prefix: str = "splitter-bench-", keep: bool = False):
+    """Create a scratch root with `data/` and `config/` subfolders. Returns (root, data_dir, config_dir).
+
+    The root is removed when the benchmark exits (also on errors) unless `keep` is set.
+    """
+    root = tempfile.mkdtemp(prefix=prefix)
+    if keep:
+        print(f"Keeping workspace: {root}")
+    else:
+        atexit.register(shutil.rmtree, root, True)
+    data_dir = os.path.join(root, "data")
+    config_dir = os.path.join(root, "config")
+    os.makedirs(data_dir)
+    os.makedirs(config_dir)
+    return root, data_dir, config_dir
+
+
+def load_app(data_dir: str, config_dir: str, bypass_auth: bool = True):
+    """Import the backend and rebind its storage paths. Returns the `main` module."""
+    import main
+    main.DATA_DIR = data_dir
+    main.CONFIG_DIR = config_dir
+    main.SETTINGS_FILE = os.path.join(config_dir, "settings.json")
+    if bypass_auth:
+        main.app.dependency_overrides[main.get_current_active_user] = (
+            lambda: main.User(email="bench@localhost", is_admin=True)
+        )
+    return main
+
+
+def percentile(samples, pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers (0 for an empty list)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+class Timer:
+    """Context manager measuring wall and CPU time in seconds."""
+
+    def __enter__(self):
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        self.wall = time.perf_counter() - self.wall_start
+        self.cpu = time.process_time() - self.cpu_start
+        return False
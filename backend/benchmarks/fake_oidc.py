@@ -0,0 +1,138 @@
+"""Local OIDC provider stand-in for the load benchmark.
+
+Serves discovery, JWKS, userinfo and a token endpoint from a background thread
+(stdlib HTTP server), signing RS256 tokens with a throwaway key. Every request is
+recorded with its `time.perf_counter()` timestamp so the benchmark can line up
+JWKS refreshes with event-loop lag on the backend.
+
+    provider = FakeOIDCProvider(client_id="bench").start()
+    token = provider.mint("admin@example.com")
+"""
+import json
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeOIDCProvider:
+    def __init__(self, client_id: str, host: str = "127.0.0.1", port: int = 0,
+                 token_ttl: int = 3600, email_in_token: bool = True):
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric import rsa
+        from jose import jwk
+
+        self.client_id = client_id
+        self.token_ttl = token_ttl
+        self.email_in_token = email_in_token
+        self.kid = "bench-key-1"
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self._private_pem = key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        ).decode()
+        public_pem = key.public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        ).decode()
+        public_jwk = jwk.construct(public_pem, "RS256").to_dict()
+        public_jwk.update({"kid": self.kid, "use": "sig"})
+        self.jwks = {"keys": [public_jwk]}
+
+        self.hits = []  # [(perf_counter, path)]
+        self._subjects = {}  # token -> email (for userinfo when the token carries no email)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self.issuer = f"http://{host}:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def discovery(self) -> dict:
+        return {
+            "issuer": self.issuer,
+            "jwks_uri": f"{self.issuer}/jwks",
+            "userinfo_endpoint": f"{self.issuer}/userinfo",
+            "token_endpoint": f"{self.issuer}/token",
+            "id_token_signing_alg_values_supported": ["RS256"],
+        }
+
+    def mint(self, email: str) -> str:
+        """RS256 token for `email`, valid for `token_ttl` seconds."""
+        from jose import jwt
+        now = int(time.time())
+        claims = {
+            "iss": self.issuer,
+            "aud": self.client_id,
+            "sub": email,
+            "iat": now,
+            "exp": now + self.token_ttl,
+            "jti": f"{now}-{time.perf_counter_ns()}",
+        }
+        if self.email_in_token:
+            claims["email"] = email
+        token = jwt.encode(claims, self._private_pem, algorithm="RS256", headers={"kid": self.kid})
+        with self._lock:
+            self._subjects[token] = email
+        return token
+
+    def count(self, path: str) -> int:
+        with self._lock:
+            return sum(1 for _, p in self.hits if p == path)
+
+    def _handler(self):
+        provider = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, code: int, body: dict):
+                data = json.dumps(body).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _record(self, path: str):
+                with provider._lock:
+                    provider.hits.append((time.perf_counter(), path))
+
+            def do_GET(self):
+                path = urllib.parse.urlparse(self.path).path
+                self._record(path)
+                if path == "/.well-known/openid-configuration":
+                    self._send(200, provider.discovery())
+                elif path == "/jwks":
+                    self._send(200, provider.jwks)
+                elif path == "/userinfo":
+                    token = self.headers.get("Authorization", "").removeprefix("Bearer ")
+                    with provider._lock:
+                        email = provider._subjects.get(token)
+                    if email:
+                        self._send(200, {"sub": email, "email": email})
+                    else:
+                        self._send(401, {"error": "invalid_token"})
+                else:
+                    self._send(404, {"error": "not_found"})
+
+            def do_POST(self):
+                path = urllib.parse.urlparse(self.path).path
+                self._record(path)
+                if path != "/token":
+                    self._send(404, {"error": "not_found"})
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                form = urllib.parse.parse_qs(self.rfile.read(length).decode())
+                email = form.get("username", ["user@example.com"])[0]
+                token = provider.mint(email)
+                self._send(200, {"access_token": token, "id_token": token,
+                                 "token_type": "Bearer", "expires_in": provider.token_ttl})
+
+        return Handler
@@ -0,0 +1,90 @@
+"""Stand-in for `rar a -v<size> -m0 -y <archive> <files...>` used by the split benchmark.
+
+Writes genuine stored RAR5 volumes with rar's naming (`movie.mkv.part1.rar`, ...)
+through the backend's native writer, prints rar-style progress lines, and can be
+throttled to a fixed speed so orchestration overhead can be separated from disk speed.
+
+Environment:
+    FAKE_RAR_SPEED_MBPS  payload throughput cap in MB/s (0 or unset = unthrottled)
+    FAKE_RAR_LOG         append `<time.time()>\t<line>` for every printed line (status latency)
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rar5  # noqa: E402
+
+# rar -v suffixes: none = x1000, k = KiB, b = bytes, m = MiB, M = 10^6, g = GiB, G = 10^9
+SIZE_UNITS = {"": 1000, "k": 1024, "b": 1, "m": 1024 ** 2, "M": 1000 ** 2, "g": 1024 ** 3, "G": 1000 ** 3}
+
+
+def parse_volume_size(value: str) -> int:
+    unit = value[-1] if value[-1] in SIZE_UNITS and not value[-1].isdigit() else ""
+    number = value[:-1] if unit else value
+    return int(float(number) * SIZE_UNITS[unit])
+
+
+def emit(line: str, log):
+    print(line, flush=True)
+    if log:
+        log.write(f"{time.time()}\t{line}\n")
+        log.flush()
+
+
+def main(argv) -> int:
+    if not argv or argv[0] != "a":
+        print("fake rar: only `a` (add) is supported", file=sys.stderr)
+        return 1
+    switches = [a for a in argv[1:] if a.startswith("-")]
+    positional = [a for a in argv[1:] if not a.startswith("-")]
+    if len(positional) < 2:
+        print("fake rar: usage: a -v<size> -m0 -y archive files...", file=sys.stderr)
+        return 1
+    volume_size = next((parse_volume_size(s[2:]) for s in switches if s.startswith("-v")), None)
+    if volume_size is None:
+        print("fake rar: -v<size> is required", file=sys.stderr)
+        return 1
+
+    archive, files = positional[0], positional[1:]
+    archive_base = archive[:-4] if archive.endswith(".rar") else archive
+    members = [(f, os.path.basename(f)) for f in files]
+    speed = float(os.getenv("FAKE_RAR_SPEED_MBPS", "0") or 0) * 1000 * 1000
+    log_path = os.getenv("FAKE_RAR_LOG")
+    log = open(log_path, "a") if log_path else None
+
+    emit("RAR 7.00   Copyright (c) 1993-2024 Alexander Roshal (fake rar stand-in)", log)
+    start = time.perf_counter()
+    state = {"percent": -1, "member": None}
+    sizes = [os.path.getsize(f) for f in files]
+
+    def open_volume(path):
+        emit(f"Creating archive {os.path.basename(path)}", log)
+        return open(path, "wb")
+
+    def on_progress(volume_number, written, total):
+        # Which member are we in? (rar prints one "Adding" line per member)
+        consumed, index = 0, 0
+        while index < len(sizes) - 1 and written > consumed + sizes[index]:
+            consumed += sizes[index]
+            index += 1
+        percent = int((written - consumed) * 100 / sizes[index]) if sizes[index] else 100
+        if (index, percent) != (state["member"], state["percent"]):
+            state["member"], state["percent"] = index, percent
+            emit(f"Adding    {members[index][1]:<60} {percent:3d}%", log)
+        if speed:
+            ahead = written / speed - (time.perf_counter() - start)
+            if ahead > 0:
+                time.sleep(ahead)
+
+    rar5.write_continuation(
+        archive_base, members, rar5.new_plan(members, volume_size), volume_size,
+        on_progress=on_progress, open_volume=open_volume
+    )
+    emit("Done", log)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,407 @@
+"""Headless batch splitting for cron jobs and scripts.
+
+Drives the same split engine as the web UI (`run_split_task`: subtitle detection, cleanup of
+old volumes, resume, hardlink/duplicate linking, direct-to-target) without the HTTP stack,
+so there is no login, token or status polling. Paths are relative to DATA_DIR (or absolute
+below it) and may be globs (`**` recurses); a folder stands for the videos directly inside it.
+
+The CLI claims the same job slot as the server (CONFIG_DIR/jobs.db), so the two never split
+at the same time. While a batch runs, the web UI shows its progress and its Stop, Pause and
+Stop-after-current buttons control it (as do `pause`, `resume` and `finish` below).
+
+Progress goes to stdout as JSON lines, one object per event
+(start, file_start, progress, paused, resumed, file_done, done, plus waiting/busy/error/skipped).
+Engine logs go to stderr.
+
+Usage (inside the backend container):
+    python cli.py split "Movies/**/*.mkv" --parallel 2 --throttle-mbps 80
+    python cli.py split "Shows/Severance" --to-target --wait
+    python cli.py status
+    python cli.py pause | resume | finish   (finish: stop after the current file)
+
+Exit codes: 0 all files split, 1 some files failed, 2 bad arguments or nothing to split,
+3 stopped, 75 job slot busy (without --wait).
+"""
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_STOPPED = 3
+EXIT_BUSY = 75  # EX_TEMPFAIL: cron wrappers can retry later
+
+# Engine code prints its logs; keep stdout for the JSON event stream
+OUT = sys.stdout
+sys.stdout = sys.stderr
+
+import main  # noqa: E402
+import library  # noqa: E402
+
+
+def emit(event: str, **fields):
+    OUT.write(json.dumps({"event": event, "ts": round(time.time(), 3), **fields}) + "\n")
+    OUT.flush()
+
+
+def resolve_files(patterns: list) -> list:
+    """Relative paths of the videos the arguments name, in argument order, without duplicates."""
+    data_dir = os.path.abspath(main.DATA_DIR)
+    files = []
+    for pattern in patterns:
+        full = pattern if os.path.isabs(pattern) else os.path.join(data_dir, pattern)
+        # Literal paths first: "[" in release names is common and would be read as a glob class
+        matches = [full] if os.path.exists(full) else sorted(glob.glob(full, recursive=True))
+        if not matches:
+            emit("skipped", path=pattern, reason="no match")
+        for match in matches:
+            match = os.path.abspath(match)
+            if match != data_dir and not match.startswith(data_dir + os.sep):
+                emit("skipped", path=match, reason="outside DATA_DIR")
+                continue
+            if os.path.isdir(match):
+                candidates = [os.path.join(match, n) for n in sorted(os.listdir(match)) if library.is_video(n)]
+            elif library.is_video(os.path.basename(match)):
+                candidates = [match]
+            else:
+                emit("skipped", path=os.path.relpath(match, data_dir), reason="not a video")
+                continue
+            for path in candidates:
+                rel = os.path.relpath(path, data_dir).replace("\\", "/")
+                if rel not in files:
+                    files.append(rel)
+    return files
+
+
+def file_status(rel_path: str, to_target: bool) -> str:
+    """Archive status after a file was processed (of the target copy in to_target mode).
+
+    MISSING if the file was deleted or renamed while the batch ran.
+    """
+    full_path = os.path.join(main.DATA_DIR, rel_path)
+    try:
+        info = main.describe_video(full_path, main.get_settings_internal().include_subtitles)
+        if not to_target:
+            return info["status"]
+        target_base = os.path.join(main.target_volume_dir(full_path), os.path.basename(full_path))
+        return main.get_archive_status(target_base, info["total_size"])[0]
+    except OSError:
+        return "MISSING"
+
+
+def follow(get_snapshot, on_event, finished, interval: float):
+    """Turn task_state snapshots into file_start/progress/paused/resumed events until finished() is true."""
+    current, output, paused = None, None, False
+    while not finished():
+        snap = get_snapshot()
+        if snap["paused"] != paused:
+            paused = snap["paused"]
+            on_event("paused" if paused else "resumed", {"file": snap["current_file"]})
+        if snap["current_file"] and snap["current_file"] != current:
+            current = snap["current_file"]
+            on_event("file_start", {"file": current})
+        if snap["last_output"] and snap["last_output"] != output:
+            output = snap["last_output"]
+            on_event("progress", {
+                "file": snap["current_file"],
+                "output": output,
+                "files_processed": snap["files_processed"],
+                "bytes_total": snap["bytes_total"],
+                "bytes_flushed": snap["bytes_flushed"]
+            })
+        time.sleep(interval)
+
+
+def run_in_process(files: list, groups: list, args, stopping: threading.Event) -> tuple:
+    """--parallel 1: run_split_task in a thread of this process (its monitor publishes the job).
+
+    Returns ({rel_path: ok}, stopped).
+    """
+    results = {}
+
+    def on_file_done(rel_path, completed):
+        status = file_status(rel_path, args.to_target)
+        results[rel_path] = completed and status == "SPLIT"
+        emit("file_done", file=rel_path, status=status, ok=results[rel_path])
+
+    job = threading.Thread(target=main.run_split_task, args=(files, args.to_target),
+                           kwargs={"groups": groups, "on_file_done": on_file_done})
+    job.start()
+
+    def finished():
+        if stopping.is_set():
+            main.task_state.request_stop()  # Outside the signal handler: needs task_state.lock
+        return not job.is_alive()
+
+    follow(main.task_state.snapshot, lambda event, fields: emit(event, **fields), finished, args.interval)
+    job.join()
+    return results, main.task_state.stop_requested  # Also set by a stop from the web UI
+
+
+def worker_main(worker_id: int, tasks, events, stop, controls: dict, to_target: bool, throttle_bps: int,
+                interval: float):
+    """Worker process: split the groups it takes from `tasks`, report through `events`.
+
+    controls: {"paused": Event, "stop_after_current": Event} mirrored from the job store by the parent.
+    """
+    sys.stdout = sys.stderr
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C reaches the whole group; the parent relays it
+    terminated = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: terminated.set())  # Stop rar too instead of orphaning it
+    main.SPLIT_THROTTLE_BPS = throttle_bps
+    base = {"bytes_total": 0, "bytes_flushed": 0}  # Totals of this worker's finished groups
+    done = threading.Event()
+
+    def get_snapshot():
+        if stop.is_set() or terminated.is_set():
+            main.task_state.request_stop()
+        main.task_state.apply_controls({name: flag.is_set() for name, flag in controls.items()})
+        snap = main.task_state.snapshot()
+        snap["bytes_total"] += base["bytes_total"]
+        snap["bytes_flushed"] += base["bytes_flushed"]
+        return snap
+
+    def on_file_done(rel_path, completed):
+        status = file_status(rel_path, to_target)
+        events.put(("file_done", worker_id, {"file": rel_path, "status": status, "ok": completed and status == "SPLIT"}))
+
+    watcher = threading.Thread(target=follow, daemon=True, args=(
+        get_snapshot, lambda event, fields: events.put((event, worker_id, fields)), done.is_set, interval))
+    watcher.start()
+    try:
+        for group in iter(tasks.get, None):
+            while controls["paused"].is_set() and not (stop.is_set() or terminated.is_set()):
+                time.sleep(0.2)  # Don't start the next file while paused
+            if stop.is_set() or terminated.is_set() or controls["stop_after_current"].is_set():
+                continue  # Drain the queue
+            main.run_split_task(group, to_target, groups=[group], publish=False, on_file_done=on_file_done)
+            snap = main.task_state.snapshot()
+            base["bytes_total"] += snap["bytes_total"]
+            base["bytes_flushed"] += snap["bytes_flushed"]
+    finally:
+        done.set()
+        watcher.join()
+        events.put(("exit", worker_id, {}))
+
+
+def run_workers(files: list, groups: list, args, stopping: threading.Event) -> tuple:
+    """--parallel N: one spawned process per worker; this process owns and publishes the job.
+
+    Returns ({rel_path: ok}, stopped).
+    """
+    ctx = multiprocessing.get_context("spawn")  # Fresh interpreter: no inherited SQLite handles or locks
+    tasks, events, stop = ctx.Queue(), ctx.Queue(), ctx.Event()
+    controls = {name: ctx.Event() for name in main.jobstate.CONTROLS}
+    workers = min(args.parallel, len(groups))
+    for group in groups:
+        tasks.put(group)
+    for _ in range(workers):
+        tasks.put(None)
+
+    results = {}
+    active = {}  # worker -> file it is on
+    progress = {}  # worker -> latest progress fields
+    state = {"last_output": ""}
+
+    def get_status() -> dict:
+        return {
+            "is_running": True,
+            "current_file": ", ".join(active.values()) or None,
+            "files_total": len(files),
+            "files_processed": len(results),
+            "last_output": state["last_output"],
+            "bytes_total": sum(p.get("bytes_total", 0) for p in progress.values()),
+            "bytes_flushed": sum(p.get("bytes_flushed", 0) for p in progress.values()),
+            **{name: flag.is_set() for name, flag in controls.items()}
+        }
+
+    def relay_controls(requested: dict):
+        for name, flag in controls.items():
+            if requested[name]:
+                flag.set()
+            else:
+                flag.clear()
+
+    # Same heartbeat/stop relay the server uses, fed with the aggregated status
+    monitor = main.jobstate.JobMonitor(main.get_job_store(), main.job_owner(), get_status, stop.set,
+                                       relay_controls).start()
+    procs = [ctx.Process(target=worker_main, args=(i, tasks, events, stop, controls, args.to_target,
+                                                   main.SPLIT_THROTTLE_BPS, args.interval))
+             for i in range(workers)]
+    for p in procs:
+        p.start()
+
+    running = workers
+    try:
+        while running:
+            if stopping.is_set():
+                stop.set()
+            try:
+                event, worker, fields = events.get(timeout=0.5)
+            except Exception:  # queue.Empty
+                if not any(p.is_alive() for p in procs):
+                    break  # A worker died without saying goodbye
+                continue
+            if event == "exit":
+                running -= 1
+                active.pop(worker, None)
+                continue
+            if event == "file_start":
+                active[worker] = fields["file"]
+            elif event == "progress":
+                progress[worker] = fields
+                state["last_output"] = fields["output"]
+            elif event == "file_done":
+                results[fields["file"]] = fields["ok"]
+            emit(event, worker=worker, **fields)
+    finally:
+        for p in procs:
+            p.join()
+        monitor.stop()
+        final = get_status()
+        final.update(is_running=False, current_file=None, paused=False)
+        main.get_job_store().release(main.job_owner(), final)
+    return results, stop.is_set()
+
+
+def group_files(files: list, args, stopping: threading.Event) -> list:
+    """group_split_files() for the claimed job. Duplicate hashing can take minutes, so the job
+    keeps its heartbeat and honours stop/pause requests meanwhile."""
+    settings = main.get_settings_internal()
+    if args.to_target:
+        return [[f] for f in files]
+    status = {"is_running": True, "current_file": None, "files_total": len(files), "files_processed": 0,
+              "last_output": "Checking for duplicate files..."}
+    gate = threading.Event()
+    gate.set()
+
+    def on_progress(message):
+        status["last_output"] = message
+        emit("progress", file=None, output=message, files_processed=0, bytes_total=0, bytes_flushed=0)
+
+    def on_control(controls):
+        if controls["paused"]:
+            gate.clear()
+        else:
+            gate.set()
+
+    def on_stop():
+        stopping.set()
+        gate.set()
+
+    monitor = main.jobstate.JobMonitor(main.get_job_store(), main.job_owner(), lambda: dict(status),
+                                       on_stop, on_control).start()
+    try:
+        return main.group_split_files(files, settings.include_subtitles, settings.dedupe_duplicates,
+                                      stop_event=stopping, gate=gate, on_progress=on_progress)
+    finally:
+        monitor.stop()
+
+
+def cmd_split(args) -> int:
+    if args.parallel < 1:
+        emit("error", message="--parallel must be at least 1")
+        return EXIT_USAGE
+    if args.to_target and not main.target_available():
+        emit("error", message=f"Target directory {main.TARGET_DIR} is not mounted")
+        return EXIT_USAGE
+    files = resolve_files(args.paths)
+    if not files:
+        emit("error", message="No videos matched")
+        return EXIT_USAGE
+    if args.throttle_mbps:
+        main.SPLIT_THROTTLE_BPS = int(args.throttle_mbps * 1000 * 1000)
+
+    # Same cross-process lock as /api/split: never split alongside the server
+    while not main.claim_job("split", len(files)):
+        if not args.wait:
+            emit("busy", job=main.get_job_store().snapshot())
+            return EXIT_BUSY
+        emit("waiting", job=main.get_job_store().snapshot())
+        time.sleep(args.wait_interval)
+
+    stopping = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stopping.set())
+
+    start = time.time()
+    try:
+        groups = group_files(files, args, stopping)
+    except BaseException:
+        main.get_job_store().release(main.job_owner(), {"is_running": False})
+        raise
+    if stopping.is_set():
+        main.get_job_store().release(main.job_owner(), {"is_running": False, "last_output": "Stopped"})
+        emit("done", files=len(files), split=0, failed=[], stopped=True, elapsed=round(time.time() - start, 3))
+        return EXIT_STOPPED
+    emit("start", files=len(files), groups=len(groups), parallel=min(args.parallel, len(groups)),
+         to_target=args.to_target, throttle_mbps=args.throttle_mbps)
+
+    if args.parallel == 1:
+        results, stopped = run_in_process(files, groups, args, stopping)
+    else:
+        results, stopped = run_workers(files, groups, args, stopping)
+
+    stopped = stopped or stopping.is_set() or len(results) < len(files)
+    failed = [f for f, ok in results.items() if not ok]
+    emit("done", files=len(files), split=len(results) - len(failed), failed=failed,
+         stopped=stopped, elapsed=round(time.time() - start, 3))
+    if stopped:
+        return EXIT_STOPPED
+    return EXIT_FAILED if failed else 0
+
+
+def cmd_status(args) -> int:
+    emit("status", job=main.get_job_store().snapshot())
+    return 0
+
+
+def cmd_control(args) -> int:
+    """pause / resume / finish: leave a request for whichever process runs the job."""
+    job = main.get_job_store().snapshot()
+    if args.command in ("pause", "resume") and job["is_running"] and job["kind"] != "split":
+        emit("error", message="Only split jobs can be paused")
+        return EXIT_USAGE
+    name, value = {"pause": ("paused", True), "resume": ("paused", False),
+                   "finish": ("stop_after_current", True)}[args.command]
+    if not main.get_job_store().set_control(name, value):
+        emit("error", message="No job is running")
+        return EXIT_FAILED
+    emit(args.command, file=job.get("current_file"))
+    return 0
+
+
+def main_cli(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    split = sub.add_parser("split", help="split videos (paths/globs relative to DATA_DIR)")
+    split.add_argument("paths", nargs="+", help="video files, folders or globs (quote them)")
+    split.add_argument("--to-target", action="store_true", help="write volumes to TARGET_DIR (direct-to-target mode)")
+    split.add_argument("--parallel", type=int, default=1, help="files split at the same time (worker processes)")
+    split.add_argument("--throttle-mbps", type=float, default=0, help="cap each split's source read rate (MB/s)")
+    split.add_argument("--wait", action="store_true", help="wait for a running job instead of exiting with 75")
+    split.add_argument("--wait-interval", type=float, default=10, help="seconds between claim attempts with --wait")
+    split.add_argument("--interval", type=float, default=1.0, help="seconds between progress checks")
+    split.set_defaults(func=cmd_split)
+
+    status = sub.add_parser("status", help="print the shared job status")
+    status.set_defaults(func=cmd_status)
+
+    for command, help_text in (("pause", "pause the running split (rar stopped, progress kept)"),
+                               ("resume", "continue a paused split"),
+                               ("finish", "end the running job once the current file is done")):
+        sub.add_parser(command, help=help_text).set_defaults(func=cmd_control)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
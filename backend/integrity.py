@@ -0,0 +1,285 @@
+"""Checksum sidecars and payload-only verification for stored (-m0) RAR5 volumes.
+
+The split pipeline hashes each source file while `rar` archives it and writes a
+`<video>.blake2.json` sidecar next to the volumes. Verification parses the RAR5
+block headers of every volume, locates the stored payload ranges and re-hashes
+only those bytes — one read of the output, no extraction, no second source pass.
+
+Digests are chunked (one BLAKE2b per CHUNK_SIZE of payload) so verification can
+hash chunks in parallel across volumes and point at the damaged volume.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import rar5
+
+CHECKSUM_SUFFIX = ".blake2.json"
+CHECKSUM_ALGORITHM = "blake2b-256/chunked"
+CHUNK_SIZE = 64 * 1024 * 1024   # Payload bytes per chunk digest
+READ_SIZE = 1024 * 1024         # Read block size for hashing
+VERIFY_WORKERS = 4              # Parallel chunk readers during verification
+
+
+class IntegrityError(Exception):
+    """Raised when an archive can't be parsed or verified."""
+
+
+class ChunkedHasher:
+    """Streaming BLAKE2b that also keeps one digest per CHUNK_SIZE block."""
+
+    def __init__(self, chunk_size: int = CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.size = 0
+        self.chunks = []
+        self._current = hashlib.blake2b(digest_size=32)
+        self._current_len = 0
+
+    def update(self, data: bytes):
+        view = memoryview(data)
+        while view:
+            take = min(len(view), self.chunk_size - self._current_len)
+            self._current.update(view[:take])
+            self._current_len += take
+            self.size += take
+            view = view[take:]
+            if self._current_len == self.chunk_size:
+                self._flush()
+
+    def _flush(self):
+        self.chunks.append(self._current.hexdigest())
+        self._current = hashlib.blake2b(digest_size=32)
+        self._current_len = 0
+
+    def result(self) -> dict:
+        if self._current_len or not self.chunks:
+            self._flush()
+        return {
+            "size": self.size,
+            "digest": combine_chunk_digests(self.chunks, self.size),
+            "chunks": self.chunks,
+        }
+
+
+def combine_chunk_digests(chunks, size: int) -> str:
+    top = hashlib.blake2b(digest_size=32)
+    for c in chunks:
+        top.update(bytes.fromhex(c))
+    top.update(str(size).encode())
+    return top.hexdigest()
+
+
+def hash_file(path: str, stop_event: threading.Event | None = None,
+              gate: threading.Event | None = None) -> dict | None:
+    """Hash a whole file. Returns None if stop_event was set before completion.
+
+    Reading waits while `gate` is cleared (a paused split).
+    """
+    hasher = ChunkedHasher()
+    with open(path, "rb", buffering=0) as f:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        while True:
+            while gate is not None and not gate.wait(0.2):
+                if stop_event is not None and stop_event.is_set():
+                    return None
+            if stop_event is not None and stop_event.is_set():
+                return None
+            block = f.read(READ_SIZE)
+            if not block:
+                break
+            hasher.update(block)
+    return hasher.result()
+
+
+class SourceHasher:
+    """Hashes a source file on a background thread while `rar` archives it.
+
+    Both readers stream the same file front to back, so whichever one is behind
+    is served from the page cache: the digest costs CPU, not a second disk pass.
+    """
+
+    def __init__(self, path: str, gate: threading.Event | None = None):
+        self.path = path
+        self.gate = gate
+        self.stop_event = threading.Event()
+        self.result = None
+        self.error = None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        try:
+            self.result = hash_file(self.path, self.stop_event, self.gate)
+        except Exception as e:
+            self.error = e
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def cancel(self):
+        self.stop_event.set()
+        self.thread.join()
+
+    def wait(self) -> dict:
+        self.thread.join()
+        if self.error:
+            raise self.error
+        if self.result is None:
+            raise IntegrityError(f"Hashing cancelled for {self.path}")
+        return self.result
+
+
+def sidecar_path(video_path: str, volume_dir: str | None = None) -> str:
+    name = os.path.basename(video_path) + CHECKSUM_SUFFIX
+    return os.path.join(volume_dir or os.path.dirname(video_path), name)
+
+
+def write_sidecar(video_path: str, members: dict, volume_dir: str | None = None) -> str:
+    """Write `{member_name: hash_result}` next to the archive volumes (atomically)."""
+    path = sidecar_path(video_path, volume_dir)
+    payload = {
+        "algorithm": CHECKSUM_ALGORITHM,
+        "chunk_size": CHUNK_SIZE,
+        "created": int(time.time()),
+        "members": members,
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_sidecar(path: str) -> dict:
+    with open(path, "r") as f:
+        data = json.load(f)
+    if data.get("algorithm") != CHECKSUM_ALGORITHM:
+        raise IntegrityError(f"Unsupported checksum algorithm: {data.get('algorithm')}")
+    return data
+
+
+def _hash_pieces(pieces) -> tuple:
+    """Hash a chunk spread over `[(path, offset, length)]`. Returns (hexdigest, bytes_read)."""
+    h = hashlib.blake2b(digest_size=32)
+    total = 0
+    for path, offset, length in pieces:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            while length > 0:
+                block = os.pread(fd, min(READ_SIZE, length), offset)
+                if not block:
+                    raise IntegrityError(f"{os.path.basename(path)}: unexpected end of volume")
+                h.update(block)
+                offset += len(block)
+                length -= len(block)
+                total += len(block)
+        finally:
+            os.close(fd)
+    return h.hexdigest(), total
+
+
+def _interleave_by_volume(jobs):
+    """Reorder chunk jobs so consecutive submissions hit different volumes."""
+    by_volume = {}
+    for job in jobs:
+        # A 0-byte member has one chunk job with no pieces (the empty digest): nothing to read
+        by_volume.setdefault(job[1][0][0] if job[1] else None, []).append(job)
+    queues = list(by_volume.values())
+    ordered = []
+    while queues:
+        for q in list(queues):
+            ordered.append(q.pop(0))
+            if not q:
+                queues.remove(q)
+    return ordered
+
+
+def verify_archive(video_path: str, volume_dir: str | None = None,
+                   stop_event: threading.Event | None = None, workers: int = VERIFY_WORKERS) -> dict:
+    """Re-hash the stored payload of an archive's volumes against its checksum sidecar."""
+    start = time.time()
+    sidecar = sidecar_path(video_path, volume_dir)
+    if not os.path.exists(sidecar) and volume_dir:
+        # Volumes copied to a target without the sidecar: fall back to the source copy
+        sidecar = sidecar_path(video_path)
+    if not os.path.exists(sidecar):
+        return {"status": "NO_CHECKSUM", "detail": "No checksum sidecar found"}
+
+    expected = read_sidecar(sidecar)
+    chunk_size = expected["chunk_size"]
+    volumes = rar5.find_volumes(video_path, volume_dir)
+    if not volumes:
+        return {"status": "MISSING", "detail": "No archive volumes found"}
+
+    # Map every member to its payload segments across volumes (headers are tiny; scan them in parallel)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        scanned = list(pool.map(rar5.scan_volume, volumes))
+    member_segments = {}
+    for volume, segments in zip(volumes, scanned):
+        for name, offset, size in segments:
+            member_segments.setdefault(name, []).append((volume, offset, size))
+
+    results = {}
+    jobs = []  # (member, pieces, chunk_index)
+    for name, info in expected["members"].items():
+        segments = member_segments.get(name, [])
+        stored = sum(s[2] for s in segments)
+        if stored != info["size"]:
+            results[name] = {"ok": False, "detail": f"size mismatch: stored {stored}, expected {info['size']}"}
+            continue
+        results[name] = {"ok": True, "bad_volumes": []}
+
+        # Slice the concatenated payload into chunk-aligned pieces
+        pieces, remaining, index = [], chunk_size, 0
+        for volume, offset, size in segments:
+            while size > 0:
+                take = min(size, remaining)
+                pieces.append((volume, offset, take))
+                offset += take
+                size -= take
+                remaining -= take
+                if remaining == 0:
+                    jobs.append((name, pieces, index))
+                    pieces, remaining, index = [], chunk_size, index + 1
+        if pieces or not jobs or jobs[-1][0] != name:
+            jobs.append((name, pieces, index))
+
+    bytes_read = 0
+    cancelled = False
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = []
+        for name, pieces, index in _interleave_by_volume(jobs):
+            futures.append((name, pieces, index, pool.submit(_hash_pieces, pieces)))
+        for name, pieces, index, future in futures:
+            if stop_event is not None and stop_event.is_set():
+                cancelled = True
+                future.cancel()
+                continue
+            digest, read = future.result()
+            bytes_read += read
+            chunks = expected["members"][name]["chunks"]
+            if index >= len(chunks) or chunks[index] != digest:
+                entry = results[name]
+                entry["ok"] = False
+                for volume, _, _ in pieces:
+                    vol_name = os.path.basename(volume)
+                    if vol_name not in entry["bad_volumes"]:
+                        entry["bad_volumes"].append(vol_name)
+
+    elapsed = time.time() - start
+    if cancelled:
+        status = "CANCELLED"
+    else:
+        status = "OK" if all(r["ok"] for r in results.values()) else "FAILED"
+    return {
+        "status": status,
+        "members": results,
+        "volumes": len(volumes),
+        "bytes_read": bytes_read,
+        "elapsed": round(elapsed, 2),
+        "throughput_mb_s": round(bytes_read / (1024 * 1024) / elapsed, 1) if elapsed > 0 else None,
+    }
@@ -0,0 +1,232 @@
+"""Job state shared between uvicorn worker processes.
+
+A single-row SQLite table (WAL mode) in the config directory acts as both the split
+lock and the status board. The worker that claims the row is the only executor; it
+publishes its status and a heartbeat every PUBLISH_INTERVAL and picks up stop,
+pause and stop-after-current requests written by other workers. A claim whose heartbeat is older than
+STALE_AFTER (crashed worker, container restart) can be taken over.
+
+Named leases (`try_lease`) elect a single worker for background duties such as the
+library refresher, with the same take-over-when-stale rule. Rate-limit attempts
+(`record_attempt`) are counted here too, so the limit holds across workers.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+PUBLISH_INTERVAL = 0.5  # seconds between executor status pushes / stop polls
+STALE_AFTER = 10.0      # seconds without heartbeat before a claim is considered dead
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS job (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    kind TEXT,
+    owner TEXT,
+    is_running INTEGER NOT NULL DEFAULT 0,
+    stop_requested INTEGER NOT NULL DEFAULT 0,
+    paused INTEGER NOT NULL DEFAULT 0,
+    stop_after_current INTEGER NOT NULL DEFAULT 0,
+    heartbeat REAL NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT '{}'
+)
+"""
+
+LEASE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS lease (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    heartbeat REAL NOT NULL
+)
+"""
+
+ATTEMPTS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS attempts (
+    scope TEXT NOT NULL,
+    client TEXT NOT NULL,
+    ts REAL NOT NULL
+)
+"""
+ATTEMPTS_INDEX = "CREATE INDEX IF NOT EXISTS attempts_client ON attempts (scope, client, ts)"
+
+# Requests other workers (or the CLI) can leave for the executor, besides stop_requested
+CONTROLS = ("paused", "stop_after_current")
+
+
+class JobStore:
+    def __init__(self, path: str, stale_after: float = STALE_AFTER):
+        self.path = path
+        self.stale_after = stale_after
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = self._conn()
+        conn.execute(SCHEMA)
+        conn.execute(LEASE_SCHEMA)
+        conn.execute(ATTEMPTS_SCHEMA)
+        conn.execute(ATTEMPTS_INDEX)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(job)")}
+        for name in CONTROLS:
+            if name not in columns:  # jobs.db created before the column existed
+                conn.execute(f"ALTER TABLE job ADD COLUMN {name} INTEGER NOT NULL DEFAULT 0")
+        conn.execute("INSERT OR IGNORE INTO job (id) VALUES (1)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode; multi-statement updates use explicit BEGIN IMMEDIATE
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _is_live(self, is_running, heartbeat, now) -> bool:
+        return bool(is_running) and (now - heartbeat) < self.stale_after
+
+    def try_claim(self, owner: str, kind: str, status: dict) -> bool:
+        """Atomically take the job slot. False if another live executor holds it."""
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT is_running, heartbeat, owner FROM job WHERE id = 1").fetchone()
+            if row and self._is_live(row[0], row[1], now):
+                conn.execute("ROLLBACK")
+                return False
+            conn.execute(
+                "UPDATE job SET kind = ?, owner = ?, is_running = 1, stop_requested = 0, paused = 0, "
+                "stop_after_current = 0, heartbeat = ?, status = ? WHERE id = 1",
+                (kind, owner, now, json.dumps(status))
+            )
+            conn.execute("COMMIT")
+            return True
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def publish(self, owner: str, status: dict) -> dict:
+        """Push the executor's status + heartbeat. Returns the pending requests
+        ({"stop_requested", "paused", "stop_after_current"}), empty if `owner` lost the slot."""
+        conn = self._conn()
+        conn.execute(
+            "UPDATE job SET heartbeat = ?, status = ? WHERE id = 1 AND owner = ?",
+            (time.time(), json.dumps(status), owner)
+        )
+        row = conn.execute(
+            "SELECT stop_requested, paused, stop_after_current FROM job WHERE id = 1 AND owner = ?", (owner,)
+        ).fetchone()
+        return dict(zip(("stop_requested",) + CONTROLS, map(bool, row))) if row else {}
+
+    def release(self, owner: str, status: dict):
+        conn = self._conn()
+        conn.execute(
+            "UPDATE job SET is_running = 0, heartbeat = ?, status = ? WHERE id = 1 AND owner = ?",
+            (time.time(), json.dumps(status), owner)
+        )
+
+    def request_stop(self) -> bool:
+        """Flag the running job for termination. Returns False if nothing is running."""
+        conn = self._conn()
+        cur = conn.execute(
+            "UPDATE job SET stop_requested = 1 WHERE id = 1 AND is_running = 1 AND heartbeat > ?",
+            (time.time() - self.stale_after,)
+        )
+        return cur.rowcount > 0
+
+    def set_control(self, name: str, value: bool) -> bool:
+        """Set a CONTROLS flag on the running job. Returns False if nothing is running."""
+        if name not in CONTROLS:
+            raise ValueError(f"Unknown job control: {name}")
+        cur = self._conn().execute(
+            f"UPDATE job SET {name} = ? WHERE id = 1 AND is_running = 1 AND heartbeat > ?",
+            (int(value), time.time() - self.stale_after)
+        )
+        return cur.rowcount > 0
+
+    def try_lease(self, name: str, owner: str, ttl: float) -> bool:
+        """Take or renew the lease `name`. False while another owner renewed it within `ttl` seconds."""
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT owner, heartbeat FROM lease WHERE name = ?", (name,)).fetchone()
+            if row and row[0] != owner and now - row[1] < ttl:
+                conn.execute("ROLLBACK")
+                return False
+            conn.execute("INSERT OR REPLACE INTO lease (name, owner, heartbeat) VALUES (?, ?, ?)", (name, owner, now))
+            conn.execute("COMMIT")
+            return True
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def record_attempt(self, scope: str, client: str, max_attempts: int, window: float) -> tuple:
+        """Count an attempt of `client` unless it already made `max_attempts` within `window` seconds.
+
+        Returns (allowed, attempts in the window including this one if allowed).
+        """
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM attempts WHERE scope = ? AND ts <= ?", (scope, now - window))
+            count = conn.execute(
+                "SELECT COUNT(*) FROM attempts WHERE scope = ? AND client = ?", (scope, client)
+            ).fetchone()[0]
+            if count >= max_attempts:
+                conn.execute("ROLLBACK")
+                return False, count
+            conn.execute("INSERT INTO attempts (scope, client, ts) VALUES (?, ?, ?)", (scope, client, now))
+            conn.execute("COMMIT")
+            return True, count + 1
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def snapshot(self) -> dict:
+        """Last published status, with `is_running` corrected for dead executors."""
+        row = self._conn().execute(
+            "SELECT kind, owner, is_running, heartbeat, status FROM job WHERE id = 1"
+        ).fetchone()
+        if not row:
+            return {"is_running": False}
+        status = json.loads(row[4] or "{}")
+        status["is_running"] = self._is_live(row[2], row[3], time.time())
+        status["kind"] = row[0]
+        return status
+
+
+class JobMonitor:
+    """Executor-side thread: publishes status and relays remote stop requests.
+
+    `on_control(controls)`, if given, receives the CONTROLS flags after every publish.
+    """
+
+    def __init__(self, store: JobStore, owner: str, get_status, on_stop, on_control=None):
+        self.store = store
+        self.owner = owner
+        self.get_status = get_status
+        self.on_stop = on_stop
+        self.on_control = on_control
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(PUBLISH_INTERVAL):
+            try:
+                requests = self.store.publish(self.owner, self.get_status())
+                if requests.get("stop_requested"):
+                    self.on_stop()
+                elif requests and self.on_control:
+                    self.on_control({name: requests[name] for name in CONTROLS})
+            except Exception as e:
+                print(f"⚠️  [JOBS] Failed to publish job state: {e}")
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
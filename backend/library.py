@@ -0,0 +1,262 @@
+"""Library-wide filename search index.
+
+Every video under DATA_DIR is kept in a SQLite table (config directory) together
+with its size, subtitle count and split status, plus an FTS5 trigram index over
+its name and relative path. Searches are answered from the database alone.
+
+The index is maintained incrementally:
+  * `refresh()` walks the tree and re-classifies only folders whose mtime changed
+    (entries added, removed or renamed — which includes new or deleted RAR volumes),
+  * `update_file()` / `update_dir()` re-classify right after the backend splits a
+    video, links volumes to it or deletes RARs (a volume still growing doesn't
+    change the folder mtime, so the final state must be recorded explicitly),
+  * `invalidate()` forces a full re-classification (e.g. the subtitle setting changed).
+
+Classification is injected so the status rules stay in one place with the directory listing:
+`make_classifier()` is called once per refresh or update and returns
+`classify(full_path, folder_names) -> dict`, with settings already resolved.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+VIDEO_EXTENSIONS = (".mkv", ".mp4")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    dir TEXT NOT NULL,
+    name TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    total_size INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    rar_parts INTEGER NOT NULL,
+    subs_count INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS videos_dir ON videos (dir);
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Trigram FTS (SQLite >= 3.34) answers substring queries from the index; kept in sync by triggers
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS videos_fts USING fts5(
+    name, path, content='videos', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS videos_ai AFTER INSERT ON videos BEGIN
+    INSERT INTO videos_fts (rowid, name, path) VALUES (new.id, new.name, new.path);
+END;
+CREATE TRIGGER IF NOT EXISTS videos_ad AFTER DELETE ON videos BEGIN
+    INSERT INTO videos_fts (videos_fts, rowid, name, path) VALUES ('delete', old.id, old.name, old.path);
+END;
+CREATE TRIGGER IF NOT EXISTS videos_au AFTER UPDATE ON videos BEGIN
+    INSERT INTO videos_fts (videos_fts, rowid, name, path) VALUES ('delete', old.id, old.name, old.path);
+    INSERT INTO videos_fts (rowid, name, path) VALUES (new.id, new.name, new.path);
+END;
+"""
+
+COLUMNS = ("path", "name", "size", "total_size", "status", "rar_parts", "subs_count")
+TRIGRAM = 3  # Shortest term the trigram index can match; shorter terms fall back to LIKE
+
+
+def is_video(name: str) -> bool:
+    return not name.startswith('.') and name.lower().endswith(VIDEO_EXTENSIONS)
+
+
+class LibraryIndex:
+    def __init__(self, path: str, data_dir: str, make_classifier):
+        self.path = path
+        self.data_dir = data_dir
+        self.make_classifier = make_classifier
+        self._ready = False  # Cached once the first full refresh completed (in any process)
+        self._writes = 0  # Bumped on every write of this process; part of the count cache key
+        self._local = threading.local()
+        self._refresh_lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        try:
+            conn.executescript(FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError:
+            # SQLite without FTS5/trigram: same queries as LIKE scans over the table
+            self.fts = False
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _rel(self, full_path: str) -> str:
+        rel = os.path.relpath(full_path, self.data_dir).replace("\\", "/")
+        return "" if rel == "." else rel
+
+    def _row(self, classify, full_path: str, names: list | None = None) -> tuple | None:
+        try:
+            info = classify(full_path, names)
+        except OSError:
+            return None  # Vanished while we were looking at it
+        if not info:
+            return None
+        rel = self._rel(full_path)
+        return (rel, self._rel(os.path.dirname(full_path)), info["name"], info["original_size"],
+                info["total_size"], info["status"], info["rar_parts"], info["subs_count"])
+
+    def _upsert(self, conn, row):
+        self._writes += 1
+        conn.execute(
+            "INSERT INTO videos (path, dir, name, size, total_size, status, rar_parts, subs_count) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(path) DO UPDATE SET size = excluded.size, total_size = excluded.total_size, "
+            "status = excluded.status, rar_parts = excluded.rar_parts, subs_count = excluded.subs_count",
+            row
+        )
+
+    def _scan_dir(self, conn, classify, dirpath: str, filenames: list, mtime_ns: int):
+        """Replace the folder's rows with a fresh classification of its videos."""
+        rel_dir = self._rel(dirpath)
+        names = sorted(filenames)
+        rows = [r for r in (self._row(classify, os.path.join(dirpath, f), names) for f in names if is_video(f)) if r]
+        names = {r[0] for r in rows}
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for (path,) in conn.execute("SELECT path FROM videos WHERE dir = ?", (rel_dir,)).fetchall():
+                if path not in names:
+                    self._writes += 1
+                    conn.execute("DELETE FROM videos WHERE path = ?", (path,))
+            for row in rows:
+                self._upsert(conn, row)
+            conn.execute("INSERT OR REPLACE INTO dirs (path, mtime_ns) VALUES (?, ?)", (rel_dir, mtime_ns))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    @property
+    def ready(self) -> bool:
+        """True once a full refresh has completed, whichever worker ran it."""
+        if not self._ready:
+            self._ready = self._conn().execute("SELECT 1 FROM meta WHERE key = 'ready'").fetchone() is not None
+        return self._ready
+
+    def needs_refresh(self) -> bool:
+        """True before the first pass and after invalidate() (possibly called by another worker)."""
+        return self._conn().execute("SELECT 1 FROM dirs LIMIT 1").fetchone() is None
+
+    def refresh(self, keep_alive=None) -> dict:
+        """Re-classify folders whose mtime changed since the last pass. Returns counters.
+
+        `keep_alive()` is called for every folder walked (e.g. to renew the refresher's lease).
+        """
+        with self._refresh_lock:
+            start = time.time()
+            conn = self._conn()
+            stamps = dict(conn.execute("SELECT path, mtime_ns FROM dirs"))
+            classify = self.make_classifier()
+            seen = set()
+            scanned = 0
+
+            for dirpath, dirnames, _ in os.walk(self.data_dir):
+                dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+                if keep_alive:
+                    keep_alive()
+                rel_dir = self._rel(dirpath)
+                seen.add(rel_dir)
+                try:
+                    if stamps.get(rel_dir) == os.stat(dirpath).st_mtime_ns:
+                        continue
+                except OSError:
+                    continue
+                self.update_dir(dirpath, classify)
+                scanned += 1
+
+            # Folders that disappeared (or became hidden) since they were indexed
+            known = set(stamps) | {d for (d,) in conn.execute("SELECT DISTINCT dir FROM videos")}
+            removed = [d for d in known if d not in seen]
+            if removed:
+                self._writes += 1
+                conn.execute("BEGIN IMMEDIATE")
+                for rel_dir in removed:
+                    conn.execute("DELETE FROM videos WHERE dir = ?", (rel_dir,))
+                    conn.execute("DELETE FROM dirs WHERE path = ?", (rel_dir,))
+                conn.execute("COMMIT")
+
+            if not self._ready:
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('ready', '1')")
+                self._ready = True
+            return {"dirs_scanned": scanned, "dirs_removed": len(removed), "elapsed": round(time.time() - start, 3)}
+
+    def update_file(self, full_path: str):
+        """Re-classify a single video (or drop it from the index if it no longer exists)."""
+        conn = self._conn()
+        if not is_video(os.path.basename(full_path)):
+            return
+        row = self._row(self.make_classifier(), full_path) if os.path.exists(full_path) else None
+        if row:
+            self._upsert(conn, row)
+        else:
+            self._writes += 1
+            conn.execute("DELETE FROM videos WHERE path = ?", (self._rel(full_path),))
+
+    def update_dir(self, full_dir: str, classify=None):
+        """Re-classify every video directly inside one folder."""
+        try:
+            # Stat before listing: a change racing the scan leaves an old stamp, so the next refresh rescans
+            mtime_ns = os.stat(full_dir).st_mtime_ns
+            with os.scandir(full_dir) as it:
+                filenames = [e.name for e in it if e.is_file()]
+        except OSError:
+            return
+        self._scan_dir(self._conn(), classify or self.make_classifier(), full_dir, filenames, mtime_ns)
+
+    def invalidate(self):
+        """Force a full re-classification on the next refresh."""
+        self._conn().execute("DELETE FROM dirs")
+
+    def count(self) -> int:
+        # data_version changes when another connection (other worker or thread) commits
+        conn = self._conn()
+        version = (conn.execute("PRAGMA data_version").fetchone()[0], self._writes)
+        cached = getattr(self._local, "count", None)
+        if cached is None or cached[0] != version:
+            cached = (version, conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0])
+            self._local.count = cached
+        return cached[1]
+
+    def search(self, query: str, limit: int = 50) -> list:
+        """Videos whose name or path contains every whitespace-separated term (case-insensitive)."""
+        terms = [t for t in query.split() if t]
+        if not terms:
+            return []
+        long_terms = [t for t in terms if len(t) >= TRIGRAM] if self.fts else []
+        like_terms = [t for t in terms if t not in long_terms]
+
+        sql = f"SELECT {', '.join('v.' + c for c in COLUMNS)} FROM videos v"
+        where, params = [], []
+        if long_terms:
+            sql += " JOIN videos_fts f ON f.rowid = v.id"
+            where.append("videos_fts MATCH ?")
+            params.append(" AND ".join('"' + t.replace('"', '""') + '"' for t in long_terms))
+        for t in like_terms:
+            escaped = t.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            where.append("(v.name LIKE ? ESCAPE '\\' OR v.path LIKE ? ESCAPE '\\')")
+            params += [f"%{escaped}%", f"%{escaped}%"]
+        sql += " WHERE " + " AND ".join(where)
+        # Names starting with the query first, then alphabetical
+        first = terms[0].replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        sql += " ORDER BY (v.name LIKE ? ESCAPE '\\') DESC, v.name COLLATE NOCASE LIMIT ?"
+        params += [f"{first}%", limit]
+
+        return [dict(zip(COLUMNS, row)) for row in self._conn().execute(sql, params)]
@@ -1,48 +1,52 @@
+import time
+_BOOT_T0 = time.perf_counter()  # Start of module import, for the startup timing report
+
 import os
 import signal
 import subprocess
 import threading
-import time
 import glob
+import bisect
 from typing import List
 from fastapi import FastAPI, HTTPException
+from fastapi.middleware.gzip import GZipMiddleware
+import orjson
 from pydantic import BaseModel
-from passlib.context import CryptContext
-from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from fastapi import Depends, status, Request
-import httpx
+from fastapi import Depends, status, Request, Response
 import json
+import hashlib
+import integrity
+import pagecache
+import jobstate
+import library
+import rar5
+import socket
+
+# Auth stacks (passlib/argon2, python-jose, httpx) are imported on first use, not here:
+# /api/auth/status and the login page answer without loading them. See STARTUP_TIMINGS.
+_IMPORTS_DONE = time.perf_counter()
+STARTUP_TIMINGS = {"imports": _IMPORTS_DONE - _BOOT_T0}
 
 # Security Configuration
-SECRET_KEY = os.getenv("SECRET_KEY")
-if not SECRET_KEY:
-    import secrets
-    SECRET_KEY = secrets.token_hex(32)
-    print("WARNING: SECRET_KEY not set, using random key (tokens won't persist across restarts)")
+SECRET_KEY = os.getenv("SECRET_KEY")  # Unset: generated once in CONFIG_DIR, see get_secret_key()
+SECRET_KEY_FILE_NAME = "secret_key"
 
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-# Rate Limiting
-SETUP_RATE_LIMIT = {}  # {ip: [timestamp, ...]}
-LOGIN_RATE_LIMIT = {}  # {ip: [timestamp, ...]}
+# Rate Limiting (attempts are counted in jobs.db, shared by all workers)
 RATE_LIMIT_MAX = 5
 RATE_LIMIT_WINDOW = 60  # seconds
 
-def check_rate_limit(ip: str, store: dict, label: str = "unknown", max_attempts: int = RATE_LIMIT_MAX, window: int = RATE_LIMIT_WINDOW) -> bool:
+def check_rate_limit(ip: str, label: str = "unknown", max_attempts: int = RATE_LIMIT_MAX, window: int = RATE_LIMIT_WINDOW) -> bool:
     """Check if IP is rate limited. Returns True if request is allowed."""
-    current = time.time()
-    attempts = store.get(ip, [])
-    # Remove old attempts outside window
-    attempts = [t for t in attempts if current - t < window]
-    if len(attempts) >= max_attempts:
-        print(f"⚠️  RATE LIMIT BLOCKED [{label}] IP: {ip} — {len(attempts)}/{max_attempts} attempts in {window}s window")
+    allowed, attempts = get_job_store().record_attempt(label, ip, max_attempts, window)
+    if not allowed:
+        print(f"⚠️  RATE LIMIT BLOCKED [{label}] IP: {ip} — {attempts}/{max_attempts} attempts in {window}s window")
         return False
-    attempts.append(current)
-    store[ip] = attempts
-    print(f"🔒 [{label}] IP: {ip} — attempt {len(attempts)}/{max_attempts}")
+    print(f"🔒 [{label}] IP: {ip} — attempt {attempts}/{max_attempts}")
     return True
 
 # OIDC Configuration
@@ -62,23 +66,112 @@ USERINFO_CACHE = {}  # {token_hash: {"email": ..., "expires": timestamp}}
 USERINFO_CACHE_TTL = 300  # 5 minutes
 LOGGED_TOKENS = set()  # Track already-logged token hashes to avoid per-request spam
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+_pwd_context = None
+
+def get_pwd_context():
+    """argon2 hashing context, built on first password check/hash."""
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        _pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+    return _pwd_context
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
-app = FastAPI()
+# Response Compression
+# Small JSON bodies aren't worth the CPU; big folder listings shrink ~10x
+GZIP_MINIMUM_SIZE = 1024  # bytes
+GZIP_COMPRESS_LEVEL = 5   # Keep CPU low on NAS-class hardware
 
-DATA_DIR = "/data"
-CONFIG_DIR = "/config"
+app = FastAPI()
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE, compresslevel=GZIP_COMPRESS_LEVEL)
+
+def json_response(content, headers: dict | None = None) -> Response:
+    """Serialize with orjson directly, skipping jsonable_encoder / response_model re-validation."""
+    return Response(orjson.dumps(content), media_type="application/json", headers=headers)
+
+DATA_DIR = os.getenv("DATA_DIR", "/data")
+CONFIG_DIR = os.getenv("CONFIG_DIR", "/config")
+# Optional second mount (e.g. the FAT32 drive) that direct-to-target splits write volumes into
+TARGET_DIR = os.getenv("TARGET_DIR", "/target")
+
+def get_secret_key() -> str:
+    """SECRET_KEY, or a random key stored in CONFIG_DIR.
+
+    Every uvicorn worker has to sign with the same key, or a token issued by one worker is
+    rejected by the others. The first worker creates the file atomically (link of a fully
+    written temp file, which fails if another worker won the race); the rest read it.
+    """
+    global SECRET_KEY
+    if SECRET_KEY:
+        return SECRET_KEY
+    path = os.path.join(CONFIG_DIR, SECRET_KEY_FILE_NAME)
+    if not os.path.exists(path):
+        import secrets
+        os.makedirs(CONFIG_DIR, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(secrets.token_hex(32))
+        try:
+            os.link(tmp, path)
+            print(f"WARNING: SECRET_KEY not set, generated one in {path} (shared by all workers)")
+        except FileExistsError:
+            pass  # Another worker created it first
+        finally:
+            os.remove(tmp)
+    with open(path) as f:
+        SECRET_KEY = f.read().strip()
+    return SECRET_KEY
 SETTINGS_FILE = os.path.join(CONFIG_DIR, "settings.json")
 
 # Ensure settings exist on startup
 @app.on_event("startup")
 async def startup_event():
     print("Checking settings configuration...")
+    t = time.perf_counter()
     get_settings_internal()
+    get_secret_key()  # Create the shared key now rather than racing on the first login
+    STARTUP_TIMINGS["settings"] = time.perf_counter() - t
+    # First pass indexes the whole library in the background; later passes only changed folders
+    threading.Thread(target=run_library_refresher, daemon=True, name="library-refresher").start()
+    STARTUP_TIMINGS["ready"] = time.perf_counter() - _BOOT_T0
+    print("⏱️  [STARTUP] " + format_startup_timings())
+
+def format_startup_timings() -> str:
+    return " | ".join(f"{phase} {seconds * 1000:.1f}ms" for phase, seconds in STARTUP_TIMINGS.items())
+
+class FirstRequestTimer:
+    """Pure ASGI middleware recording time from import start to the first HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+        self.seen = False
+
+    async def __call__(self, scope, receive, send):
+        if not self.seen and scope["type"] == "http":
+            self.seen = True
+            STARTUP_TIMINGS["first_request"] = time.perf_counter() - _BOOT_T0
+            print(f"⏱️  [STARTUP] first request {scope.get('path')} after {STARTUP_TIMINGS['first_request'] * 1000:.1f}ms")
+        await self.app(scope, receive, send)
+
+# RAR volume size: "M" is millions of bytes for rar's -v switch (stays under the FAT32 4 GiB limit)
+RAR_VOLUME_SIZE = "4095M"
+RAR_VOLUME_SIZE_BYTES = 4095 * 1000 * 1000
+TARGET_WRITE_BUFFER = 8 * 1024 * 1024   # Coalesce target writes into large sequential chunks
+TARGET_SYNC_BYTES = 256 * 1024 * 1024   # fdatasync interval inside a target volume (progress = flushed bytes)
+# Optional cap on dirty pages while rar writes a volume: fdatasync it every N MB (0 = leave it to the kernel)
+SPLIT_FLUSH_BYTES = int(os.getenv("SPLIT_FLUSH_MB", "0")) * 1024 * 1024
+# Optional cap on how fast a split reads its source (MB/s, 0 = unthrottled); the CLI sets it per run
+SPLIT_THROTTLE_BPS = int(float(os.getenv("SPLIT_THROTTLE_MBPS", "0")) * 1000 * 1000)
 
 class SplitRequest(BaseModel):
     files: List[str]
+    to_target: bool = False  # Write volumes straight into TARGET_DIR instead of next to the source
+
+class VerifyRequest(BaseModel):
+    files: List[str]
+    on_target: bool = False  # Verify the copies in TARGET_DIR instead of the volumes next to the source
 
 class DeleteRequest(BaseModel):
     mode: str  # "single" or "all"
@@ -89,18 +182,28 @@ class TaskStatus(BaseModel):
     current_file: str | None
     files_total: int
     files_processed: int
-    files_processed: int
     last_output: str
+    verify_results: dict = {}
+    resume_saved_bytes: int = 0
+    bytes_total: int = 0
+    bytes_flushed: int = 0
+    page_cache: dict = {}
+    paused: bool = False
+    stop_after_current: bool = False
 
 class Settings(BaseModel):
     theme: str = "dark"
     include_subtitles: bool = True
+    verify_checksums: bool = False
+    dedupe_duplicates: bool = False
     admin_email: str | None = None
     admin_password_hash: str | None = None
 
 class SettingsPublic(BaseModel):
     theme: str = "dark"
     include_subtitles: bool = True
+    verify_checksums: bool = False
+    dedupe_duplicates: bool = False
     admin_email: str | None = None
     password_set: bool = False
 
@@ -126,6 +229,9 @@ class LoginRequest(BaseModel):
     email: str
     password: str
 
+class StopAfterCurrentRequest(BaseModel):
+    enabled: bool = True  # False withdraws the request
+
 
 # Global State
 class BackgroundTask:
@@ -138,27 +244,240 @@ class BackgroundTask:
         self.files_processed = 0
         self.lock = threading.Lock()
         self.last_output = ""
+        self.verify_results = {}  # {rel_path: integrity.verify_archive() result}
+        self.stop_event = None  # Set by /api/kill to cancel in-flight verification
+        self.resume_saved_bytes = 0  # Bytes of already-written volumes reused by resumed splits
+        self.bytes_total = 0  # Direct-to-target: payload bytes this job writes
+        self.bytes_flushed = 0  # Direct-to-target: payload bytes fsync'd to the target device
+        self.page_cache = {}  # {"before": meminfo, "after": meminfo} of the last split job
+        self.paused = False  # rar is SIGSTOP'd and the native writer/hasher wait on run_gate
+        self.stop_after_current = False  # Finish the file being split, then end the job
+        self.run_gate = threading.Event()  # Cleared while paused
+        self.run_gate.set()
+        self.paused_at = None  # monotonic time the current pause began
+        self.paused_total = 0.0  # Seconds spent paused in this job (excluded from throttle budgets)
+
+    def snapshot(self) -> dict:
+        """Public status fields (what /api/status returns and what gets shared with other workers)."""
+        with self.lock:
+            return {
+                "is_running": self.is_running,
+                "current_file": self.current_file,
+                "files_total": self.files_total,
+                "files_processed": self.files_processed,
+                "last_output": self.last_output,
+                "verify_results": dict(self.verify_results),
+                "resume_saved_bytes": self.resume_saved_bytes,
+                "bytes_total": self.bytes_total,
+                "bytes_flushed": self.bytes_flushed,
+                "page_cache": dict(self.page_cache),
+                "paused": self.paused,
+                "stop_after_current": self.stop_after_current
+            }
+
+    def request_stop(self):
+        """Stop the job running in this process: flag it and kill the current rar immediately."""
+        with self.lock:
+            if not self.is_running or self.stop_requested:
+                return
+            self.stop_requested = True
+            if self.stop_event:
+                self.stop_event.set()
+            self._unpause()  # Release waiters; SIGKILL below ends a stopped rar all the same
+
+            if self.process:
+                print("Killing process immediately...")
+                try:
+                    self.process.kill()
+                except Exception as e:
+                    print(f"Error killing process: {e}")
+
+    def set_paused(self, paused: bool):
+        """Suspend or continue the running split without losing its progress."""
+        with self.lock:
+            if not self.is_running or self.stop_requested or paused == self.paused:
+                return
+            if paused:
+                self.paused = True
+                self.paused_at = time.monotonic()
+                self.run_gate.clear()
+                if self.process:
+                    signal_group(self.process, signal.SIGSTOP)
+                print("⏸️  [JOBS] Job paused")
+            else:
+                self._unpause()
+                print("▶️  [JOBS] Job resumed")
+
+    def _unpause(self):
+        # Caller holds self.lock
+        if not self.paused:
+            return
+        self.paused = False
+        self.paused_total += time.monotonic() - self.paused_at
+        if self.process:
+            signal_group(self.process, signal.SIGCONT)
+        self.run_gate.set()
+
+    def apply_controls(self, controls: dict):
+        """Adopt the pause/stop-after-current flags requested through the job store."""
+        self.set_paused(controls.get("paused", False))
+        with self.lock:
+            if self.is_running:
+                self.stop_after_current = controls.get("stop_after_current", False)
+
+    def should_end(self) -> bool:
+        """True when no further file of the batch should be started."""
+        return self.stop_requested or self.stop_after_current
+
+    def active_time(self) -> float:
+        """monotonic() minus the time this job spent paused."""
+        with self.lock:
+            paused = self.paused_total + (time.monotonic() - self.paused_at if self.paused else 0.0)
+        return time.monotonic() - paused
+
+def signal_group(process: subprocess.Popen, sig: int):
+    """Signal rar's process group (it runs in its own session, see split_file)."""
+    try:
+        os.killpg(process.pid, sig)
+    except ProcessLookupError:
+        pass  # Already exited
 
 task_state = BackgroundTask()
 
+# Shared Job State
+# With several uvicorn workers, each has its own task_state. The job slot (split lock)
+# and the published status live in SQLite so exactly one worker executes jobs and every
+# worker answers /api/status and /api/kill consistently.
+JOB_DB_NAME = "jobs.db"
+_job_stores = {}
+
+def get_job_store() -> jobstate.JobStore:
+    path = os.path.join(CONFIG_DIR, JOB_DB_NAME)
+    if path not in _job_stores:
+        _job_stores[path] = jobstate.JobStore(path)
+    return _job_stores[path]
+
+def job_owner() -> str:
+    # Evaluated per call: workers may be forked after import
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def claim_job(kind: str, files_total: int) -> bool:
+    """Take the cross-process job slot. False if another worker (or the CLI) is running a job."""
+    return get_job_store().try_claim(job_owner(), kind, {
+        "is_running": True,
+        "current_file": None,
+        "files_total": files_total,
+        "files_processed": 0,
+        "last_output": ""
+    })
+
+def start_job_monitor() -> jobstate.JobMonitor:
+    return jobstate.JobMonitor(get_job_store(), job_owner(), task_state.snapshot, task_state.request_stop,
+                               task_state.apply_controls).start()
+
+def finish_job(monitor: jobstate.JobMonitor):
+    monitor.stop()
+    get_job_store().release(job_owner(), task_state.snapshot())
+
+def set_job_control(name: str, value: bool) -> bool:
+    """Record a pause/stop-after-current request for the running job (any worker, or the CLI).
+
+    Applied right away when this process is the executor, otherwise by the executor's monitor
+    within one publish interval. Returns False if no job is running.
+    """
+    if not get_job_store().set_control(name, value):
+        return False
+    snapshot = task_state.snapshot()
+    if snapshot["is_running"]:
+        task_state.apply_controls({"paused": snapshot["paused"], "stop_after_current": snapshot["stop_after_current"],
+                                   name: value})
+    return True
+
+# Library Search Index
+# Every video under DATA_DIR with its size and split status, searchable by name without
+# touching the filesystem. A background thread rescans folders whose mtime changed; splits
+# and deletes update their entries directly.
+LIBRARY_DB_NAME = "library.db"
+LIBRARY_RESCAN_SECONDS = int(os.getenv("LIBRARY_RESCAN_SECONDS", "300"))  # 0 = index once at startup, no periodic rescans
+# One worker runs the refresher (lease in jobs.db); another takes over if it stops renewing
+LIBRARY_LEASE = "library-refresher"
+LIBRARY_LEASE_TTL = 60.0    # seconds
+LIBRARY_LEASE_RENEW = 5.0   # seconds between lease renewals / checks for invalidation
+_libraries = {}
+_library_wake = threading.Event()
+
+def library_classifier():
+    """Classifier for one index pass: settings.json is read once, not once per video."""
+    include_subtitles = get_settings_internal().include_subtitles
+    return lambda full_path, names=None: describe_video(full_path, include_subtitles, names)
+
+def get_library() -> library.LibraryIndex:
+    path = os.path.join(CONFIG_DIR, LIBRARY_DB_NAME)
+    if path not in _libraries:
+        _libraries[path] = library.LibraryIndex(path, DATA_DIR, library_classifier)
+    return _libraries[path]
+
+def update_library(*full_paths: str):
+    """Record the current state of videos after a split/link/delete. Never fails the caller."""
+    try:
+        index = get_library()
+        for full_path in full_paths:
+            index.update_file(full_path)
+    except Exception as e:
+        print(f"⚠️  [SEARCH] Index update failed: {e}")
+
+def run_library_refresher():
+    """Started in every worker; only the holder of the refresher lease walks DATA_DIR.
+
+    The others stand by and take over once the lease goes stale. A settings change in any
+    worker invalidates the index in library.db, which the owner notices on its next renewal.
+    """
+    next_scan = 0.0  # monotonic time of the next periodic pass
+    renewed = [0.0]
+
+    def keep_alive():
+        if time.monotonic() - renewed[0] >= LIBRARY_LEASE_RENEW:
+            get_job_store().try_lease(LIBRARY_LEASE, job_owner(), LIBRARY_LEASE_TTL)
+            renewed[0] = time.monotonic()
+
+    while True:
+        try:
+            if get_job_store().try_lease(LIBRARY_LEASE, job_owner(), LIBRARY_LEASE_TTL):
+                renewed[0] = time.monotonic()
+                index = get_library()
+                if _library_wake.is_set() or time.monotonic() >= next_scan or index.needs_refresh():
+                    _library_wake.clear()
+                    stats = index.refresh(keep_alive)
+                    next_scan = time.monotonic() + LIBRARY_RESCAN_SECONDS if LIBRARY_RESCAN_SECONDS else float("inf")
+                    if stats["dirs_scanned"] or stats["dirs_removed"]:
+                        print(f"🔎 [SEARCH] Indexed {stats['dirs_scanned']} changed folders "
+                              f"({stats['dirs_removed']} removed) in {stats['elapsed']}s, {index.count()} videos")
+        except Exception as e:
+            print(f"⚠️  [SEARCH] Library rescan failed: {e}")
+        _library_wake.wait(LIBRARY_LEASE_RENEW)
+
 # Auth Utils
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
+    from jose import jwt
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, get_secret_key(), algorithm=ALGORITHM)
     return encoded_jwt
 
 async def validate_oidc_token(token: str) -> TokenData:
+    from jose import JWTError, jwt
+    import httpx
+
     if not OIDC_AUTHORITY or not OIDC_CLIENT_ID:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -294,6 +613,7 @@ async def validate_oidc_token(token: str) -> TokenData:
         raise JWTError(str(e))
 
 async def get_current_user(token: str = Depends(oauth2_scheme)):
+    from jose import JWTError, jwt
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -304,7 +624,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     
     # 1. Try Local Validation (HS256)
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, get_secret_key(), algorithms=[ALGORITHM])
         email: str = payload.get("sub")
         if email is None:
             raise JWTError("Missing sub")
@@ -342,6 +662,162 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
 async def get_current_active_user(current_user: User = Depends(get_current_user)):
     return current_user
 
+# Extensions whose changes affect a directory listing (videos, their subtitles and RAR volumes)
+LISTING_EXTENSIONS = (".mkv", ".mp4", ".srt", ".rar", ".tmp")
+
+def get_directory_fingerprint(subpath="") -> str:
+    """Cheap ETag for a directory listing, built from stat data only (no per-video classification)."""
+    target_dir = os.path.abspath(os.path.join(DATA_DIR, subpath.strip(os.path.sep)))
+    if not target_dir.startswith(DATA_DIR):
+        raise HTTPException(status_code=403, detail="Invalid path")
+
+    try:
+        dir_stat = os.stat(target_dir)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Path not found")
+
+    # Directory mtime covers added/removed/renamed entries; file mtime+size covers RARs growing during a split
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{dir_stat.st_mtime_ns}".encode())
+    # Subtitle setting changes the computed sizes and status, so it is part of the validator
+    digest.update(b"subs=1" if get_settings_internal().include_subtitles else b"subs=0")
+    # Mounting/unmounting TARGET_DIR toggles the Split to Target button and per-file target status
+    digest.update(b"target=1" if target_available() else b"target=0")
+
+    try:
+        with os.scandir(target_dir) as it:
+            entries = sorted(
+                (e for e in it if not e.name.startswith('.') and e.name.lower().endswith(LISTING_EXTENSIONS)),
+                key=lambda e: e.name
+            )
+            for entry in entries:
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                digest.update(f"{entry.name}\0{st.st_mtime_ns}\0{st.st_size}\n".encode("utf-8", "surrogateescape"))
+        target_mirror = get_target_mirror(target_dir)
+        if target_mirror and os.path.isdir(target_mirror):
+            # Volumes written directly to the target change the listing's target status
+            digest.update(b"target\n")
+            with os.scandir(target_mirror) as it:
+                for entry in sorted((e for e in it if e.name.lower().endswith((".rar", ".tmp"))), key=lambda e: e.name):
+                    try:
+                        st = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    digest.update(f"{entry.name}\0{st.st_mtime_ns}\0{st.st_size}\n".encode("utf-8", "surrogateescape"))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return f'W/"{digest.hexdigest()}"'
+
+def list_beside(path_prefix: str, middle: str, suffix: str, names: List[str] | None = None) -> List[str]:
+    """Files next to `path_prefix` named <its basename><middle>*<suffix>, e.g. ("/d/movie.mkv", ".part", ".rar").
+
+    Same matches as glob(escape(path_prefix) + middle + "*" + suffix) without glob's costs: a "["
+    in a parent folder name makes glob list every ancestor, and each unique pattern compiles a regex.
+    `names` is the folder's sorted listing when the caller already has it (one listdir per folder).
+    """
+    folder, prefix = os.path.split(path_prefix)
+    head = prefix + middle
+    if names is None:
+        try:
+            names = sorted(os.listdir(folder or "."))
+        except FileNotFoundError:
+            return []
+    matches = []
+    # Names sharing the prefix are contiguous in sorted order
+    for i in range(bisect.bisect_left(names, head), len(names)):
+        n = names[i]
+        if not n.startswith(head):
+            break
+        if n.endswith(suffix) and len(n) >= len(head) + len(suffix):
+            matches.append(os.path.join(folder, n))
+    return matches
+
+def get_archive_status(archive_base: str, total_size: int, names: List[str] | None = None):
+    """Classify the archive of `archive_base` (video path, or its name in another folder).
+
+    Returns (status, part_count, rar_size) with status NONE / SPLIT / PARTIAL.
+    """
+    # Glob for all related parts
+    # Patterns: 
+    # 1. exact match: filename.rar 
+    # 2. parts: filename.part*.rar
+    
+    base_name = archive_base + ".rar"
+    
+    rar_size = 0
+    has_files = False
+    part_count = 0
+    
+    if os.path.exists(base_name):
+        rar_size += os.path.getsize(base_name)
+        has_files = True
+        part_count += 1
+        
+    for f in list_beside(archive_base, ".part", ".rar", names):
+        rar_size += os.path.getsize(f)
+        has_files = True
+        part_count += 1
+    
+    status = "NONE"
+    if has_files:
+        # Strict Size Validation using Fixed Overhead
+        # Store mode (-m0) overhead is headers only, not proportional to size.
+        # We allow ~2KB per RAR volume for headers.
+        overhead_buffer = part_count * 2048 
+        
+        if rar_size >= total_size and rar_size <= (total_size + overhead_buffer):
+            status = "SPLIT"
+        else:
+            status = "PARTIAL"
+    return status, part_count, rar_size
+
+def target_available() -> bool:
+    return os.path.isdir(TARGET_DIR)
+
+def target_volume_dir(file_path: str) -> str:
+    """Folder on the target that mirrors the folder of a file under DATA_DIR."""
+    rel_dir = os.path.relpath(os.path.dirname(file_path), DATA_DIR)
+    return os.path.normpath(os.path.join(TARGET_DIR, rel_dir))
+
+def get_target_mirror(source_dir: str) -> str | None:
+    """Mirror of a DATA_DIR folder on the target, or None if no target is mounted."""
+    if not target_available():
+        return None
+    return os.path.normpath(os.path.join(TARGET_DIR, os.path.relpath(source_dir, DATA_DIR)))
+
+def describe_video(full_path: str, include_subtitles: bool, names: List[str] | None = None) -> dict:
+    """Listing entry for one video: sizes, subtitle count and split status (shared with the search index).
+
+    `names`: sorted listing of the video's folder, if the caller already has it.
+    """
+    file_size = os.path.getsize(full_path)
+    detected_subs = find_subtitles(full_path, names)
+    subs_size = sum(os.path.getsize(s) for s in detected_subs)
+
+    # Dynamic Settings Check
+    if not include_subtitles:
+        subs_size = 0 # Don't count extra size
+
+    total_size = file_size + subs_size
+
+    # Check split status by size verification
+    status, part_count, rar_size = get_archive_status(full_path, total_size, names)
+
+    return {
+        "name": os.path.basename(full_path),
+        "path": os.path.relpath(full_path, DATA_DIR).replace("\\", "/"),
+        "status": status,
+        "rar_parts": part_count,
+        "original_size": file_size, # Keep video size for display text
+        "total_size": total_size,   # For Red/Green badge logic
+        "subs_count": len(detected_subs),
+        "size_info": f"{rar_size / (1024*1024):.1f}MB / {total_size / (1024*1024):.1f}MB"
+    }
+
 def get_directory_contents(subpath=""):
     # Secure path traversal check
     target_dir = os.path.abspath(os.path.join(DATA_DIR, subpath.strip(os.path.sep)))
@@ -353,6 +829,9 @@ def get_directory_contents(subpath=""):
 
     items = []
     folders = []
+    target_mirror = get_target_mirror(target_dir)
+    include_subtitles = get_settings_internal().include_subtitles
+    names = None
     
     try:
         with os.scandir(target_dir) as it:
@@ -367,91 +846,16 @@ def get_directory_contents(subpath=""):
                         "path": os.path.relpath(full_path, DATA_DIR).replace("\\", "/")
                     })
                 elif entry.is_file() and entry.name.lower().endswith((".mkv", ".mp4")):
-                    file_size = entry.stat().st_size
-                    # Subtitle Detection
-                    # Pattern: video_name.*.srt OR video_name.srt
-                    base_name_no_ext = os.path.splitext(entry.name)[0]
-                    # Filter matching files in the current scan iterator is hard, better to use glob or re-scan?
-                    # Since we are iterating, we can't easily peek.
-                    # Efficient approach: we iterate all files anyway. But relating them is tricky in a single pass without storing all.
-                    # Alternative: Use glob for subs finding per video. It's file-system intensive but accurate.
-                    
-                    subs_pattern = glob.escape(full_path.rsplit('.', 1)[0]) + "*.srt"
-                    subs_files = []
-                    # Also check for exact match if glob doesn't cover it? (glob * covers .en.srt and .srt)
-                    # Be careful not to match "movie_sequel.srt" if we have "movie.mkv". 
-                    # full_path without extension -> "movie"
-                    # glob "movie*.srt" matches "movie_sequel.srt".
-                    # We want "movie.srt", "movie.en.srt", "movie.it.srt".
-                    # So essentially string must start with "movie."
-                    
-                    video_base_prefix = full_path.rsplit('.', 1)[0] + "."
-                    
-                    detected_subs = []
-                    subs_size = 0
-                    
-                    # Glob is safer
-                    for potential_sub in glob.glob(subs_pattern):
-                         # Standard convention check: 
-                         # valid: /path/movie.srt, /path/movie.en.srt
-                         # invalid: /path/movie_sequel.srt
-                         if potential_sub.startswith(video_base_prefix) or potential_sub == (full_path.rsplit('.', 1)[0] + ".srt"):
-                             detected_subs.append(potential_sub)
-                             subs_size += os.path.getsize(potential_sub)
-
-                    # Dynamic Settings Check
-                    settings = get_settings_internal()
-                    if not settings.include_subtitles:
-                        subs_size = 0 # Don't count extra size
-                        
-                    total_size = file_size + subs_size
-
-                    # Check split status by size verification
-                    
-                    # Glob for all related parts
-                    # Patterns: 
-                    # 1. exact match: filename.rar 
-                    # 2. parts: filename.part*.rar
-                    
-                    base_name = full_path + ".rar"
-                    part_pattern = glob.escape(full_path) + ".part*.rar"
-                    
-                    rar_size = 0
-                    has_files = False
-                    part_count = 0
-                    
-                    if os.path.exists(base_name):
-                        rar_size += os.path.getsize(base_name)
-                        has_files = True
-                        part_count += 1
-                        
-                    for f in glob.glob(part_pattern):
-                        rar_size += os.path.getsize(f)
-                        has_files = True
-                        part_count += 1
-                    
-                    status = "NONE"
-                    if has_files:
-                        # Strict Size Validation using Fixed Overhead
-                        # Store mode (-m0) overhead is headers only, not proportional to size.
-                        # We allow ~2KB per RAR volume for headers.
-                        overhead_buffer = part_count * 2048 
-                        
-                        if rar_size >= total_size and rar_size <= (total_size + overhead_buffer):
-                            status = "SPLIT"
-                        else:
-                            status = "PARTIAL"
-                    
-                    items.append({
-                        "name": entry.name,
-                        "path": os.path.relpath(full_path, DATA_DIR).replace("\\", "/"),
-                        "status": status,
-                        "rar_parts": part_count,
-                        "original_size": file_size, # Keep video size for display text
-                        "total_size": total_size,   # For Red/Green badge logic
-                        "subs_count": len(detected_subs),
-                        "size_info": f"{rar_size / (1024*1024):.1f}MB / {total_size / (1024*1024):.1f}MB"
-                    })
+                    if names is None:
+                        names = sorted(os.listdir(target_dir))
+                    item = describe_video(full_path, include_subtitles, names)
+                    total_size = item["total_size"]
+                    if target_mirror:
+                        # Status of the copy on the target drive (direct-to-target splits)
+                        target_status, target_parts, _ = get_archive_status(os.path.join(target_mirror, entry.name), total_size)
+                        item["target_status"] = target_status
+                        item["target_parts"] = target_parts
+                    items.append(item)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
         
@@ -469,7 +873,8 @@ def get_directory_contents(subpath=""):
         "current_path": subpath.replace("\\", "/"),
         "parent_path": parent_path,
         "folders": folders,
-        "files": items
+        "files": items,
+        "target_available": target_available()
     }
 
 def cleanup_file_artifacts(target_path: str):
@@ -486,7 +891,8 @@ def cleanup_file_artifacts(target_path: str):
         escaped_path + ".part*.rar",
         escaped_path + ".rar",
         escaped_path + ".part*.rar.tmp",
-        escaped_path + ".rar.tmp"
+        escaped_path + ".rar.tmp",
+        escaped_path + integrity.CHECKSUM_SUFFIX
     ]
     
     candidates = set()
@@ -504,138 +910,662 @@ def cleanup_file_artifacts(target_path: str):
             count += 1
     return count
 
-def run_split_task(files: List[str]):
-    global task_state
+def find_subtitles(file_path: str, names: List[str] | None = None) -> List[str]:
+    """Subtitles that belong to a video: movie.srt, movie.en.srt, ... (but not movie_sequel.srt)."""
+    video_base_prefix = file_path.rsplit('.', 1)[0] + "."
+    detected_subs = []
+    
+    for potential_sub in list_beside(file_path.rsplit('.', 1)[0], "", ".srt", names):
+         if potential_sub.startswith(video_base_prefix) or potential_sub == (file_path.rsplit('.', 1)[0] + ".srt"):
+             detected_subs.append(potential_sub)
+    return detected_subs
+
+# Linux FICLONE ioctl: copy-on-write clone on btrfs/XFS/bcachefs
+FICLONE = 0x40049409
+
+def link_or_clone(src: str, dst: str) -> str | None:
+    """Create dst sharing src's data blocks. Returns "hardlink", "reflink", or None if neither works."""
+    try:
+        os.link(src, dst)
+        return "hardlink"
+    except OSError:
+        pass
+
+    try:
+        import fcntl
+        with open(src, "rb") as s, open(dst, "wb") as d:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        return "reflink"
+    except (OSError, ImportError):
+        if os.path.exists(dst):
+            force_delete(dst)
+        return None
+
+def report_progress(message: str):
+    with task_state.lock:
+        task_state.last_output = message
+
+def group_split_files(files: List[str], include_subtitles: bool, dedupe_duplicates: bool,
+                      stop_event: threading.Event | None = None, gate: threading.Event | None = None,
+                      on_progress=None) -> List[List[str]]:
+    """Group requested files that hold the same content so each one is archived only once.
+
+    Hardlinks share (st_dev, st_ino) for the video and every included subtitle. With
+    dedupe_duplicates, separate copies with the same size and BLAKE2 digest are grouped too
+    (only same-size candidates get hashed). Only copies whose video and subtitle file names
+    match are grouped: the volumes store the member names, so a renamed copy needs its own. Hashing waits while `gate` is cleared; once
+    `stop_event` is set it ends and the files not compared yet stay in their own groups.
+    `on_progress(message)` reports each file being hashed.
+    """
+    groups = {}
+    order = []
+    for rel_file_path in files:
+        file_path = os.path.join(DATA_DIR, rel_file_path)
+        try:
+            st = os.stat(file_path)
+            subs = find_subtitles(file_path) if include_subtitles else []
+            sub_inodes = []
+            for p in subs:
+                sub_st = os.stat(p)
+                sub_inodes.append((os.path.basename(p), sub_st.st_dev, sub_st.st_ino))
+            key = ((os.path.basename(file_path), st.st_dev, st.st_ino), tuple(sorted(sub_inodes)))
+        except OSError:
+            key = ("missing", rel_file_path)
+        if key not in groups:
+            groups[key] = []
+            order.append(key)
+        groups[key].append(rel_file_path)
+
+    if dedupe_duplicates:
+        by_size = {}
+        for key in order:
+            if key[0] == "missing":
+                continue
+            primary = os.path.join(DATA_DIR, groups[key][0])
+            try:
+                size = os.path.getsize(primary)
+            except OSError:
+                continue  # Gone since the first pass: split_file reports it
+            by_size.setdefault((os.path.basename(primary), size), []).append(key)
+
+        to_hash = [c for c in by_size.values() if len(c) > 1]
+        total = sum(len(c) for c in to_hash)
+        hashed = 0
+        for candidates in to_hash:
+            by_content = {}
+            for key in candidates:
+                primary = os.path.join(DATA_DIR, groups[key][0])
+                hashed += 1
+                if on_progress:
+                    on_progress(f"Checking for duplicate files: {os.path.basename(primary)} ({hashed}/{total})")
+                try:
+                    subs = find_subtitles(primary) if include_subtitles else []
+                    digests = [integrity.hash_file(p, stop_event, gate) for p in [primary] + subs]
+                except OSError as e:
+                    print(f"⚠️  Duplicate check skipped {groups[key][0]}: {e}")
+                    continue  # Deleted, renamed or unreadable meanwhile: stays in its own group
+                if None in digests:
+                    return [groups[key] for key in order]  # Cancelled: the job is stopping
+                content_key = (digests[0]["digest"],
+                               tuple(sorted((os.path.basename(p), d["digest"]) for p, d in zip(subs, digests[1:]))))
+                by_content.setdefault(content_key, []).append(key)
+            for keys in by_content.values():
+                for key in keys[1:]:
+                    print(f"Duplicate content: {groups[key][0]} == {groups[keys[0]][0]}")
+                    groups[keys[0]].extend(groups.pop(key))
+                    order.remove(key)
+
+    return [groups[key] for key in order]
+
+def link_archive(src_file_path: str, dst_file_path: str) -> bool:
+    """Give dst the archive volumes (and checksum sidecar) of src via hardlinks or reflinks.
+
+    Both must have the same file name: the volumes store it as the member name.
+    """
+    if os.path.basename(src_file_path) != os.path.basename(dst_file_path):
+        return False
+    volumes = rar5.find_volumes(src_file_path)
+    if not volumes:
+        return False
+    artifacts = list(volumes)
+    if os.path.exists(integrity.sidecar_path(src_file_path)):
+        artifacts.append(integrity.sidecar_path(src_file_path))
+
+    cleanup_file_artifacts(dst_file_path)
+    dst_dir = os.path.dirname(dst_file_path)
+    dst_base = os.path.basename(dst_file_path)
+    created = []
+    methods = set()
+    for src in artifacts:
+        dst = os.path.join(dst_dir, os.path.basename(src))
+        method = link_or_clone(src, dst)
+        if not method:
+            print(f"Cannot link {src} -> {dst} (different filesystem?), falling back to a full split")
+            for f in created:
+                force_delete(f)
+            return False
+        created.append(dst)
+        methods.add(method)
+
+    method_names = "/".join(sorted(methods))
+    print(f"Linked {len(created)} archive files for {dst_file_path} ({method_names})")
+    with task_state.lock:
+        task_state.last_output = f"Linked {len(volumes)} volumes for {dst_base} ({method_names})"
+    return True
+
+def get_reader_pids() -> List[int]:
+    """Processes reading the current source: this one (hasher, native writer) and the running rar."""
+    process = task_state.process
+    return [os.getpid()] + ([process.pid] if process else [])
+
+class SplitThrottle:
+    """Caps a split's source read rate at `rate` bytes/s.
+
+    The native writer calls wait() with its position. rar is duty-cycled instead: while its
+    read offset (from /proc/<pid>/fdinfo) is ahead of the budget it is held with SIGSTOP,
+    then continued with SIGCONT.
+    """
+    TICK = 0.1
+
+    def __init__(self, rate: int):
+        self.rate = rate
+        self.start = None  # (active_time(), position) of the first sample
+
+    def ahead(self, position: int) -> float:
+        """Seconds the reader at `position` is ahead of the budget (time spent paused doesn't count)."""
+        now = task_state.active_time()
+        if self.start is None:
+            self.start = (now, position)
+        return (position - self.start[1]) / self.rate - (now - self.start[0])
+
+    def wait(self, position: int):
+        delay = self.ahead(position)
+        while delay > 0 and not task_state.stop_requested:
+            time.sleep(min(delay, self.TICK))
+            delay = self.ahead(position)
+
+    def hold(self, process: subprocess.Popen, source_path: str):
+        """Throttle a running rar from a background thread until it exits."""
+        self.start = (task_state.active_time(), 0)  # Budget starts at spawn, before the first offset sample
+
+        def run():
+            while process.poll() is None and not task_state.stop_requested:
+                positions = pagecache.reader_positions(source_path, [process.pid])
+                delay = self.ahead(max(positions)) if positions else 0
+                if delay <= 0:
+                    time.sleep(self.TICK)
+                    continue
+                signal_group(process, signal.SIGSTOP)
+                try:
+                    deadline = time.monotonic() + delay
+                    while time.monotonic() < deadline and not task_state.stop_requested:
+                        time.sleep(min(self.TICK, max(0.0, deadline - time.monotonic())))
+                finally:
+                    with task_state.lock:
+                        if not task_state.paused:  # A user pause outlasts the throttle's hold
+                            signal_group(process, signal.SIGCONT)
+
+        threading.Thread(target=run, daemon=True, name="split-throttle").start()
+
+def split_file(rel_file_path: str, to_target: bool = False) -> bool:
+    """Archive one media file (plus its subtitles). Returns True if the archive was completed.
+
+    With to_target the volumes are written natively into the matching TARGET_DIR folder.
+    """
+    # Reconstruct full path
+    file_path = os.path.join(DATA_DIR, rel_file_path)
+    
+    with task_state.lock:
+        task_state.current_file = rel_file_path
+    
+    if not os.path.exists(file_path):
+        print(f"File not found: {file_path}")
+        return False
+
+    # Detect Subtitles to include
+    detected_subs = find_subtitles(file_path)
+    
+    # Filter based on settings
+    settings = get_settings_internal()
+    if settings.include_subtitles:
+        for s in detected_subs:
+            print(f"Including subtitle: {s}")
+    else:
+        print("Subtitles disabled in settings. Skipping inclusion.")
+        detected_subs = []
+
+    # Same member order rar is given below: video first, then subtitles
+    members = [(p, os.path.basename(p)) for p in [file_path] + detected_subs]
+
+    # Resume an interrupted archive from its last complete volume, otherwise start clean
+    def report_resume_check(message):
+        task_state.run_gate.wait()  # Paused between volume checks
+        with task_state.lock:
+            task_state.last_output = message
+
+    volume_dir = None
+    if to_target:
+        try:
+            volume_dir = target_volume_dir(file_path)
+            os.makedirs(volume_dir, exist_ok=True)
+        except OSError as e:  # Target unmounted, read-only, full, or a name FAT32 rejects
+            print(f"Error processing {file_path}: cannot create target folder: {e}")
+            return False
+
+    resume_plan = None
+    try:
+        resume_plan = rar5.plan_resume(
+            file_path, members,
+            should_stop=lambda: task_state.stop_requested,
+            on_progress=report_resume_check,
+            volume_dir=volume_dir
+        )
+    except Exception as e:
+        print(f"Resume check failed for {file_path}: {e}")
+
+    if resume_plan:
+        print(f"Resuming {file_path} at volume {resume_plan['next_volume']} "
+              f"({len(resume_plan['kept'])} volumes kept, {resume_plan['saved_bytes']} bytes saved)")
+        archive_base = os.path.join(volume_dir or os.path.dirname(file_path), os.path.basename(file_path))
+        for f in resume_plan["discard"] + glob.glob(glob.escape(archive_base) + "*.rar.tmp"):
+            force_delete(f)
+        force_delete(integrity.sidecar_path(file_path, volume_dir))
+    elif to_target:
+        print(f"Cleaning up target artifacts for {file_path} in {volume_dir}...")
+        cleanup_file_artifacts(os.path.join(volume_dir, os.path.basename(file_path)))
+    else:
+        # Auto-cleanup previous artifacts before starting
+        print(f"Cleaning up artifacts for {file_path}...")
+        cleanup_file_artifacts(file_path)
+
+    # Construct RAR command using RELATIVE PATHS (executed in work_dir)
+    # This prevents Storing /data/Folder/File inside the RAR
+    
+    work_dir = os.path.dirname(file_path)
+    file_basename = os.path.basename(file_path)
+    archive_name_rel = file_basename + ".rar"
+    
+    cmd = [
+        "rar", "a", 
+        f"-v{RAR_VOLUME_SIZE}", 
+        "-m0",  # Store mode for speed
+        "-y",   # Assume yes on overwrite/questions
+        archive_name_rel, 
+        file_basename
+    ]
+    
+    # Append subtitles (basenames only)
+    if detected_subs:
+        cmd.extend([os.path.basename(s) for s in detected_subs])
+    
+    if not resume_plan and not to_target:
+        print(f"Starting command: {' '.join(cmd)} in CACHED_DIR: {work_dir}")
+    
+    source_hasher = None
+    completed = False
+    throttle = SplitThrottle(SPLIT_THROTTLE_BPS) if SPLIT_THROTTLE_BPS else None
+    # Readahead for the source, evict finished volumes and consumed source ranges as we go
+    janitor = pagecache.CacheJanitor(
+        file_path, [p for p, _ in members], volume_dir,
+        get_pids=get_reader_pids, flush_bytes=SPLIT_FLUSH_BYTES
+    ).start()
+    try:
+        if task_state.stop_requested:
+            return False # Stop if requested right before start
+
+        # Inline verification: hash the source alongside the writer (page-cache hits, no second pass)
+        if settings.verify_checksums:
+            source_hasher = integrity.SourceHasher(file_path, gate=task_state.run_gate).start()
+
+        if to_target:
+            completed = split_to_target(file_path, members, volume_dir, resume_plan, throttle)
+        elif resume_plan:
+            completed = resume_split(file_path, members, resume_plan, throttle)
+        else:
+            # Start process with lock to ensure kill endpoint sees it immediately
+            with task_state.lock:
+                if task_state.stop_requested:
+                    return False
+                    
+                task_state.process = subprocess.Popen(
+                    cmd, 
+                    stdout=subprocess.PIPE, 
+                    stderr=subprocess.STDOUT, 
+                    text=True,
+                    bufsize=1,
+                    cwd=work_dir,  # Execute in the file's directory
+                    start_new_session=True  # Own process group: pause/resume signals reach rar and its children
+                )
+                if task_state.paused:
+                    signal_group(task_state.process, signal.SIGSTOP)  # Paused before rar got going
+            if throttle:
+                throttle.hold(task_state.process, file_path)
+
+            if task_state.process.stdout:
+                for line in task_state.process.stdout:
+                    line = line.strip()
+                    if line:
+                        # Update output safely
+                        with task_state.lock:
+                            task_state.last_output = line
+            
+            task_state.process.wait()
+            
+            if task_state.process.returncode != 0 and not task_state.stop_requested:
+                raise Exception(f"RAR failed with code {task_state.process.returncode}")
+            completed = task_state.process.returncode == 0
+
+        if source_hasher and completed:
+            digests = {file_basename: source_hasher.wait()}
+            source_hasher = None
+            for s in detected_subs:
+                digests[os.path.basename(s)] = integrity.hash_file(s)
+            sidecar = integrity.write_sidecar(file_path, digests, volume_dir)
+            print(f"Checksums written: {sidecar}")
+            
+    except Exception as e:
+        print(f"Error processing {file_path}: {e}")
+        # Don't stop the whole batch, just log? 
+        # Or stop? Let's log and continue for now.
+    finally:
+        if source_hasher:
+            source_hasher.cancel()
+        task_state.process = None
+        janitor.stop()
+
+    return completed
+
+
+def run_split_task(files: List[str], to_target: bool = False, groups: List[List[str]] | None = None,
+                   publish: bool = True, on_file_done=None):
+    """Split `files` as one job in this process.
+
+    groups: precomputed group_split_files() result (the CLI groups once, then fans groups out).
+    publish: run the job-store monitor; False when the caller owns the job slot and publishes itself.
+    on_file_done(rel_path, completed) is called after every file, split or linked.
+    """
+    stop_event = threading.Event()
+    with task_state.lock:
+        task_state.is_running = True
+        task_state.files_total = len(files)
+        task_state.files_processed = 0
+        task_state.stop_requested = False
+        task_state.stop_event = stop_event  # Set by request_stop: cancels duplicate hashing
+        task_state.resume_saved_bytes = 0
+        task_state.bytes_total = 0
+        task_state.bytes_flushed = 0
+        task_state.page_cache = {"before": pagecache.meminfo()}
+        task_state.stop_after_current = False
+        task_state.paused_total = 0.0
+    monitor = start_job_monitor() if publish else None
+
+    try:
+        if groups is None:
+            settings = get_settings_internal()
+            if settings.dedupe_duplicates:
+                with task_state.lock:
+                    task_state.last_output = "Checking for duplicate files..."
+            if to_target:
+                # Every file gets its own volumes on the target (FAT32 has no hardlinks)
+                groups = [[f] for f in files]
+            else:
+                groups = group_split_files(files, settings.include_subtitles, settings.dedupe_duplicates,
+                                           stop_event=stop_event, gate=task_state.run_gate,
+                                           on_progress=report_progress)
+
+        for group in groups:
+            task_state.run_gate.wait()  # Don't start the next file while paused
+            if task_state.should_end():
+                break
+
+            # Archive each inode (or duplicate content) once...
+            primary = group[0]
+            completed = split_file(primary, to_target)
+            update_library(os.path.join(DATA_DIR, primary))
+            with task_state.lock:
+                task_state.files_processed += 1
+            if on_file_done:
+                on_file_done(primary, completed)
+
+            # ...then give the other locations the same volumes without writing them again
+            primary_path = os.path.join(DATA_DIR, primary)
+            for other in group[1:]:
+                if task_state.stop_requested:  # Stop After Current still links the copies of the current file
+                    break
+                with task_state.lock:
+                    task_state.current_file = other
+                linked = completed and link_archive(primary_path, os.path.join(DATA_DIR, other))
+                other_completed = linked or split_file(other)
+                update_library(os.path.join(DATA_DIR, other))
+                with task_state.lock:
+                    task_state.files_processed += 1
+                if on_file_done:
+                    on_file_done(other, other_completed)
+
+    finally:
+        with task_state.lock:
+            task_state.is_running = False
+            task_state.current_file = None
+            task_state._unpause()
+            task_state.process = None
+            task_state.stop_event = None
+            task_state.page_cache["after"] = pagecache.meminfo()
+            cache_report = dict(task_state.page_cache)
+        print(f"🧹 [CACHE] Page cache before split: {pagecache.format_meminfo(cache_report['before'])}")
+        print(f"🧹 [CACHE] Page cache after split:  {pagecache.format_meminfo(cache_report['after'])}")
+        if monitor:
+            finish_job(monitor)
+
+
+def resume_split(file_path: str, members: list, plan: dict, throttle: SplitThrottle | None = None) -> bool:
+    """Write the remaining volumes of an interrupted archive natively. Returns False if stopped."""
+    with task_state.lock:
+        task_state.resume_saved_bytes += plan["saved_bytes"]
+
+    file_basename = os.path.basename(file_path)
+    last_report = [0.0]
+
+    def on_progress(volume_number, written, total):
+        task_state.run_gate.wait()  # Paused: hold the writer between blocks
+        if throttle:
+            throttle.wait(written)
+        now = time.time()
+        if now - last_report[0] < 0.5 and written < total:
+            return
+        last_report[0] = now
+        percent = int(written * 100 / total) if total else 100
+        with task_state.lock:
+            task_state.last_output = f"Resuming {file_basename}: volume {volume_number} {percent}%"
+
+    completed = rar5.write_continuation(
+        file_path, members, plan, RAR_VOLUME_SIZE_BYTES,
+        should_stop=lambda: task_state.stop_requested,
+        on_progress=on_progress
+    )
+    if completed:
+        with task_state.lock:
+            task_state.last_output = f"Resumed {file_basename}: reused {len(plan['kept'])} volumes"
+    return completed
+
+def split_to_target(file_path: str, members: list, volume_dir: str, plan: dict | None = None,
+                    throttle: SplitThrottle | None = None) -> bool:
+    """Write an archive's volumes straight into volume_dir on the target drive. Returns False if stopped.
+
+    Uses the native RAR5 writer instead of `rar` so every write goes through a large buffer and
+    every volume is fsync'd before the next one starts; bytes_flushed only counts synced data.
+    """
+    if plan:
+        with task_state.lock:
+            task_state.resume_saved_bytes += plan["saved_bytes"]
+    else:
+        plan = rar5.new_plan(members, RAR_VOLUME_SIZE_BYTES)
+
+    file_basename = os.path.basename(file_path)
+    remaining = sum(os.path.getsize(p) for p, _ in members[plan["member_index"]:]) - plan["offset"]
+    with task_state.lock:
+        task_state.bytes_total += remaining
+    state = {"file": None, "written": 0, "synced": 0, "report": 0.0}
+
+    def sync(full: bool):
+        f = state["file"]
+        f.flush()
+        if full:
+            os.fsync(f.fileno())
+        else:
+            os.fdatasync(f.fileno())
+        with task_state.lock:
+            task_state.bytes_flushed += state["written"] - state["synced"]
+        state["synced"] = state["written"]
+
+    def open_volume(path):
+        state["file"] = open(path, "wb", buffering=TARGET_WRITE_BUFFER)
+        return state["file"]
+
+    def close_volume(f):
+        try:
+            sync(full=True)
+        finally:
+            f.close()
+            state["file"] = None
+
+    def on_progress(volume_number, written, total):
+        task_state.run_gate.wait()  # Paused: hold the writer between blocks
+        if throttle:
+            throttle.wait(written)
+        state["written"] = written
+        if written - state["synced"] >= TARGET_SYNC_BYTES:
+            sync(full=False)
+        now = time.time()
+        if now - state["report"] < 0.5 and written < total:
+            return
+        state["report"] = now
+        with task_state.lock:
+            task_state.last_output = (f"Writing {file_basename} to target: volume {volume_number}, "
+                                      f"{state['synced'] / (1024**3):.1f} / {total / (1024**3):.1f} GB flushed")
+
+    completed = rar5.write_continuation(
+        file_path, members, plan, RAR_VOLUME_SIZE_BYTES,
+        should_stop=lambda: task_state.stop_requested,
+        on_progress=on_progress,
+        open_volume=open_volume,
+        close_volume=close_volume,
+        volume_dir=volume_dir
+    )
+    if completed:
+        volumes = rar5.find_volumes(file_path, volume_dir)
+        print(f"Wrote {len(volumes)} volumes for {file_path} to {volume_dir}")
+        with task_state.lock:
+            task_state.last_output = f"Wrote {file_basename} to target: {len(volumes)} volumes"
+    return completed
+
+def run_verify_task(files: List[str], on_target: bool = False):
+    """Verify archives against their checksum sidecars, re-reading only the stored payload."""
+    stop_event = threading.Event()
     with task_state.lock:
         task_state.is_running = True
         task_state.files_total = len(files)
         task_state.files_processed = 0
         task_state.stop_requested = False
+        task_state.verify_results = {}
+        task_state.stop_event = stop_event
+        task_state.stop_after_current = False
+    monitor = start_job_monitor()
 
     try:
         for rel_file_path in files:
-            if task_state.stop_requested:
+            if task_state.should_end():
                 break
-            
-            # Reconstruct full path
+
             file_path = os.path.join(DATA_DIR, rel_file_path)
-            
             with task_state.lock:
                 task_state.current_file = rel_file_path
-            
-            if not os.path.exists(file_path):
-                print(f"File not found: {file_path}")
-                continue
-
-            # Auto-cleanup previous artifacts before starting
-            print(f"Cleaning up artifacts for {file_path}...")
-            cleanup_file_artifacts(file_path)
-
-            # Detect Subtitles to include
-            video_base_prefix = file_path.rsplit('.', 1)[0] + "."
-            subs_pattern = glob.escape(file_path.rsplit('.', 1)[0]) + "*.srt"
-            detected_subs = []
-            
-            for potential_sub in glob.glob(subs_pattern):
-                 if potential_sub.startswith(video_base_prefix) or potential_sub == (file_path.rsplit('.', 1)[0] + ".srt"):
-                     detected_subs.append(potential_sub)
-            
-            # Filter based on settings
-            settings = get_settings_internal()
-            if settings.include_subtitles:
-                for s in detected_subs:
-                    print(f"Including subtitle: {s}")
-            else:
-                print("Subtitles disabled in settings. Skipping inclusion.")
-                detected_subs = []
+                task_state.last_output = f"Verifying {os.path.basename(file_path)}..."
 
-            # Construct RAR command using RELATIVE PATHS (executed in work_dir)
-            # This prevents Storing /data/Folder/File inside the RAR
-            
-            work_dir = os.path.dirname(file_path)
-            file_basename = os.path.basename(file_path)
-            archive_name_rel = file_basename + ".rar"
-            
-            cmd = [
-                "rar", "a", 
-                "-v4095M", 
-                "-m0",  # Store mode for speed
-                "-y",   # Assume yes on overwrite/questions
-                archive_name_rel, 
-                file_basename
-            ]
-            
-            # Append subtitles (basenames only)
-            if detected_subs:
-                cmd.extend([os.path.basename(s) for s in detected_subs])
-            
-            print(f"Starting command: {' '.join(cmd)} in CACHED_DIR: {work_dir}")
-            
             try:
-                # Start process with lock to ensure kill endpoint sees it immediately
-                with task_state.lock:
-                    if task_state.stop_requested:
-                        break # Stop if requested right before start
-                        
-                    task_state.process = subprocess.Popen(
-                        cmd, 
-                        stdout=subprocess.PIPE, 
-                        stderr=subprocess.STDOUT, 
-                        text=True,
-                        bufsize=1,
-                        cwd=work_dir  # Execute in the file's directory
-                    )
-                
-                if task_state.process.stdout:
-                    for line in task_state.process.stdout:
-                        line = line.strip()
-                        if line:
-                            # Update output safely
-                            with task_state.lock:
-                                task_state.last_output = line
-                
-                task_state.process.wait()
-                
-                if task_state.process.returncode != 0 and not task_state.stop_requested:
-                    raise Exception(f"RAR failed with code {task_state.process.returncode}")
-                    
+                volume_dir = target_volume_dir(file_path) if on_target else None
+                result = integrity.verify_archive(file_path, volume_dir, stop_event=stop_event)
             except Exception as e:
-                print(f"Error processing {file_path}: {e}")
-                # Don't stop the whole batch, just log? 
-                # Or stop? Let's log and continue for now.
-            finally:
-                task_state.process = None
+                result = {"status": "ERROR", "detail": str(e)}
+            print(f"Verify {rel_file_path}: {result['status']}")
 
             with task_state.lock:
+                task_state.verify_results[rel_file_path] = result
+                task_state.last_output = f"Verify {os.path.basename(file_path)}: {result['status']}"
                 task_state.files_processed += 1
-
     finally:
         with task_state.lock:
             task_state.is_running = False
             task_state.current_file = None
-            task_state.process = None
-
+            task_state.stop_event = None
+        finish_job(monitor)
 
 @app.get("/api/files")
-def list_files(path: str = "", current_user: User = Depends(get_current_active_user)):
-    return get_directory_contents(path)
+def list_files(request: Request, path: str = "", current_user: User = Depends(get_current_active_user)):
+    # Conditional GET: skip the full listing when the client's copy is still current
+    etag = get_directory_fingerprint(path)
+    cache_headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers)
+
+    return json_response(get_directory_contents(path), headers=cache_headers)
+
+SEARCH_MAX_RESULTS = 500
+
+@app.get("/api/search")
+def search_library(q: str = "", limit: int = 50, current_user: User = Depends(get_current_active_user)):
+    """Filename search across the whole library, answered from the index."""
+    index = get_library()
+    start = time.perf_counter()
+    results = index.search(q.strip(), max(1, min(limit, SEARCH_MAX_RESULTS)))
+    return json_response({
+        "query": q,
+        "results": results,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+        "indexed": index.count(),
+        "ready": index.ready
+    })
 
 @app.post("/api/split")
 def start_split(request: SplitRequest, current_user: User = Depends(get_current_active_user)):
-    global task_state
-    with task_state.lock:
-        if task_state.is_running:
-            raise HTTPException(status_code=400, detail="Task already running")
-    
     # Just validate list is not empty
     if not request.files:
         raise HTTPException(status_code=400, detail="No valid files provided")
 
-    thread = threading.Thread(target=run_split_task, args=(request.files,))
+    if request.to_target and not target_available():
+        raise HTTPException(status_code=400, detail=f"Target directory {TARGET_DIR} is not mounted")
+
+    # Cross-worker split lock: only one executor may own archive jobs
+    if not claim_job("split", len(request.files)):
+        raise HTTPException(status_code=400, detail="Task already running")
+
+    thread = threading.Thread(target=run_split_task, args=(request.files, request.to_target))
     thread.start()
     
     return {"status": "started", "count": len(request.files)}
 
+@app.post("/api/verify")
+def start_verify(request: VerifyRequest, current_user: User = Depends(get_current_active_user)):
+    if not request.files:
+        raise HTTPException(status_code=400, detail="No valid files provided")
+
+    for rel_file_path in request.files:
+        target_path = os.path.abspath(os.path.join(DATA_DIR, rel_file_path.strip(os.path.sep)))
+        if not target_path.startswith(DATA_DIR):
+            raise HTTPException(status_code=403, detail="Invalid path")
+
+    if request.on_target and not target_available():
+        raise HTTPException(status_code=400, detail=f"Target directory {TARGET_DIR} is not mounted")
+
+    if not claim_job("verify", len(request.files)):
+        raise HTTPException(status_code=400, detail="Task already running")
+
+    thread = threading.Thread(target=run_verify_task, args=(request.files, request.on_target))
+    thread.start()
+
+    return {"status": "started", "count": len(request.files)}
+
 def force_delete(file_path: str):
     """Try to delete a file, handling permission errors. Retries with chmod and system rm."""
     max_retries = 10
@@ -693,6 +1623,7 @@ def delete_rars(request: DeleteRequest, current_user: User = Depends(get_current
              raise HTTPException(status_code=400, detail="Target must be an MKV or MP4 file")
              
         deleted_count = cleanup_file_artifacts(target_path)
+        update_library(target_path)
             
     elif request.mode == "all":
         # Delete all RARs in directory
@@ -702,46 +1633,73 @@ def delete_rars(request: DeleteRequest, current_user: User = Depends(get_current
         # Escape the directory path too just in case
         escaped_dir = glob.escape(target_path)
         rar_files = glob.glob(os.path.join(escaped_dir, "*.rar"))
+        rar_files += glob.glob(os.path.join(escaped_dir, "*" + integrity.CHECKSUM_SUFFIX))
         
         # Also clean .tmp files? Maybe risky. Let's stick to .rar for bulk clean.
         
         for f in rar_files:
             if force_delete(f):
                 deleted_count += 1
+        try:
+            get_library().update_dir(target_path)
+        except Exception as e:
+            print(f"⚠️  [SEARCH] Index update failed: {e}")
 
     print(f"Total deleted: {deleted_count}")
     return {"status": "deleted", "count": deleted_count}
 
-@app.get("/api/status")
+@app.get("/api/status", responses={200: {"model": TaskStatus}})  # Schema for the docs only
 def get_status(current_user: User = Depends(get_current_active_user)):
-    global task_state
-    with task_state.lock:
-        return TaskStatus(
-            is_running=task_state.is_running,
-            current_file=task_state.current_file,
-            files_total=task_state.files_total,
-            files_processed=task_state.files_processed,
-            last_output=task_state.last_output
-        )
+    # Polled every 2s while a task runs: plain dict + orjson, no model round-trip
+    local = task_state.snapshot()
+    if local["is_running"]:
+        return json_response(local)  # This worker is the executor: freshest state
+
+    # Another worker (or the CLI) may own the job: read the shared status board
+    shared = get_job_store().snapshot()
+    shared.pop("kind", None)
+    return json_response({**local, **shared})
 
 @app.post("/api/kill")
 def kill_process(current_user: User = Depends(get_current_active_user)):
-    global task_state
     with task_state.lock:
-        if not task_state.is_running:
-            return {"status": "not running"}
-        
-        task_state.stop_requested = True
-        
-        if task_state.process:
-            print("Killing process immediately...")
-            try:
-                task_state.process.kill()
-            except Exception as e:
-                print(f"Error killing process: {e}")
-            
+        running_here = task_state.is_running
+
+    # Shared flag reaches the executor in any worker within one publish interval
+    running_elsewhere = get_job_store().request_stop()
+    if not running_here and not running_elsewhere:
+        return {"status": "not running"}
+
+    # Executor is this process: kill rar right away instead of waiting for the monitor
+    task_state.request_stop()
     return {"status": "termination requested"}
 
+def pause_job(paused: bool) -> dict:
+    job = get_job_store().snapshot()
+    if not job["is_running"]:
+        return {"status": "not running"}
+    if job["kind"] != "split":
+        raise HTTPException(status_code=400, detail="Only split jobs can be paused")
+    if not set_job_control("paused", paused):
+        return {"status": "not running"}
+    return {"status": "paused" if paused else "resumed"}
+
+@app.post("/api/pause")
+def pause_process(current_user: User = Depends(get_current_active_user)):
+    # rar is SIGSTOP'd, the native writer waits between blocks: disk I/O stops, nothing is lost
+    return pause_job(True)
+
+@app.post("/api/resume")
+def resume_process(current_user: User = Depends(get_current_active_user)):
+    return pause_job(False)
+
+@app.post("/api/stop_after_current")
+def stop_after_current(request: StopAfterCurrentRequest, current_user: User = Depends(get_current_active_user)):
+    # The file being split completes; files not started yet are left for a later job
+    if not set_job_control("stop_after_current", request.enabled):
+        return {"status": "not running"}
+    return {"status": "stopping after current file" if request.enabled else "continuing"}
+
 def get_settings_internal() -> Settings:
     if not os.path.exists(SETTINGS_FILE):
         defaults = Settings()
@@ -785,6 +1743,11 @@ def save_settings(new_settings: Settings, current_user: User = Depends(get_curre
         os.makedirs(CONFIG_DIR, exist_ok=True)
         with open(SETTINGS_FILE, "w") as f:
             f.write(new_settings.model_dump_json(indent=2))
+
+        if new_settings.include_subtitles != current.include_subtitles:
+            # Indexed sizes and statuses depend on the subtitle setting: reclassify everything now
+            get_library().invalidate()
+            _library_wake.set()
             
         # Return public response
         response = new_settings.model_dump()
@@ -829,7 +1792,7 @@ def setup_admin(request: SetupRequest, client_request: Request):
     
     # Rate limiting
     client_ip = client_request.client.host if client_request.client else "unknown"
-    if not check_rate_limit(client_ip, SETUP_RATE_LIMIT, "SETUP"):
+    if not check_rate_limit(client_ip, "SETUP"):
         raise HTTPException(status_code=429, detail="Too many requests. Try again later.")
     
     hashed_password = get_password_hash(request.password)
@@ -847,7 +1810,7 @@ def setup_admin(request: SetupRequest, client_request: Request):
 async def login_for_access_token(request: Request, form_data: OAuth2PasswordRequestForm = Depends()):
     # Rate limiting
     client_ip = request.client.host if request.client else "unknown"
-    if not check_rate_limit(client_ip, LOGIN_RATE_LIMIT, "LOGIN"):
+    if not check_rate_limit(client_ip, "LOGIN"):
         raise HTTPException(status_code=429, detail="Too many login attempts. Try again later.")
     settings = get_settings_internal()
     if not settings.admin_email:
@@ -883,6 +1846,7 @@ async def promote_oidc_user(request: Request):
         )
     
     oidc_token = auth_header.split(" ")[1]
+    from jose import JWTError
     
     # Verify the OIDC token
     try:
@@ -973,3 +1937,6 @@ async def logout(request: Request, current_user: User = Depends(get_current_acti
 @app.get("/api/users/me", response_model=User)
 async def read_users_me(current_user: User = Depends(get_current_active_user)):
     return current_user
+
+app.add_middleware(FirstRequestTimer)
+STARTUP_TIMINGS["app_setup"] = time.perf_counter() - _IMPORTS_DONE
@@ -0,0 +1,187 @@
+"""Page-cache hygiene for split jobs.
+
+Splitting streams every source byte through the page cache twice (read + volume
+write), which evicts whatever Kodi and the other services had cached. While a file
+is being split a CacheJanitor thread:
+
+  * follows the readers of the source (`rar`, the native writer, the checksum
+    hasher) through /proc/<pid>/fdinfo and issues WILLNEED readahead ahead of the
+    fastest one,
+  * once a volume is complete, syncs it and drops it from the cache, together with
+    the part of the source that every reader has already consumed,
+  * optionally fdatasyncs the volume being written every `flush_bytes` so dirty
+    pages can't pile up.
+
+Everything is advisory and Linux-specific; on other platforms the calls are no-ops.
+"""
+import os
+import threading
+
+import rar5
+
+POLL_INTERVAL = 0.5                      # seconds between janitor passes
+READAHEAD_WINDOW = 64 * 1024 * 1024      # WILLNEED window ahead of the leading reader
+
+HAS_FADVISE = hasattr(os, "posix_fadvise")
+
+
+def advise(fd: int, offset: int, length: int, advice_name: str):
+    """posix_fadvise by name (e.g. "POSIX_FADV_DONTNEED"); silently skipped where unsupported."""
+    if not HAS_FADVISE:
+        return
+    try:
+        os.posix_fadvise(fd, offset, length, getattr(os, advice_name))
+    except OSError:
+        pass
+
+
+def advise_path(path: str, offset: int, length: int, advice_name: str, sync: bool = False):
+    """Apply advice to a file by path. `sync` writes dirty pages back first (DONTNEED skips dirty pages)."""
+    if not HAS_FADVISE:
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        if sync:
+            os.fdatasync(fd)
+        advise(fd, offset, length, advice_name)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def sync_file(path: str):
+    """Write a file's dirty pages back to disk (caps dirty-page buildup while it is being written)."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fdatasync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def drop_file(path: str, sync: bool = True):
+    """Evict a whole file from the page cache."""
+    advise_path(path, 0, 0, "POSIX_FADV_DONTNEED", sync=sync)
+
+
+def meminfo() -> dict:
+    """System page-cache figures in bytes: cached, dirty, writeback (empty dict if unavailable)."""
+    fields = {"Cached": "cached", "Dirty": "dirty", "Writeback": "writeback"}
+    result = {}
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in fields:
+                    result[fields[key]] = int(value.split()[0]) * 1024
+    except (OSError, ValueError):
+        return {}
+    return result
+
+
+def format_meminfo(info: dict) -> str:
+    if not info:
+        return "n/a"
+    return ", ".join(f"{k} {v / (1024 * 1024):.0f} MB" for k, v in info.items())
+
+
+def reader_positions(path: str, pids) -> list:
+    """File offsets of every descriptor the given processes have open on `path`."""
+    real = os.path.realpath(path)
+    positions = []
+    for pid in pids:
+        try:
+            fds = os.listdir(f"/proc/{pid}/fd")
+        except OSError:
+            continue
+        for fd in fds:
+            try:
+                if os.readlink(f"/proc/{pid}/fd/{fd}") != real:
+                    continue
+                with open(f"/proc/{pid}/fdinfo/{fd}", "r") as f:
+                    for line in f:
+                        if line.startswith("pos:"):
+                            positions.append(int(line.split()[1]))
+                            break
+            except (OSError, ValueError):
+                continue  # Descriptor closed between listing and reading
+    return positions
+
+
+class CacheJanitor:
+    """Keeps one file's split from flooding the page cache (see module docstring).
+
+    `get_pids()` returns the processes reading the source (this process plus the
+    running `rar`, if any); it's re-evaluated every pass because `rar` starts later.
+    """
+
+    def __init__(self, video_path: str, sources: list, volume_dir: str | None = None,
+                 get_pids=None, flush_bytes: int = 0):
+        self.video_path = video_path
+        self.sources = sources
+        self.volume_dir = volume_dir
+        self.get_pids = get_pids or (lambda: [os.getpid()])
+        self.flush_bytes = flush_bytes
+        self.dropped_volumes = set()
+        self.dropped_source = 0
+        self.flushed = {}  # volume -> size at last flush
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        if HAS_FADVISE:
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(POLL_INTERVAL):
+            try:
+                self._tick()
+            except Exception as e:
+                print(f"⚠️  [CACHE] Janitor pass failed for {self.video_path}: {e}")
+
+    def _tick(self):
+        positions = reader_positions(self.video_path, self.get_pids())
+        if positions:
+            advise_path(self.video_path, max(positions), READAHEAD_WINDOW, "POSIX_FADV_WILLNEED")
+
+        volumes = rar5.find_volumes(self.video_path, self.volume_dir)
+        newly_complete = [v for v in volumes[:-1] if v not in self.dropped_volumes]
+        for volume in newly_complete:
+            drop_file(volume)
+            self.dropped_volumes.add(volume)
+        if newly_complete and positions:
+            # Only what every reader is past: a lagging hasher must not re-read from disk
+            consumed = min(positions)
+            if consumed > self.dropped_source:
+                advise_path(self.video_path, 0, consumed, "POSIX_FADV_DONTNEED")
+                self.dropped_source = consumed
+
+        if self.flush_bytes and volumes:
+            current = volumes[-1]
+            try:
+                size = os.path.getsize(current)
+            except OSError:
+                return
+            if size - self.flushed.get(current, 0) >= self.flush_bytes:
+                sync_file(current)
+                self.flushed[current] = size
+
+    def stop(self):
+        """Stop watching and evict everything this split touched."""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        for volume in rar5.find_volumes(self.video_path, self.volume_dir):
+            if volume not in self.dropped_volumes:
+                drop_file(volume)
+        for source in self.sources:
+            drop_file(source, sync=False)
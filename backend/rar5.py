@@ -0,0 +1,594 @@
+"""Minimal RAR5 volume reader/writer for stored (-m0) archives.
+
+`rar` always starts an archive from the first volume. To resume an interrupted split
+we parse the volumes it already wrote, CRC-check the complete leading ones, and write
+the remaining volumes ourselves. Store mode makes this possible: a volume is just
+headers around raw file bytes. The same writer produces whole archives when volumes
+go straight to a target drive (`new_plan`).
+
+Only the subset of the format `rar a -m0 -v...` produces is handled (no encryption,
+no compression, no BLAKE2 hash records).
+"""
+import glob
+import os
+import re
+import struct
+import zlib
+
+SIGNATURE = b"Rar!\x1a\x07\x01\x00"
+RAR4_SIGNATURE = b"Rar!\x1a\x07\x00"
+
+# Header types
+HEAD_MAIN = 1
+HEAD_FILE = 2
+HEAD_SERVICE = 3
+HEAD_CRYPT = 4
+HEAD_END = 5
+
+# Common header flags
+HFL_EXTRA = 0x0001
+HFL_DATA = 0x0002
+HFL_SPLIT_BEFORE = 0x0008
+HFL_SPLIT_AFTER = 0x0010
+
+# Main archive flags
+MHFL_VOLUME = 0x0001
+MHFL_VOLNUMBER = 0x0002
+
+# File header flags
+FHFL_UTIME = 0x0002
+FHFL_CRC32 = 0x0004
+
+# End of archive flags
+EHFL_NEXTVOLUME = 0x0001
+
+# File extra record types
+FHEXTRA_HASH = 0x02
+FHEXTRA_HTIME = 0x03
+
+# File time record flags
+HTIME_UNIXTIME = 0x01  # 32-bit Unix seconds instead of Windows FILETIME
+HTIME_MTIME = 0x02
+FILETIME_UNIX_EPOCH = 116444736000000000  # 1970-01-01 in 100 ns ticks since 1601-01-01
+
+HOST_UNIX = 1
+IO_BLOCK_SIZE = 1024 * 1024
+
+
+class Rar5Error(Exception):
+    """Raised for volumes that aren't stored RAR5 archives or are damaged/truncated."""
+
+
+def read_vint(buf: bytes, pos: int):
+    result = 0
+    shift = 0
+    while True:
+        if pos >= len(buf):
+            raise Rar5Error("Truncated RAR5 header")
+        b = buf[pos]
+        pos += 1
+        result |= (b & 0x7F) << shift
+        if not b & 0x80:
+            return result, pos
+        shift += 7
+
+
+def encode_vint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        b = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(b | 0x80)
+        else:
+            out.append(b)
+            return bytes(out)
+
+
+class Block:
+    """One parsed RAR5 header block (file-header fields are only set for HEAD_FILE)."""
+
+    def __init__(self, offset, header_type, flags, header_ok, data_offset, data_size):
+        self.offset = offset
+        self.header_type = header_type
+        self.flags = flags
+        self.header_ok = header_ok
+        self.data_offset = data_offset
+        self.data_size = data_size
+        self.extra = b""
+        self.archive_flags = 0
+        self.volume_number = 0
+        self.end_flags = 0
+        self.name = None
+        self.file_flags = 0
+        self.unpacked_size = 0
+        self.attributes = 0
+        self.mtime = None
+        self.data_crc = None
+        self.comp_info = 0
+        self.host_os = HOST_UNIX
+
+    @property
+    def end(self):
+        return self.data_offset + self.data_size
+
+
+def iter_blocks(path: str):
+    """Yield the header blocks of a volume. Raises Rar5Error on a bad signature or a truncated header."""
+    file_size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        sig = f.read(len(SIGNATURE))
+        if sig != SIGNATURE:
+            if sig[:len(RAR4_SIGNATURE)] == RAR4_SIGNATURE:
+                raise Rar5Error(f"{os.path.basename(path)}: RAR4 archives are not supported")
+            raise Rar5Error(f"{os.path.basename(path)}: not a RAR5 volume")
+
+        pos = f.tell()
+        while pos < file_size:
+            # CRC32 (4) + header size vint (max 3 bytes) precede the header body
+            f.seek(pos)
+            prefix = f.read(7)
+            if len(prefix) < 5:
+                raise Rar5Error(f"{os.path.basename(path)}: truncated header at offset {pos}")
+            header_size, body_start = read_vint(prefix, 4)
+            f.seek(pos + body_start)
+            header = f.read(header_size)
+            if len(header) < header_size:
+                raise Rar5Error(f"{os.path.basename(path)}: truncated header at offset {pos}")
+
+            stored_crc = struct.unpack("<I", prefix[:4])[0]
+            header_ok = zlib.crc32(prefix[4:body_start] + header) == stored_crc
+
+            header_type, p = read_vint(header, 0)
+            flags, p = read_vint(header, p)
+            extra_size = 0
+            data_size = 0
+            if flags & HFL_EXTRA:
+                extra_size, p = read_vint(header, p)
+            if flags & HFL_DATA:
+                data_size, p = read_vint(header, p)
+            block = Block(pos, header_type, flags, header_ok, pos + body_start + header_size, data_size)
+            if extra_size:
+                block.extra = header[header_size - extra_size:]
+
+            if header_type == HEAD_CRYPT:
+                raise Rar5Error(f"{os.path.basename(path)}: encrypted archives are not supported")
+            elif header_type == HEAD_MAIN:
+                block.archive_flags, p = read_vint(header, p)
+                if block.archive_flags & MHFL_VOLNUMBER:
+                    block.volume_number, p = read_vint(header, p)
+            elif header_type == HEAD_FILE:
+                block.file_flags, p = read_vint(header, p)
+                block.unpacked_size, p = read_vint(header, p)
+                block.attributes, p = read_vint(header, p)
+                if block.file_flags & FHFL_UTIME:
+                    block.mtime = struct.unpack("<I", header[p:p + 4])[0]
+                    p += 4
+                if block.file_flags & FHFL_CRC32:
+                    block.data_crc = struct.unpack("<I", header[p:p + 4])[0]
+                    p += 4
+                block.comp_info, p = read_vint(header, p)
+                block.host_os, p = read_vint(header, p)
+                name_len, p = read_vint(header, p)
+                block.name = header[p:p + name_len].decode("utf-8", "replace")
+            elif header_type == HEAD_END:
+                block.end_flags, p = read_vint(header, p)
+
+            yield block
+            if header_type == HEAD_END:
+                return
+            pos = block.end
+
+        raise Rar5Error(f"{os.path.basename(path)}: missing end of archive header")
+
+
+def is_stored(block: Block) -> bool:
+    return ((block.comp_info >> 7) & 0x7) == 0
+
+
+def iter_extra_records(block: Block):
+    """Yield `(record_type, data)` for the extra records of a header. Raises Rar5Error if truncated."""
+    p = 0
+    while p < len(block.extra):
+        size, p = read_vint(block.extra, p)
+        end = p + size
+        if size == 0 or end > len(block.extra):
+            raise Rar5Error(f"bad extra record in header of {block.name}")
+        record_type, data_start = read_vint(block.extra, p)
+        yield record_type, block.extra[data_start:end]
+        p = end
+
+
+def has_hash_record(block: Block) -> bool:
+    """True if the file header carries a BLAKE2 hash extra record (rar -htb)."""
+    try:
+        return any(record_type == FHEXTRA_HASH for record_type, _ in iter_extra_records(block))
+    except Rar5Error:
+        return True  # Unparseable extra area: treat as unsafe to copy
+
+
+def file_mtime(block: Block) -> int | None:
+    """Modification time in Unix seconds, or None if the header doesn't carry one.
+
+    Taken from the header's own time field (FHFL_UTIME), otherwise from the file time
+    extra record that rar 5+ writes (Unix seconds or Windows FILETIME, per its flags).
+    """
+    if block.mtime is not None:
+        return block.mtime
+    try:
+        for record_type, data in iter_extra_records(block):
+            if record_type != FHEXTRA_HTIME:
+                continue
+            flags, p = read_vint(data, 0)
+            if not flags & HTIME_MTIME:
+                return None
+            if flags & HTIME_UNIXTIME:
+                return struct.unpack("<I", data[p:p + 4])[0]
+            return (struct.unpack("<Q", data[p:p + 8])[0] - FILETIME_UNIX_EPOCH) // 10_000_000
+    except (Rar5Error, struct.error):
+        return None
+    return None
+
+
+def scan_volume(path: str) -> list:
+    """Return `[(member_name, data_offset, data_size)]` for the stored file blocks of one volume."""
+    segments = []
+    for block in iter_blocks(path):
+        if block.header_type == HEAD_FILE:
+            if not is_stored(block):
+                raise Rar5Error(f"{block.name}: compressed members are not supported (expected -m0)")
+            segments.append((block.name, block.data_offset, block.data_size))
+    return segments
+
+
+PART_RE = re.compile(r"\.part(\d+)\.rar$")
+
+
+def find_volumes(video_path: str, volume_dir: str | None = None) -> list:
+    """Archive volumes for a video in volume order (`.partN.rar` numerically, or a single `.rar`)."""
+    base = os.path.join(volume_dir or os.path.dirname(video_path), os.path.basename(video_path))
+    prefix_len = len(os.path.basename(base))
+    parts = []
+    for f in glob.glob(glob.escape(base) + ".part*.rar"):
+        m = PART_RE.match(os.path.basename(f)[prefix_len:])
+        if m:
+            parts.append((int(m.group(1)), f))
+    if parts:
+        return [f for _, f in sorted(parts)]
+    if os.path.exists(base + ".rar"):
+        return [base + ".rar"]
+    return []
+
+
+def volume_path(archive_base: str, number: int, width: int) -> str:
+    """`movie.mkv` + 3 -> `movie.mkv.part03.rar` (width taken from the volumes rar already named)."""
+    return f"{archive_base}.part{number:0{width}d}.rar"
+
+
+def _crc32_range(path: str, offset: int, length: int, member_crc: int = 0) -> tuple:
+    """CRC32 of a byte range on its own and continuing `member_crc`, from a single read.
+
+    Returns (part_crc, member_crc).
+    """
+    part_crc = 0
+    with open(path, "rb") as f:
+        f.seek(offset)
+        while length > 0:
+            block = f.read(min(IO_BLOCK_SIZE, length))
+            if not block:
+                raise Rar5Error(f"{os.path.basename(path)}: unexpected end of volume")
+            part_crc = zlib.crc32(block, part_crc)
+            member_crc = zlib.crc32(block, member_crc)
+            length -= len(block)
+    return part_crc, member_crc
+
+
+def _is_complete(volumes: list) -> bool:
+    """True if the volumes are numbered 1..N and the last one ends the archive (headers only)."""
+    if [int(PART_RE.search(v).group(1)) for v in volumes] != list(range(1, len(volumes) + 1)):
+        return False
+    try:
+        for block in iter_blocks(volumes[-1]):
+            if not block.header_ok:
+                return False
+            if block.header_type == HEAD_END:
+                return not block.end_flags & EHFL_NEXTVOLUME
+    except Rar5Error:
+        pass  # Truncated last volume: rar was interrupted while writing it
+    return False
+
+
+def plan_resume(video_path: str, members: list, should_stop=None, on_progress=None,
+                volume_dir: str | None = None) -> dict | None:
+    """Work out where an interrupted split can continue (`on_progress(message)` is optional).
+
+    `members` is `[(source_path, name_in_archive), ...]` in the order rar was given them.
+    Leading volumes are kept only if every header CRC and every stored part CRC checks
+    out and they match the current source files. The first volume that fails (the one
+    rar was writing when it died) and everything after it is marked for discard.
+
+    Returns None when there is nothing safely resumable (no volumes, first volume
+    broken, archive already complete, or sources changed or without a stored mtime).
+    """
+    volumes = find_volumes(video_path, volume_dir)
+    if not volumes or not PART_RE.search(volumes[0]):
+        return None  # Nothing written yet, or a single-volume archive
+
+    if _is_complete(volumes):
+        return None  # Finished archive (plain re-split): don't CRC volumes that are about to be deleted
+
+    width = len(PART_RE.search(volumes[0]).group(1))
+    member_index = 0
+    offset = 0
+    member_crc = 0
+    template = None
+    kept = []
+
+    for expected_number, volume in enumerate(volumes, start=1):
+        if should_stop and should_stop():
+            return None
+        if int(PART_RE.search(volume).group(1)) != expected_number:
+            break  # Gap in numbering: stop at the last contiguous volume
+
+        if on_progress:
+            on_progress(f"Checking {os.path.basename(volume)}...")
+
+        state = (member_index, offset, member_crc, template)
+        try:
+            volume_ok = True
+            next_volume = False
+            for block in iter_blocks(volume):
+                if not block.header_ok:
+                    volume_ok = False
+                    break
+                if block.header_type == HEAD_MAIN:
+                    number = block.volume_number if block.archive_flags & MHFL_VOLNUMBER else 0
+                    if not block.archive_flags & MHFL_VOLUME or number != expected_number - 1:
+                        volume_ok = False
+                        break
+                elif block.header_type == HEAD_FILE:
+                    if member_index >= len(members) or block.name != members[member_index][1]:
+                        return None  # Archive holds different files than this run would add
+                    source_path = members[member_index][0]
+                    st = os.stat(source_path)
+                    mtime = file_mtime(block)
+                    if (not is_stored(block) or has_hash_record(block)
+                            or block.unpacked_size != st.st_size
+                            or mtime is None  # Can't tell an in-place edit of the same size
+                            or mtime & 0xFFFFFFFF != int(st.st_mtime) & 0xFFFFFFFF
+                            or bool(block.flags & HFL_SPLIT_BEFORE) != (offset > 0)
+                            or block.data_crc is None):
+                        return None
+
+                    part_crc, member_crc = _crc32_range(volume, block.data_offset, block.data_size, member_crc)
+                    offset += block.data_size
+                    if block.flags & HFL_SPLIT_AFTER:
+                        if part_crc != block.data_crc:
+                            volume_ok = False
+                            break
+                        template = block
+                    else:
+                        if member_crc != block.data_crc or offset != st.st_size:
+                            volume_ok = False
+                            break
+                        member_index += 1
+                        offset = 0
+                        member_crc = 0
+                        template = None
+                elif block.header_type == HEAD_END:
+                    next_volume = bool(block.end_flags & EHFL_NEXTVOLUME)
+        except Rar5Error:
+            volume_ok = False
+
+        if not volume_ok:
+            member_index, offset, member_crc, template = state
+            break
+        if not next_volume:
+            return None  # Complete archive: nothing was interrupted
+        kept.append(volume)
+
+    if not kept or member_index >= len(members):
+        return None
+
+    return {
+        "kept": kept,
+        "discard": volumes[len(kept):],
+        "next_volume": len(kept) + 1,
+        "width": width,
+        "member_index": member_index,
+        "offset": offset,
+        "member_crc": member_crc,
+        "template": template,
+        "saved_bytes": sum(os.path.getsize(v) for v in kept),
+    }
+
+
+def new_plan(members: list, volume_size: int) -> dict:
+    """Plan for writing a whole archive from volume 1 (same shape as `plan_resume`'s result)."""
+    total = sum(os.path.getsize(p) for p, _ in members)
+    # Same idea as rar: zero-pad part numbers to the expected volume count (part1 / part01 / ...)
+    expected_volumes = max(1, -(-total // (volume_size - 64 * 1024)))
+    return {
+        "kept": [],
+        "discard": [],
+        "next_volume": 1,
+        "width": len(str(expected_volumes)),
+        "member_index": 0,
+        "offset": 0,
+        "member_crc": 0,
+        "template": None,
+        "saved_bytes": 0,
+    }
+
+
+def _wrap_header(body: bytes) -> bytes:
+    sized = encode_vint(len(body)) + body
+    return struct.pack("<I", zlib.crc32(sized)) + sized
+
+
+def build_main_header(volume_number: int) -> bytes:
+    """Main archive header for volume `volume_number` (0-based; rar omits the number on the first volume)."""
+    body = encode_vint(HEAD_MAIN) + encode_vint(0)
+    if volume_number:
+        body += encode_vint(MHFL_VOLUME | MHFL_VOLNUMBER) + encode_vint(volume_number)
+    else:
+        body += encode_vint(MHFL_VOLUME)
+    return _wrap_header(body)
+
+
+def build_end_header(more_volumes: bool) -> bytes:
+    body = encode_vint(HEAD_END) + encode_vint(0) + encode_vint(EHFL_NEXTVOLUME if more_volumes else 0)
+    return _wrap_header(body)
+
+
+def file_fields_from_source(source_path: str, name: str) -> dict:
+    st = os.stat(source_path)
+    return {
+        "file_flags": FHFL_UTIME | FHFL_CRC32,
+        "unpacked_size": st.st_size,
+        "attributes": st.st_mode,
+        "mtime": int(st.st_mtime) & 0xFFFFFFFF,
+        "comp_info": 0,
+        "host_os": HOST_UNIX,
+        "name": name,
+        "extra": b"",
+    }
+
+
+def file_fields_from_block(block: Block) -> dict:
+    return {
+        "file_flags": block.file_flags | FHFL_CRC32,
+        "unpacked_size": block.unpacked_size,
+        "attributes": block.attributes,
+        "mtime": block.mtime,
+        "comp_info": block.comp_info,
+        "host_os": block.host_os,
+        "name": block.name,
+        "extra": block.extra,
+    }
+
+
+def build_file_header(fields: dict, data_size: int, data_crc: int, split_before: bool, split_after: bool) -> bytes:
+    flags = HFL_DATA
+    if fields["extra"]:
+        flags |= HFL_EXTRA
+    if split_before:
+        flags |= HFL_SPLIT_BEFORE
+    if split_after:
+        flags |= HFL_SPLIT_AFTER
+
+    file_flags = fields["file_flags"]
+    if fields["mtime"] is None:
+        file_flags &= ~FHFL_UTIME
+    name = fields["name"].encode("utf-8")
+
+    body = encode_vint(HEAD_FILE) + encode_vint(flags)
+    if fields["extra"]:
+        body += encode_vint(len(fields["extra"]))
+    body += encode_vint(data_size)
+    body += encode_vint(file_flags) + encode_vint(fields["unpacked_size"]) + encode_vint(fields["attributes"])
+    if file_flags & FHFL_UTIME:
+        body += struct.pack("<I", fields["mtime"])
+    body += struct.pack("<I", data_crc & 0xFFFFFFFF)
+    body += encode_vint(fields["comp_info"]) + encode_vint(fields["host_os"])
+    body += encode_vint(len(name)) + name + fields["extra"]
+    return _wrap_header(body)
+
+
+def write_continuation(video_path: str, members: list, plan: dict, volume_size: int,
+                       should_stop=None, on_progress=None, open_volume=None, close_volume=None,
+                       volume_dir: str | None = None) -> bool:
+    """Write the volumes after `plan["kept"]` straight from the source files.
+
+    Returns True when the archive was completed, False if `should_stop()` interrupted it
+    (the partial volume is left behind for the next resume to discard).
+    `on_progress(volume_number, bytes_written, bytes_total)` is called per block written.
+    `open_volume(path)` / `close_volume(f)` let callers customise how volume files are
+    opened and finalised (e.g. fsync); they default to plain `open(path, "wb")` / close.
+    Volumes are written next to the video unless `volume_dir` is given.
+    """
+    open_volume = open_volume or (lambda p: open(p, "wb"))
+    close_volume = close_volume or (lambda f: f.close())
+
+    member_index = plan["member_index"]
+    offset = plan["offset"]
+    member_crc = plan["member_crc"]
+    template = plan["template"]
+    number = plan["next_volume"]
+    end_len = len(build_end_header(True))
+    total = sum(os.path.getsize(p) for p, _ in members[member_index:]) - offset
+    written = 0
+    archive_base = os.path.join(volume_dir or os.path.dirname(video_path), os.path.basename(video_path))
+
+    while member_index < len(members):
+        path = volume_path(archive_base, number, plan["width"])
+        out = open_volume(path)
+        try:
+            out.write(SIGNATURE)
+            main_header = build_main_header(number - 1)
+            out.write(main_header)
+            used = len(SIGNATURE) + len(main_header)
+
+            while member_index < len(members):
+                source_path, name = members[member_index]
+                if offset > 0 and template is not None:
+                    fields = file_fields_from_block(template)
+                else:
+                    fields = file_fields_from_source(source_path, name)
+                remaining = fields["unpacked_size"] - offset
+                header_len = len(build_file_header(fields, remaining, 0, offset > 0, True))
+                capacity = volume_size - used - end_len - header_len
+                if capacity <= 0:
+                    if used > len(SIGNATURE) + len(main_header):
+                        break  # Volume full: continue in the next one
+                    raise Rar5Error("Volume size too small for headers")
+
+                chunk = min(remaining, capacity)
+                split_after = chunk < remaining
+                header_pos = out.tell()
+                # Reserve the header, stream the data, then patch in the CRC (length is fixed by data size)
+                placeholder = build_file_header(fields, chunk, 0, offset > 0, split_after)
+                out.write(placeholder)
+
+                part_crc = 0
+                with open(source_path, "rb") as src:
+                    if hasattr(os, "posix_fadvise"):
+                        os.posix_fadvise(src.fileno(), offset, chunk, os.POSIX_FADV_SEQUENTIAL)
+                    src.seek(offset)
+                    left = chunk
+                    while left > 0:
+                        if should_stop and should_stop():
+                            return False
+                        block = src.read(min(IO_BLOCK_SIZE, left))
+                        if not block:
+                            raise Rar5Error(f"{os.path.basename(source_path)}: source shrank during split")
+                        out.write(block)
+                        part_crc = zlib.crc32(block, part_crc)
+                        member_crc = zlib.crc32(block, member_crc)
+                        left -= len(block)
+                        written += len(block)
+                        if on_progress:
+                            on_progress(number, written, total)
+
+                header = build_file_header(fields, chunk, part_crc if split_after else member_crc,
+                                           offset > 0, split_after)
+                data_end = out.tell()
+                out.seek(header_pos)
+                out.write(header)
+                out.seek(data_end)
+                used += len(header) + chunk
+
+                if split_after:
+                    offset += chunk
+                    break
+                member_index += 1
+                offset = 0
+                member_crc = 0
+                template = None
+
+            out.write(build_end_header(member_index < len(members)))
+        finally:
+            close_volume(out)
+        number += 1
+
+    return True
@@ -0,0 +1,48 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rar5  # noqa: E402
+
+
+@pytest.fixture
+def make_file(tmp_path):
+    """Create `tmp_path/name` with `size` deterministic pseudo-random bytes."""
+    def make(name: str, size: int, seed: int = 1) -> str:
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = bytearray()
+        block = seed.to_bytes(4, "little")
+        while len(data) < size:
+            block = rar5.zlib.crc32(block).to_bytes(4, "little") * 1024
+            data += block
+        path.write_bytes(bytes(data[:size]))
+        return str(path)
+    return make
+
+
+def members_for(video: str, *extra: str) -> list:
+    """Archive members the way split_file passes them: video first, then subtitles."""
+    return [(p, os.path.basename(p)) for p in (video,) + extra]
+
+
+def write_archive(video: str, members: list, volume_size: int) -> list:
+    """Write a whole archive natively and return its volumes."""
+    rar5.write_continuation(video, members, rar5.new_plan(members, volume_size), volume_size)
+    return rar5.find_volumes(video)
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """The backend module pointed at empty data/config directories under tmp_path."""
+    import main
+    data_dir, config_dir = tmp_path / "data", tmp_path / "config"
+    data_dir.mkdir()
+    config_dir.mkdir()
+    monkeypatch.setattr(main, "DATA_DIR", str(data_dir))
+    monkeypatch.setattr(main, "CONFIG_DIR", str(config_dir))
+    monkeypatch.setattr(main, "SETTINGS_FILE", str(config_dir / "settings.json"))
+    return main
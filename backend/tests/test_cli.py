@@ -0,0 +1,15 @@
+import os
+import sys
+
+
+def test_file_status_of_vanished_file(app, monkeypatch):
+    monkeypatch.setattr(sys, "stdout", sys.stdout)  # cli redirects stdout on import
+    import cli
+
+    path = os.path.join(app.DATA_DIR, "A", "m.mkv")
+    os.makedirs(os.path.dirname(path))
+    with open(path, "wb") as f:
+        f.write(b"video")
+    assert cli.file_status("A/m.mkv", False) == "NONE"
+    os.remove(path)  # Deleted or renamed while the batch ran
+    assert cli.file_status("A/m.mkv", False) == "MISSING"
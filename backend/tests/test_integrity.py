@@ -0,0 +1,51 @@
+import os
+
+import integrity
+from conftest import members_for, write_archive
+
+
+def write_sidecar_for(video: str, members: list) -> str:
+    return integrity.write_sidecar(video, {name: integrity.hash_file(path) for path, name in members})
+
+
+def test_verify_ok_across_volumes(make_file):
+    video = make_file("Movie.mkv", 700_000)
+    sub = make_file("Movie.en.srt", 5_000, seed=2)
+    members = members_for(video, sub)
+    volumes = write_archive(video, members, 128 * 1024)
+    write_sidecar_for(video, members)
+
+    result = integrity.verify_archive(video)
+    assert len(volumes) > 4
+    assert result["status"] == "OK"
+    assert result["bytes_read"] == 705_000
+
+
+def test_verify_zero_byte_member(make_file):
+    # Regression: an empty subtitle used to crash the chunk scheduler (IndexError -> ERROR)
+    video = make_file("Movie.mkv", 500_000)
+    empty = make_file("Movie.en.srt", 0)
+    members = members_for(video, empty)
+    write_archive(video, members, 128 * 1024)
+    write_sidecar_for(video, members)
+
+    result = integrity.verify_archive(video)
+    assert result["status"] == "OK"
+    assert result["members"]["Movie.en.srt"] == {"ok": True, "bad_volumes": []}
+
+
+def test_verify_points_at_damaged_volume(make_file):
+    video = make_file("Movie.mkv", 700_000)
+    members = members_for(video)
+    volumes = write_archive(video, members, 128 * 1024)
+    write_sidecar_for(video, members)
+
+    with open(volumes[2], "r+b") as f:
+        f.seek(os.path.getsize(volumes[2]) // 2)
+        byte = f.read(1)
+        f.seek(-1, os.SEEK_CUR)
+        f.write(bytes([byte[0] ^ 0xFF]))
+
+    result = integrity.verify_archive(video)
+    assert result["status"] == "FAILED"
+    assert os.path.basename(volumes[2]) in result["members"]["Movie.mkv"]["bad_volumes"]
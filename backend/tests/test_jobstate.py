@@ -0,0 +1,102 @@
+import threading
+import time
+
+import pytest
+
+import jobstate
+
+STALE_AFTER = 0.2
+
+
+@pytest.fixture
+def store(tmp_path):
+    return jobstate.JobStore(str(tmp_path / "jobs.db"), stale_after=STALE_AFTER)
+
+
+def test_claim_is_exclusive_until_stale(store):
+    assert store.try_claim("host:1", "split", {"files_total": 2})
+    assert not store.try_claim("host:2", "verify", {})
+    assert store.snapshot() == {"files_total": 2, "is_running": True, "kind": "split"}
+
+    time.sleep(STALE_AFTER + 0.05)  # Executor stopped heartbeating (crash, restart)
+    assert not store.snapshot()["is_running"]
+    assert store.try_claim("host:2", "verify", {})
+    assert store.publish("host:1", {"files_processed": 1}) == {}  # Lost the slot: nothing relayed
+    assert store.snapshot()["kind"] == "verify"
+
+
+def test_release_frees_the_slot(store):
+    assert store.try_claim("host:1", "split", {})
+    store.release("host:1", {"files_processed": 2})
+    assert store.snapshot() == {"files_processed": 2, "is_running": False, "kind": "split"}
+    assert store.try_claim("host:2", "split", {})
+
+
+def test_requests_reach_the_owner(store):
+    assert not store.request_stop()  # Nothing running
+    assert not store.set_control("paused", True)
+    assert store.try_claim("host:1", "split", {})
+    assert store.publish("host:1", {}) == {"stop_requested": False, "paused": False, "stop_after_current": False}
+
+    assert store.set_control("paused", True)
+    assert store.set_control("stop_after_current", True)
+    assert store.request_stop()
+    assert store.publish("host:1", {}) == {"stop_requested": True, "paused": True, "stop_after_current": True}
+    with pytest.raises(ValueError):
+        store.set_control("is_running", False)
+
+
+def test_requests_for_a_stale_job_are_refused(store):
+    assert store.try_claim("host:1", "split", {})
+    time.sleep(STALE_AFTER + 0.05)
+    assert not store.request_stop()
+    assert not store.set_control("paused", True)
+
+
+def test_monitor_relays_controls_then_stop(store, monkeypatch):
+    monkeypatch.setattr(jobstate, "PUBLISH_INTERVAL", 0.01)
+    assert store.try_claim("host:1", "split", {})
+    controls = []
+    paused, stopped = threading.Event(), threading.Event()
+
+    def on_control(flags):
+        controls.append(flags)
+        if flags["paused"]:
+            paused.set()
+
+    monitor = jobstate.JobMonitor(store, "host:1", lambda: {"files_processed": 1}, stopped.set, on_control).start()
+    try:
+        assert store.set_control("paused", True)
+        assert paused.wait(2)
+        assert controls[-1] == {"paused": True, "stop_after_current": False}
+        assert store.snapshot()["files_processed"] == 1  # Status published with the heartbeat
+
+        assert store.request_stop()
+        assert stopped.wait(2)
+    finally:
+        monitor.stop()
+
+
+def test_lease_has_one_owner_until_stale(tmp_path, monkeypatch):
+    store = jobstate.JobStore(str(tmp_path / "jobs.db"))
+    assert store.try_lease("refresher", "host:1", ttl=60)
+    assert not store.try_lease("refresher", "host:2", ttl=60)
+    assert store.try_lease("refresher", "host:1", ttl=60)  # Renewal
+    assert store.try_lease("other", "host:2", ttl=60)  # Leases are independent
+
+    now = jobstate.time.time()
+    monkeypatch.setattr(jobstate.time, "time", lambda: now + 61)
+    assert store.try_lease("refresher", "host:2", ttl=60)  # Owner stopped renewing
+    assert not store.try_lease("refresher", "host:1", ttl=60)
+
+
+def test_attempts_are_counted_across_workers(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    worker_a, worker_b = jobstate.JobStore(path), jobstate.JobStore(path)
+    assert worker_a.record_attempt("LOGIN", "10.0.0.1", 3, window=60) == (True, 1)
+    assert worker_b.record_attempt("LOGIN", "10.0.0.1", 3, window=60) == (True, 2)
+    assert worker_a.record_attempt("LOGIN", "10.0.0.1", 3, window=60) == (True, 3)
+    assert worker_b.record_attempt("LOGIN", "10.0.0.1", 3, window=60) == (False, 3)
+    assert worker_b.record_attempt("LOGIN", "10.0.0.2", 3, window=60) == (True, 1)  # Per client
+    assert worker_b.record_attempt("SETUP", "10.0.0.1", 3, window=60) == (True, 1)  # Per scope
+    assert worker_a.record_attempt("LOGIN", "10.0.0.1", 3, window=0) == (True, 1)  # Window elapsed
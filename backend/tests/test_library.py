@@ -0,0 +1,74 @@
+import os
+
+import library
+
+
+def classifier_factory(calls: list):
+    def make_classifier():
+        calls.append(1)
+        return lambda full_path, names=None: {
+            "name": os.path.basename(full_path), "original_size": 1, "total_size": 1,
+            "status": "NONE", "rar_parts": 0, "subs_count": 0,
+        }
+    return make_classifier
+
+
+def touch(root, rel):
+    path = os.path.join(root, rel)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, "wb").close()
+
+
+def test_refresh_reads_settings_once_per_pass(tmp_path):
+    data = tmp_path / "data"
+    for i in range(20):
+        touch(data, f"Show {i}/Episode {i}.mkv")
+    calls = []
+    index = library.LibraryIndex(str(tmp_path / "library.db"), str(data), classifier_factory(calls))
+    stats = index.refresh()
+    assert stats["dirs_scanned"] == 21  # Root plus 20 show folders
+    assert len(calls) == 1
+    assert index.count() == 20
+
+
+def test_incremental_refresh_and_search(tmp_path):
+    data = tmp_path / "data"
+    touch(data, "Movies/The Matrix (1999).mkv")
+    touch(data, "Movies/Heat.mp4")
+    index = library.LibraryIndex(str(tmp_path / "library.db"), str(data), classifier_factory([]))
+    index.refresh()
+    assert [r["path"] for r in index.search("matrix")] == ["Movies/The Matrix (1999).mkv"]
+    assert [r["path"] for r in index.search("ea")] == ["Movies/Heat.mp4"]  # Short term: LIKE fallback
+
+    assert index.refresh()["dirs_scanned"] == 0
+    os.remove(data / "Movies" / "Heat.mp4")
+    assert index.refresh()["dirs_scanned"] == 1
+    assert index.count() == 1
+
+
+def test_other_worker_sees_ready_and_invalidation(tmp_path):
+    data = tmp_path / "data"
+    touch(data, "Movies/Heat.mp4")
+    db = str(tmp_path / "library.db")
+    owner = library.LibraryIndex(db, str(data), classifier_factory([]))
+    standby = library.LibraryIndex(db, str(data), classifier_factory([]))
+    assert owner.needs_refresh() and not standby.ready
+
+    owner.refresh()
+    assert standby.ready and not owner.needs_refresh()
+    standby.invalidate()  # e.g. a settings change handled by another worker
+    assert owner.needs_refresh()
+
+
+def test_count_follows_writes_of_other_workers(tmp_path):
+    data = tmp_path / "data"
+    touch(data, "Movies/Heat.mp4")
+    db = str(tmp_path / "library.db")
+    owner = library.LibraryIndex(db, str(data), classifier_factory([]))
+    standby = library.LibraryIndex(db, str(data), classifier_factory([]))
+    assert standby.count() == 0
+    owner.refresh()
+    assert standby.count() == 1
+    touch(data, "Movies/Ronin.mkv")
+    owner.update_file(str(data / "Movies" / "Ronin.mkv"))
+    assert standby.count() == 2 and owner.count() == 2
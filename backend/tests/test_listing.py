@@ -0,0 +1,21 @@
+import os
+
+from fastapi.testclient import TestClient
+
+
+def test_etag_changes_when_target_is_mounted(app, tmp_path, monkeypatch):
+    app.app.dependency_overrides[app.get_current_active_user] = lambda: app.User(email="a@b", is_admin=True)
+    os.makedirs(os.path.join(app.DATA_DIR, "Movies"))
+    open(os.path.join(app.DATA_DIR, "Movies", "m.mkv"), "wb").close()
+    monkeypatch.setattr(app, "TARGET_DIR", str(tmp_path / "target"))
+    client = TestClient(app.app)
+    try:
+        first = client.get("/api/files", params={"path": "Movies"})
+        assert first.json()["target_available"] is False
+
+        (tmp_path / "target").mkdir()  # Mounted, no mirror folder yet
+        second = client.get("/api/files", params={"path": "Movies"}, headers={"If-None-Match": first.headers["etag"]})
+        assert second.status_code == 200
+        assert second.json()["target_available"] is True
+    finally:
+        app.app.dependency_overrides.clear()
@@ -0,0 +1,269 @@
+import os
+import zlib
+
+import pytest
+
+import rar5
+from conftest import members_for, write_archive
+
+VOLUME_SIZE = 128 * 1024
+
+
+def read_volumes(volumes: list) -> list:
+    return [open(v, "rb").read() for v in volumes]
+
+
+def extract(volumes: list) -> dict:
+    """Reassemble every member from the stored payload ranges of the volumes."""
+    out = {}
+    for volume in volumes:
+        with open(volume, "rb") as f:
+            for name, offset, size in rar5.scan_volume(volume):
+                f.seek(offset)
+                out[name] = out.get(name, b"") + f.read(size)
+    return out
+
+
+def interrupt(volumes: list, complete: int, partial_bytes: int):
+    """Leave the state rar leaves when killed: `complete` whole volumes, then a truncated one."""
+    for v in volumes[complete + 1:]:
+        os.remove(v)
+    with open(volumes[complete], "r+b") as f:
+        f.truncate(partial_bytes)
+
+
+# Header and CRC parsing
+
+@pytest.mark.parametrize("value", [0, 1, 127, 128, 16383, 16384, 2**32, 40 * 1024**3])
+def test_vint_roundtrip(value):
+    encoded = rar5.encode_vint(value)
+    assert rar5.read_vint(encoded + b"\xff", 0) == (value, len(encoded))
+
+
+def test_truncated_vint():
+    with pytest.raises(rar5.Rar5Error):
+        rar5.read_vint(b"\x80\x80", 0)
+
+
+def test_headers_and_crcs(make_file):
+    video = make_file("Movie.mkv", 300_000)
+    sub = make_file("Movie.en.srt", 4_000, seed=2)
+    volumes = write_archive(video, members_for(video, sub), VOLUME_SIZE)
+    assert [os.path.basename(v) for v in volumes] == ["Movie.mkv.part1.rar", "Movie.mkv.part2.rar", "Movie.mkv.part3.rar"]
+
+    source = {"Movie.mkv": open(video, "rb").read(), "Movie.en.srt": open(sub, "rb").read()}
+    member_crc = {}
+    for number, volume in enumerate(volumes):
+        assert os.path.getsize(volume) <= VOLUME_SIZE
+        blocks = list(rar5.iter_blocks(volume))
+        assert all(b.header_ok for b in blocks)
+        assert blocks[0].header_type == rar5.HEAD_MAIN
+        assert blocks[0].archive_flags & rar5.MHFL_VOLUME
+        assert blocks[0].volume_number == number
+        assert blocks[-1].header_type == rar5.HEAD_END
+        assert bool(blocks[-1].end_flags & rar5.EHFL_NEXTVOLUME) == (number < len(volumes) - 1)
+
+        with open(volume, "rb") as f:
+            for block in blocks[1:-1]:
+                assert block.header_type == rar5.HEAD_FILE and rar5.is_stored(block)
+                assert block.unpacked_size == len(source[block.name])
+                f.seek(block.data_offset)
+                data = f.read(block.data_size)
+                member_crc[block.name] = zlib.crc32(data, member_crc.get(block.name, 0))
+                # Split parts carry their own CRC, the last part the CRC of the whole member
+                expected = zlib.crc32(data) if block.flags & rar5.HFL_SPLIT_AFTER else member_crc[block.name]
+                assert block.data_crc == expected
+    assert member_crc == {name: zlib.crc32(data) for name, data in source.items()}
+    assert extract(volumes) == source
+
+
+def test_corrupt_header_is_detected(make_file):
+    video = make_file("Movie.mkv", 50_000)
+    (volume,) = write_archive(video, members_for(video), VOLUME_SIZE)
+    file_block = list(rar5.iter_blocks(volume))[1]
+    data = bytearray(open(volume, "rb").read())
+    data[file_block.data_offset - 1] ^= 0xFF  # Last byte of the file header (the member name)
+    open(volume, "wb").write(bytes(data))
+    assert not list(rar5.iter_blocks(volume))[1].header_ok
+
+
+def test_rejects_non_rar5(tmp_path):
+    rar4 = tmp_path / "old.rar"
+    rar4.write_bytes(rar5.RAR4_SIGNATURE + b"\x00" * 32)
+    with pytest.raises(rar5.Rar5Error, match="RAR4"):
+        list(rar5.iter_blocks(str(rar4)))
+    junk = tmp_path / "junk.rar"
+    junk.write_bytes(b"not an archive")
+    with pytest.raises(rar5.Rar5Error):
+        list(rar5.iter_blocks(str(junk)))
+
+
+# Multi-volume boundaries
+
+def first_volume_capacity(video: str, size: int) -> int:
+    """Payload bytes that fit in volume 1 when a member of `size` bytes starts there."""
+    fields = rar5.file_fields_from_source(video, os.path.basename(video))
+    fields["unpacked_size"] = size
+    header = rar5.build_file_header(fields, size, 0, False, True)
+    return (VOLUME_SIZE - len(rar5.SIGNATURE) - len(rar5.build_main_header(0))
+            - len(rar5.build_end_header(True)) - len(header))
+
+
+@pytest.mark.parametrize("delta", [-2, -1, 0, 1, 2])
+def test_member_ending_at_volume_boundary(make_file, delta):
+    probe = make_file("probe.mkv", 1)
+    capacity = first_volume_capacity(probe, VOLUME_SIZE)
+    video = make_file("Movie.mkv", capacity + delta)
+    sub = make_file("Movie.en.srt", 3_000, seed=2)
+    volumes = write_archive(video, members_for(video, sub), VOLUME_SIZE)
+
+    assert all(os.path.getsize(v) <= VOLUME_SIZE for v in volumes)
+    assert extract(volumes) == {"Movie.mkv": open(video, "rb").read(), "Movie.en.srt": open(sub, "rb").read()}
+    first = [b for b in rar5.iter_blocks(volumes[0]) if b.header_type == rar5.HEAD_FILE]
+    assert bool(first[0].flags & rar5.HFL_SPLIT_AFTER) == (delta > 0)
+
+
+# Resume
+
+@pytest.mark.parametrize("complete,partial_bytes", [(0, 70_000), (1, 0), (1, 40), (1, 90_000), (2, 1_000)])
+def test_resume_matches_full_run(make_file, complete, partial_bytes):
+    video = make_file("Movie.mkv", 300_000)
+    sub = make_file("Movie.en.srt", 6_000, seed=2)
+    members = members_for(video, sub)
+    volumes = write_archive(video, members, VOLUME_SIZE)
+    reference = read_volumes(volumes)
+    interrupt(volumes, complete, partial_bytes)
+
+    plan = rar5.plan_resume(video, members)
+    if complete == 0:
+        assert plan is None  # Interrupted in the first volume: nothing to keep
+        return
+    assert plan["kept"] == volumes[:complete]
+    assert plan["discard"] == volumes[complete:complete + 1]
+    assert plan["next_volume"] == complete + 1
+    assert plan["saved_bytes"] == sum(len(r) for r in reference[:complete])
+    for v in plan["discard"]:
+        os.remove(v)
+    assert rar5.write_continuation(video, members, plan, VOLUME_SIZE)
+    assert read_volumes(rar5.find_volumes(video)) == reference
+
+
+def test_resume_across_member_boundary(make_file):
+    # The subtitle starts in volume 2: the resume continues a member that was split mid-way
+    video = make_file("Movie.mkv", 200_000)
+    sub = make_file("Movie.en.srt", 150_000, seed=2)
+    members = members_for(video, sub)
+    volumes = write_archive(video, members, VOLUME_SIZE)
+    reference = read_volumes(volumes)
+    interrupt(volumes, 2, 500)
+
+    plan = rar5.plan_resume(video, members)
+    assert (plan["member_index"], plan["offset"] > 0) == (1, True)
+    os.remove(volumes[2])
+    assert rar5.write_continuation(video, members, plan, VOLUME_SIZE)
+    assert read_volumes(rar5.find_volumes(video)) == reference
+
+
+def test_resume_rejects_changed_source(make_file):
+    video = make_file("Movie.mkv", 300_000)
+    members = members_for(video)
+    interrupt(write_archive(video, members, VOLUME_SIZE), 1, 100)
+    assert rar5.plan_resume(video, members) is not None
+
+    st = os.stat(video)
+    os.utime(video, (st.st_atime, st.st_mtime + 60))
+    assert rar5.plan_resume(video, members) is None
+
+
+
+def time_record(mtime: float, unix: bool) -> bytes:
+    """File time extra record as rar 5+ writes it (instead of the FHFL_UTIME header field)."""
+    if unix:
+        data = rar5.encode_vint(rar5.HTIME_UNIXTIME | rar5.HTIME_MTIME) + rar5.struct.pack("<I", int(mtime))
+    else:
+        ticks = int(mtime * 10_000_000) + rar5.FILETIME_UNIX_EPOCH
+        data = rar5.encode_vint(rar5.HTIME_MTIME) + rar5.struct.pack("<Q", ticks)
+    record = rar5.encode_vint(rar5.FHEXTRA_HTIME) + data
+    return rar5.encode_vint(len(record)) + record
+
+
+@pytest.fixture
+def rar_style_headers(monkeypatch):
+    """Write file headers the way rar does: mtime in the file time extra record, or nowhere."""
+    def use(record):
+        from_source = rar5.file_fields_from_source
+
+        def fields(source_path, name):
+            fields = from_source(source_path, name)
+            fields["mtime"] = None
+            fields["extra"] = record(os.stat(source_path).st_mtime)
+            return fields
+        monkeypatch.setattr(rar5, "file_fields_from_source", fields)
+    return use
+
+
+@pytest.mark.parametrize("unix", [True, False])
+def test_resume_checks_extra_record_mtime(make_file, rar_style_headers, unix):
+    video = make_file("Movie.mkv", 300_000)
+    members = members_for(video)
+    rar_style_headers(lambda mtime: time_record(mtime, unix))
+    interrupt(write_archive(video, members, VOLUME_SIZE), 1, 100)
+    block = [b for b in rar5.iter_blocks(rar5.find_volumes(video)[0]) if b.header_type == rar5.HEAD_FILE][0]
+    assert block.mtime is None and rar5.file_mtime(block) == int(os.stat(video).st_mtime)
+    assert rar5.plan_resume(video, members) is not None
+
+    st = os.stat(video)
+    os.utime(video, (st.st_atime, st.st_mtime + 60))  # Edited in place, same size
+    assert rar5.plan_resume(video, members) is None
+
+
+def test_resume_refused_without_mtime(make_file, rar_style_headers):
+    video = make_file("Movie.mkv", 300_000)
+    members = members_for(video)
+    rar_style_headers(lambda mtime: b"")
+    interrupt(write_archive(video, members, VOLUME_SIZE), 1, 100)
+    assert rar5.plan_resume(video, members) is None
+
+def test_resume_stops_at_damaged_volume(make_file):
+    video = make_file("Movie.mkv", 500_000)
+    members = members_for(video)
+    volumes = write_archive(video, members, VOLUME_SIZE)
+    interrupt(volumes, 3, 100)
+    payload = [b for b in rar5.iter_blocks(volumes[1]) if b.header_type == rar5.HEAD_FILE][0]
+    with open(volumes[1], "r+b") as f:
+        f.seek(payload.data_offset + 10)
+        f.write(b"\x00\x01\x02")
+
+    plan = rar5.plan_resume(video, members)
+    assert plan["kept"] == volumes[:1]
+    assert plan["discard"] == volumes[1:4]
+
+
+def test_complete_archive_is_not_crc_checked(make_file, monkeypatch):
+    video = make_file("Movie.mkv", 300_000)
+    members = members_for(video)
+    write_archive(video, members, VOLUME_SIZE)
+
+    def no_payload_reads(*args, **kwargs):
+        raise AssertionError("complete archive payload was read")
+
+    monkeypatch.setattr(rar5, "_crc32_range", no_payload_reads)
+    assert rar5.plan_resume(video, members) is None
+
+
+def test_resume_into_volume_dir(make_file, tmp_path):
+    video = make_file("Movie.mkv", 300_000)
+    members = members_for(video)
+    target = tmp_path / "target"
+    target.mkdir()
+    rar5.write_continuation(video, members, rar5.new_plan(members, VOLUME_SIZE), VOLUME_SIZE, volume_dir=str(target))
+    volumes = rar5.find_volumes(video, str(target))
+    reference = read_volumes(volumes)
+    interrupt(volumes, 1, 5_000)
+
+    plan = rar5.plan_resume(video, members, volume_dir=str(target))
+    for v in plan["discard"]:
+        os.remove(v)
+    assert rar5.write_continuation(video, members, plan, VOLUME_SIZE, volume_dir=str(target))
+    assert read_volumes(rar5.find_volumes(video, str(target))) == reference
+    assert not rar5.find_volumes(video)
@@ -0,0 +1,108 @@
+import os
+import threading
+
+
+def write(app, rel: str, data: bytes = b"video" * 1000) -> str:
+    path = os.path.join(app.DATA_DIR, rel)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def hardlink(app, src_rel: str, dst_rel: str):
+    dst = os.path.join(app.DATA_DIR, dst_rel)
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    os.link(os.path.join(app.DATA_DIR, src_rel), dst)
+
+
+def test_hardlinks_grouped_only_with_same_name(app):
+    write(app, "A/m.mkv")
+    hardlink(app, "A/m.mkv", "B/m.mkv")
+    hardlink(app, "A/m.mkv", "C/renamed.mkv")
+    groups = app.group_split_files(["A/m.mkv", "B/m.mkv", "C/renamed.mkv"], True, False)
+    assert groups == [["A/m.mkv", "B/m.mkv"], ["C/renamed.mkv"]]
+
+
+def test_hardlinks_with_renamed_subtitle_split_apart(app):
+    write(app, "A/m.mkv")
+    write(app, "A/m.en.srt", b"subs")
+    hardlink(app, "A/m.mkv", "B/m.mkv")
+    hardlink(app, "A/m.en.srt", "B/m.eng.srt")
+    assert app.group_split_files(["A/m.mkv", "B/m.mkv"], True, False) == [["A/m.mkv"], ["B/m.mkv"]]
+    assert app.group_split_files(["A/m.mkv", "B/m.mkv"], False, False) == [["A/m.mkv", "B/m.mkv"]]
+
+
+def test_duplicates_grouped_only_with_same_name(app):
+    for rel in ("A/m.mkv", "B/m.mkv", "C/other.mkv"):
+        write(app, rel)
+    write(app, "D/m.mkv", b"other" * 1000)
+    progress = []
+    groups = app.group_split_files(["A/m.mkv", "B/m.mkv", "C/other.mkv", "D/m.mkv"], True, True,
+                                   on_progress=progress.append)
+    assert groups == [["A/m.mkv", "B/m.mkv"], ["C/other.mkv"], ["D/m.mkv"]]
+    assert len(progress) == 3  # Only same-name, same-size candidates are hashed
+
+
+def test_duplicate_check_stops(app):
+    write(app, "A/m.mkv")
+    write(app, "B/m.mkv")
+    stop = threading.Event()
+    stop.set()
+    assert app.group_split_files(["A/m.mkv", "B/m.mkv"], True, True, stop_event=stop) == [["A/m.mkv"], ["B/m.mkv"]]
+
+
+def test_duplicate_check_survives_vanished_file(app):
+    for rel in ("A/m.mkv", "B/m.mkv", "C/m.mkv"):
+        write(app, rel)
+
+    def on_progress(message):
+        if message.endswith("(2/3)"):
+            os.remove(os.path.join(app.DATA_DIR, "B/m.mkv"))  # Deleted just before it is hashed
+
+    groups = app.group_split_files(["A/m.mkv", "B/m.mkv", "C/m.mkv"], True, True, on_progress=on_progress)
+    assert groups == [["A/m.mkv", "C/m.mkv"], ["B/m.mkv"]]
+
+def test_link_archive_requires_same_name(app):
+    src = write(app, "A/m.mkv")
+    write(app, "A/m.mkv.part1.rar", b"volume")
+    dst = write(app, "B/renamed.mkv")
+    assert not app.link_archive(src, dst)
+    assert not os.path.exists(os.path.join(app.DATA_DIR, "B", "renamed.mkv.part1.rar"))
+
+    same = write(app, "C/m.mkv")
+    assert app.link_archive(src, same)
+    assert os.path.samefile(os.path.join(app.DATA_DIR, "A/m.mkv.part1.rar"),
+                            os.path.join(app.DATA_DIR, "C/m.mkv.part1.rar"))
+
+
+def test_stop_after_current_still_links_copies(app, monkeypatch):
+    write(app, "A/m.mkv")
+    hardlink(app, "A/m.mkv", "B/m.mkv")
+    write(app, "C/n.mkv", b"other" * 1000)
+
+    def fake_split(rel, to_target=False):
+        write(app, rel + ".part1.rar", b"volume")
+        app.task_state.stop_after_current = True  # Requested while the first file is being split
+        return True
+
+    monkeypatch.setattr(app, "split_file", fake_split)
+    done = []
+    app.run_split_task(["A/m.mkv", "B/m.mkv", "C/n.mkv"], groups=[["A/m.mkv", "B/m.mkv"], ["C/n.mkv"]],
+                       publish=False, on_file_done=lambda rel, completed: done.append((rel, completed)))
+    assert done == [("A/m.mkv", True), ("B/m.mkv", True)]
+    assert app.task_state.files_processed == 2
+    assert os.path.samefile(os.path.join(app.DATA_DIR, "A/m.mkv.part1.rar"),
+                            os.path.join(app.DATA_DIR, "B/m.mkv.part1.rar"))
+
+
+def test_unwritable_target_fails_each_file(app, monkeypatch, tmp_path):
+    write(app, "A/m.mkv")
+    write(app, "B/n.mkv")
+    blocker = tmp_path / "target"
+    blocker.write_bytes(b"")  # A file where the target folder should be: makedirs fails
+    monkeypatch.setattr(app, "TARGET_DIR", str(blocker))
+    done = []
+    app.run_split_task(["A/m.mkv", "B/n.mkv"], to_target=True, publish=False,
+                       on_file_done=lambda rel, completed: done.append((rel, completed)))
+    assert done == [("A/m.mkv", False), ("B/n.mkv", False)]
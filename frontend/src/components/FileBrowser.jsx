@@ -1,10 +1,10 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
-import { Folder, File, ChevronLeft, Trash2, CheckCircle2, AlertTriangle, Loader2, RefreshCw, CheckSquare, XSquare } from 'lucide-react';
+import { Folder, File, ChevronLeft, Trash2, CheckCircle2, AlertTriangle, Loader2, RefreshCw, CheckSquare, XSquare, Search, X } from 'lucide-react';
 import ConfirmationModal from './ConfirmationModal';
 import { useAppAuth } from '../auth/AuthProviderWrapper';
 
-const FileBrowser = ({ selectedFiles, onSelect, isLocked, refreshTrigger, onManualRefresh }) => {
+const FileBrowser = ({ selectedFiles, onSelect, isLocked, refreshTrigger, onManualRefresh, onTargetAvailable }) => {
     const { user } = useAppAuth();
     const [currentPath, setCurrentPath] = useState('');
     const [files, setFiles] = useState([]);
@@ -16,6 +16,15 @@ const FileBrowser = ({ selectedFiles, onSelect, isLocked, refreshTrigger, onManu
     const [deleteMode, setDeleteMode] = useState('single'); // 'single' or 'all'
     const [fileToDelete, setFileToDelete] = useState(null);
 
+    // Per-path listing cache for conditional GETs: { [path]: { etag, data } }
+    const listingCache = useRef({});
+
+    // Library-wide search (answered from the backend index); non-empty query replaces the folder view
+    const [searchQuery, setSearchQuery] = useState('');
+    const [searchResults, setSearchResults] = useState([]);
+    const [searching, setSearching] = useState(false);
+    const isSearching = searchQuery.trim() !== '';
+
     const FAT32_LIMIT = 4095 * 1024 * 1024; // 4095 MB in bytes
 
     const getAuthHeaders = () => {
@@ -43,13 +52,28 @@ const FileBrowser = ({ selectedFiles, onSelect, isLocked, refreshTrigger, onManu
         setLoading(true);
         setExpandedFiles({}); // Reset expansion on navigation
         try {
-            const response = await axios.get(`/api/files?path=${encodeURIComponent(path)}`, getAuthHeaders());
+            // Send the cached validator so unchanged folders come back as 304 Not Modified
+            const cached = listingCache.current[path];
+            const config = getAuthHeaders();
+            config.headers = { ...(config.headers || {}) };
+            if (cached?.etag) config.headers['If-None-Match'] = cached.etag;
+            config.validateStatus = (code) => (code >= 200 && code < 300) || code === 304;
+
+            const response = await axios.get(`/api/files?path=${encodeURIComponent(path)}`, config);
+            let data = response.data;
+            if (response.status === 304 && cached) {
+                data = cached.data;
+            } else if (response.headers.etag) {
+                listingCache.current[path] = { etag: response.headers.etag, data };
+            }
+
             // Backend returns explicit 'folders' and 'files' lists. We merge them for the UI.
             const combined = [
-                ...response.data.folders.map(f => ({ ...f, is_dir: true })),
-                ...response.data.files.map(f => ({ ...f, is_dir: false, is_media: /\.(mkv|mp4)$/i.test(f.name) }))
+                ...data.folders.map(f => ({ ...f, is_dir: true })),
+                ...data.files.map(f => ({ ...f, is_dir: false, is_media: /\.(mkv|mp4)$/i.test(f.name) }))
             ];
             setFiles(combined);
+            if (onTargetAvailable) onTargetAvailable(!!data.target_available);
             // Don't overwrite current path if just refreshing, unless explicit navigation
             if (path !== undefined) setCurrentPath(path);
         } catch (error) {
@@ -66,6 +90,35 @@ const FileBrowser = ({ selectedFiles, onSelect, isLocked, refreshTrigger, onManu
         }
     }, [refreshTrigger, currentPath, user]);
 
+    const fetchSearch = async (query) => {
+        setSearching(true);
+        try {
+            const response = await axios.get(`/api/search?q=${encodeURIComponent(query)}&limit=200`, getAuthHeaders());
+            setSearchResults(response.data.results.map(r => ({
+                ...r,
+                original_size: r.size,
+                is_dir: false,
+                is_media: true,
+                folder: r.path.includes('/') ? r.path.slice(0, r.path.lastIndexOf('/')) : ''
+            })));
+        } catch (error) {
+            console.error('Error searching library:', error);
+        } finally {
+            setSearching(false);
+        }
+    };
+
+    useEffect(() => {
+        // Debounce typing; re-run on refreshTrigger so statuses follow a running split
+        if (!user || !isSearching) return;
+        const timer = setTimeout(() => fetchSearch(searchQuery.trim()), 250);
+        return () => clearTimeout(timer);
+    }, [searchQuery, refreshTrigger, user]);
+
+    // Search results carry their own path; folder entries are relative to the current folder
+    const fullPathOf = (file) => file.folder !== undefined ? file.path : (currentPath ? `${currentPath}/${file.name}` : file.name);
+    const visibleFiles = isSearching ? searchResults : files;
+
     const handleFolderClick = (name) => {
         const newPath = currentPath ? `${currentPath}/${name}` : name;
         setCurrentPath(newPath); // Updates state, triggering useEffect
@@ -82,7 +135,7 @@ const FileBrowser = ({ selectedFiles, onSelect, isLocked, refreshTrigger, onManu
             handleFolderClick(file.name);
         } else if (file.is_media) {
             // Toggle Logic
-            const fullPath = currentPath ? `${currentPath}/${file.name}` : file.name;
+            const fullPath = fullPathOf(file);
             const isSelected = selectedFiles.some(f => f.name === fullPath);
             const fileObj = { name: fullPath };
 
@@ -95,9 +148,9 @@ const FileBrowser = ({ selectedFiles, onSelect, isLocked, refreshTrigger, onManu
     };
 
     const handleSelectAll = () => {
-        const allMediaFiles = files
+        const allMediaFiles = visibleFiles
             .filter(f => !f.is_dir && f.is_media)
-            .map(f => ({ name: currentPath ? `${currentPath}/${f.name}` : f.name }));
+            .map(f => ({ name: fullPathOf(f) }));
 
         // Merge with existing selection to avoid duplicates
         const newSelection = [...selectedFiles];
@@ -128,7 +181,7 @@ const FileBrowser = ({ selectedFiles, onSelect, isLocked, refreshTrigger, onManu
     const handleDelete = async () => {
         try {
             if (deleteMode === 'single' && fileToDelete) {
-                const fullPath = currentPath ? `${currentPath}/${fileToDelete.name}` : fileToDelete.name;
+                const fullPath = fullPathOf(fileToDelete);
                 await axios.post('/api/delete_rars', {
                     path: fullPath,
                     mode: 'single'
@@ -144,6 +197,7 @@ const FileBrowser = ({ selectedFiles, onSelect, isLocked, refreshTrigger, onManu
             setIsModalOpen(false);
             setFileToDelete(null);
             fetchFiles(currentPath); // Refresh list
+            if (isSearching) fetchSearch(searchQuery.trim());
         } catch (error) {
             console.error('Error deleting files:', error);
             alert('Failed to delete files');
@@ -207,7 +261,23 @@ const FileBrowser = ({ selectedFiles, onSelect, isLocked, refreshTrigger, onManu
                 </div>
 
                 <div className="browser-actions">
-                    {files.some(f => !f.is_dir) && (
+                    <div className="search-box" style={{ display: 'flex', alignItems: 'center', gap: '0.4rem' }}>
+                        {searching ? <Loader2 size={16} className="animate-spin" /> : <Search size={16} />}
+                        <input
+                            type="text"
+                            className="search-input"
+                            placeholder="Search library..."
+                            value={searchQuery}
+                            onChange={(e) => setSearchQuery(e.target.value)}
+                            style={{ fontSize: '0.85rem', padding: '0.3rem 0.5rem', borderRadius: '4px', minWidth: '10rem' }}
+                        />
+                        {isSearching && (
+                            <button className="btn-icon" title="Clear search" onClick={() => setSearchQuery('')}>
+                                <X size={16} />
+                            </button>
+                        )}
+                    </div>
+                    {!isSearching && files.some(f => !f.is_dir) && (
                         <button
                             className="btn-icon btn-danger-icon"
                             title="Delete All RARs"
@@ -242,18 +312,18 @@ const FileBrowser = ({ selectedFiles, onSelect, isLocked, refreshTrigger, onManu
                     </button>
                 </div>
 
-                {loading ? (
+                {loading && !isSearching ? (
                     <div className="loading-state"><Loader2 className="animate-spin" /> Loading files...</div>
                 ) : (
                     <ul className="file-list">
-                        {files.map((file) => {
+                        {visibleFiles.map((file) => {
                             // Robust selection check
-                            const fullPath = currentPath ? `${currentPath}/${file.name}` : file.name;
+                            const fullPath = fullPathOf(file);
                             const isSelected = selectedFiles.some(f => f.name === fullPath);
 
                             return (
                                 <li
-                                    key={file.name}
+                                    key={fullPath}
                                     className={`file-item ${isSelected ? 'selected' : ''}`}
                                 >
                                     <div className="file-main">
@@ -318,21 +388,43 @@ const FileBrowser = ({ selectedFiles, onSelect, isLocked, refreshTrigger, onManu
                                                             PARTIAL {file.rar_parts > 0 && `(${file.rar_parts} ${file.rar_parts === 1 ? 'part' : 'parts'})`}
                                                         </span>
                                                     )}
+                                                    {/* Copy written directly to the target drive */}
+                                                    {file.target_status === 'SPLIT' && (
+                                                        <span className="badge badge-split-yes" style={{ fontSize: '0.75rem', padding: '2px 6px' }} title="Volumes on the target drive">
+                                                            ON TARGET ({file.target_parts} {file.target_parts === 1 ? 'part' : 'parts'})
+                                                        </span>
+                                                    )}
+                                                    {file.target_status === 'PARTIAL' && (
+                                                        <span className="badge badge-split-warning" style={{ fontSize: '0.75rem', padding: '2px 6px' }} title="Incomplete volumes on the target drive">
+                                                            TARGET PARTIAL ({file.target_parts} {file.target_parts === 1 ? 'part' : 'parts'})
+                                                        </span>
+                                                    )}
                                                 </div>
                                             )}
 
                                             <div
                                                 className="file-name-container"
-                                                onClick={() => file.is_dir ? handleFolderClick(file.name) : toggleExpand(file.name)}
+                                                onClick={() => file.is_dir ? handleFolderClick(file.name) : toggleExpand(fullPath)}
                                                 style={{ cursor: 'pointer' }}
                                             >
                                                 <span
-                                                    className={`file-name ${!file.is_dir && expandedFiles[file.name] ? 'expanded' : ''}`}
+                                                    className={`file-name ${!file.is_dir && expandedFiles[fullPath] ? 'expanded' : ''}`}
                                                     title={file.name}
                                                 >
                                                     {file.name}
                                                 </span>
                                             </div>
+                                            {/* Folder of a search result; click to open it */}
+                                            {file.folder !== undefined && (
+                                                <span
+                                                    className="current-path-text"
+                                                    onClick={() => { setSearchQuery(''); setCurrentPath(file.folder); }}
+                                                    style={{ fontSize: '0.75rem', cursor: 'pointer', opacity: 0.7 }}
+                                                    title="Open folder"
+                                                >
+                                                    /{file.folder}
+                                                </span>
+                                            )}
                                         </div>
                                     </div>
 
@@ -351,8 +443,8 @@ const FileBrowser = ({ selectedFiles, onSelect, isLocked, refreshTrigger, onManu
                                 </li>
                             );
                         })}
-                        {files.length === 0 && (
-                            <div className="empty-state">No files found</div>
+                        {visibleFiles.length === 0 && (
+                            <div className="empty-state">{isSearching ? 'No matching videos' : 'No files found'}</div>
                         )}
                     </ul>
                 )}
@@ -1,9 +1,9 @@
 import React, { useState, useEffect } from 'react';
 import axios from 'axios';
-import { Play, Square, Loader2, Info } from 'lucide-react';
+import { Play, Pause, Square, SkipForward, Loader2, Info, HardDrive } from 'lucide-react';
 import { useAppAuth } from '../auth/AuthProviderWrapper';
 
-const TaskControl = ({ selectedFiles, onTaskChange, onTaskComplete }) => {
+const TaskControl = ({ selectedFiles, onTaskChange, onTaskComplete, targetAvailable }) => {
     const { user } = useAppAuth();
     const [status, setStatus] = useState({ is_running: false, progress: 0, last_output: '' });
     const [lastStatusRunning, setLastStatusRunning] = useState(false);
@@ -38,13 +38,14 @@ const TaskControl = ({ selectedFiles, onTaskChange, onTaskComplete }) => {
         return () => clearInterval(interval);
     }, [status.is_running, user?.token]);
 
-    const handleStart = async () => {
+    const handleStart = async (toTarget = false) => {
         if (!selectedFiles || selectedFiles.length === 0) return;
         setLoading(true);
         setStopFeedback(null); // Clear previous stop feedback
         try {
             await axios.post('/api/split', {
-                files: selectedFiles.map(f => f.name)  // Extract path strings from array
+                files: selectedFiles.map(f => f.name),  // Extract path strings from array
+                to_target: toTarget
             }, getAuthHeaders());
             fetchStatus();
         } catch (error) {
@@ -68,14 +69,41 @@ const TaskControl = ({ selectedFiles, onTaskChange, onTaskComplete }) => {
         }
     };
 
+    const handlePause = async () => {
+        setLoading(true);
+        try {
+            await axios.post(status.paused ? '/api/resume' : '/api/pause', {}, getAuthHeaders());
+            fetchStatus();
+        } catch (error) {
+            console.error('Error pausing task:', error);
+            alert("Failed to pause task: " + (error.response?.data?.detail || error.message));
+        } finally {
+            setLoading(false);
+        }
+    };
+
+    const handleStopAfterCurrent = async () => {
+        setLoading(true);
+        try {
+            await axios.post('/api/stop_after_current', { enabled: !status.stop_after_current }, getAuthHeaders());
+            fetchStatus();
+        } catch (error) {
+            console.error('Error requesting stop after current file:', error);
+        } finally {
+            setLoading(false);
+        }
+    };
+
     const isRunning = status.is_running;
+    // Direct-to-target splits report real progress: bytes fsync'd to the target drive
+    const flushedProgress = status.bytes_total > 0 ? (status.bytes_flushed * 100) / status.bytes_total : 0;
 
     return (
         <div className="task-control status-card">
             <div className="status-header">
                 <h2>Task Status</h2>
-                <span className={`status-badge ${isRunning ? 'active' : ''}`}>
-                    {isRunning ? 'RUNNING' : 'IDLE'}
+                <span className={`status-badge ${isRunning && !status.paused ? 'active' : ''}`}>
+                    {isRunning ? (status.paused ? 'PAUSED' : 'RUNNING') : 'IDLE'}
                 </span>
             </div>
 
@@ -83,15 +111,21 @@ const TaskControl = ({ selectedFiles, onTaskChange, onTaskComplete }) => {
                 <div className="progress-container">
                     <div
                         className="progress-bar-fill"
-                        style={{ width: `${status.progress || (isRunning ? 100 : 0)}%` }} // Fake progress if running
+                        style={{ width: `${flushedProgress || status.progress || (isRunning ? 100 : 0)}%` }} // Fake progress if running
                     ></div>
                 </div>
 
                 <div className="status-info">
                     <p className="status-text">
-                        {isRunning ? `Processing...` : 'Ready to process files.'}
+                        {isRunning ? (status.paused ? 'Paused. Disk I/O is suspended, progress is kept.' : `Processing...`) : 'Ready to process files.'}
                     </p>
 
+                    {isRunning && status.stop_after_current && (
+                        <p className="status-text" style={{ fontSize: '0.85rem' }}>
+                            Stopping after the current file.
+                        </p>
+                    )}
+
                     {/* Visual Feedback for Stopped Process */}
                     {!isRunning && stopFeedback && (
                         <div className="feedback-message" style={{ color: '#da3633', fontWeight: 'bold', display: 'flex', alignItems: 'center', gap: '0.5rem', marginBottom: '0.5rem' }}>
@@ -100,6 +134,12 @@ const TaskControl = ({ selectedFiles, onTaskChange, onTaskComplete }) => {
                         </div>
                     )}
 
+                    {status.resume_saved_bytes > 0 && (
+                        <p className="status-text" style={{ fontSize: '0.85rem' }}>
+                            Resumed interrupted archive: {(status.resume_saved_bytes / (1024 * 1024 * 1024)).toFixed(1)} GB not rewritten
+                        </p>
+                    )}
+
                     {status.last_output && (
                         <div className="console-output">
                             <Info size={14} />
@@ -111,7 +151,7 @@ const TaskControl = ({ selectedFiles, onTaskChange, onTaskComplete }) => {
                 <div className="control-actions">
                     <button
                         className="btn-primary"
-                        onClick={handleStart}
+                        onClick={() => handleStart(false)}
                         disabled={!selectedFiles || selectedFiles.length === 0 || loading || isRunning}
                         title={(!selectedFiles || selectedFiles.length === 0) ? "Select files first" : "Start splitting"}
                     >
@@ -119,6 +159,38 @@ const TaskControl = ({ selectedFiles, onTaskChange, onTaskComplete }) => {
                         Start Split
                     </button>
 
+                    {targetAvailable && (
+                        <button
+                            className="btn-primary"
+                            onClick={() => handleStart(true)}
+                            disabled={!selectedFiles || selectedFiles.length === 0 || loading || isRunning}
+                            title="Write the volumes straight to the target drive"
+                        >
+                            <HardDrive size={18} />
+                            Split to Target
+                        </button>
+                    )}
+
+                    <button
+                        className="btn-secondary"
+                        onClick={handlePause}
+                        disabled={loading || !isRunning}
+                        title={status.paused ? "Continue the split" : "Suspend the split without losing progress"}
+                    >
+                        {status.paused ? <Play size={18} /> : <Pause size={18} />}
+                        {status.paused ? 'Resume' : 'Pause'}
+                    </button>
+
+                    <button
+                        className="btn-secondary"
+                        onClick={handleStopAfterCurrent}
+                        disabled={loading || !isRunning}
+                        title={status.stop_after_current ? "Keep going with the rest of the batch" : "Finish the current file, then stop"}
+                    >
+                        <SkipForward size={18} />
+                        {status.stop_after_current ? 'Continue Batch' : 'Stop After Current'}
+                    </button>
+
                     <button
                         className="btn-danger"
                         onClick={handleKill}
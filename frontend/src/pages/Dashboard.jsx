@@ -6,6 +6,7 @@ const Dashboard = () => {
     const [selectedFiles, setSelectedFiles] = useState([]);
     const [isTaskRunning, setIsTaskRunning] = useState(false);
     const [refreshTrigger, setRefreshTrigger] = useState(0);
+    const [targetAvailable, setTargetAvailable] = useState(false);
 
     const triggerRefresh = () => {
         setRefreshTrigger(prev => prev + 1);
@@ -17,6 +18,7 @@ const Dashboard = () => {
                 selectedFiles={selectedFiles}
                 onTaskChange={setIsTaskRunning}
                 onTaskComplete={triggerRefresh}
+                targetAvailable={targetAvailable}
             />
 
             <section className="manager-panel">
@@ -35,6 +37,7 @@ const Dashboard = () => {
                     isLocked={isTaskRunning}
                     refreshTrigger={refreshTrigger}
                     onManualRefresh={triggerRefresh}
+                    onTargetAvailable={setTargetAvailable}
                 />
             </section>
         </main>
@@ -284,6 +284,72 @@ const SettingsPage = () => {
                             </label>
                         </div>
                     </div>
+
+                    {/* Checksum Toggle */}
+                    <div className="form-group">
+                        <div style={{ display: 'flex', alignItems: 'center', justifyContent: 'space-between', background: 'rgba(255,255,255,0.03)', padding: '1rem', borderRadius: '8px' }}>
+                            <div>
+                                <h4 style={{ margin: '0 0 0.25rem 0', color: 'var(--text-primary)' }}>Verify Archives</h4>
+                                <p style={{ margin: 0, fontSize: '0.85rem', color: 'var(--text-secondary)' }}>
+                                    Hash each file while it is split and store a <code>.blake2.json</code> checksum
+                                    next to the volumes, so archives can be verified later via <code>/api/verify</code>.
+                                </p>
+                            </div>
+
+                            <label className="toggle-switch" style={{ position: 'relative', display: 'inline-block', width: '50px', height: '28px' }}>
+                                <input
+                                    type="checkbox"
+                                    checked={settings.verify_checksums}
+                                    onChange={(e) => handleChange('verify_checksums', e.target.checked)}
+                                    style={{ opacity: 0, width: 0, height: 0 }}
+                                />
+                                <span style={{
+                                    position: 'absolute', cursor: 'pointer', top: 0, left: 0, right: 0, bottom: 0,
+                                    backgroundColor: settings.verify_checksums ? 'var(--accent-color)' : '#444',
+                                    transition: '.4s', borderRadius: '34px'
+                                }}>
+                                    <span style={{
+                                        position: 'absolute', content: '""', height: '20px', width: '20px',
+                                        left: settings.verify_checksums ? '26px' : '4px', bottom: '4px',
+                                        backgroundColor: 'white', transition: '.4s', borderRadius: '50%'
+                                    }}></span>
+                                </span>
+                            </label>
+                        </div>
+                    </div>
+
+                    {/* Duplicate Toggle */}
+                    <div className="form-group">
+                        <div style={{ display: 'flex', alignItems: 'center', justifyContent: 'space-between', background: 'rgba(255,255,255,0.03)', padding: '1rem', borderRadius: '8px' }}>
+                            <div>
+                                <h4 style={{ margin: '0 0 0.25rem 0', color: 'var(--text-primary)' }}>Archive Duplicates Once</h4>
+                                <p style={{ margin: 0, fontSize: '0.85rem', color: 'var(--text-secondary)' }}>
+                                    Hardlinked copies are always archived once. When enabled, identical copies
+                                    (same size and checksum) are too, and their volumes are hardlinked or reflinked.
+                                </p>
+                            </div>
+
+                            <label className="toggle-switch" style={{ position: 'relative', display: 'inline-block', width: '50px', height: '28px' }}>
+                                <input
+                                    type="checkbox"
+                                    checked={settings.dedupe_duplicates}
+                                    onChange={(e) => handleChange('dedupe_duplicates', e.target.checked)}
+                                    style={{ opacity: 0, width: 0, height: 0 }}
+                                />
+                                <span style={{
+                                    position: 'absolute', cursor: 'pointer', top: 0, left: 0, right: 0, bottom: 0,
+                                    backgroundColor: settings.dedupe_duplicates ? 'var(--accent-color)' : '#444',
+                                    transition: '.4s', borderRadius: '34px'
+                                }}>
+                                    <span style={{
+                                        position: 'absolute', content: '""', height: '20px', width: '20px',
+                                        left: settings.dedupe_duplicates ? '26px' : '4px', bottom: '4px',
+                                        backgroundColor: 'white', transition: '.4s', borderRadius: '50%'
+                                    }}></span>
+                                </span>
+                            </label>
+                        </div>
+                    </div>
                 </div>
 
                 <div style={{ marginTop: '2rem', display: 'flex', justifyContent: 'flex-end' }}>
@@ -6,7 +6,9 @@ const API_URL = import.meta.env.VITE_API_URL || '/api';
 export const useSettingsStore = create((set, get) => ({
     settings: {
         theme: 'dark',
-        include_subtitles: true
+        include_subtitles: true,
+        verify_checksums: false,
+        dedupe_duplicates: false
     },
     loading: false,
     error: null,